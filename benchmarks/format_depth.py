@@ -0,0 +1,66 @@
+"""
+Time the formatting of queries nested deeper and deeper.
+
+The nodes build documents which are rendered once, so the time per nesting
+level should stay about the same whatever the depth, although the output of
+nested subqueries grows with the square of the depth, with their indentation.
+
+    python benchmarks/format_depth.py
+"""
+import timeit
+
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+DEPTHS = (100, 200, 400, 800, 1600)
+
+
+def nested_subqueries(depth: int) -> str:
+    sql = "SELECT a FROM t"
+    for _ in range(depth):
+        sql = "SELECT a, b FROM (" + sql + ") WHERE a > 1"
+    return sql
+
+
+def nested_function_calls(depth: int) -> str:
+    return "SELECT " + "f(a, " * depth + "a" + ")" * depth + " FROM t"
+
+
+def nested_joins(depth: int) -> str:
+    from_item = "t0"
+    for i in range(1, depth + 1):
+        from_item = "({} JOIN t{} ON a = b)".format(from_item, i)
+    return "SELECT a FROM " + from_item
+
+
+def nested_cases(depth: int) -> str:
+    expression = "a"
+    for _ in range(depth):
+        expression = "CASE WHEN a > 1 THEN {} ELSE b END".format(expression)
+    return "SELECT " + expression + " FROM t"
+
+
+def time_formatting(sql: str, repeat: int = 3) -> float:
+    statement = SQLStatementParser.parse(to_tokens(sql))
+    return min(timeit.repeat(statement.transform, number=1, repeat=repeat))
+
+
+def main():
+    for make_sql in (
+        nested_subqueries,
+        nested_function_calls,
+        nested_joins,
+        nested_cases,
+    ):
+        print(make_sql.__name__)
+        for depth in DEPTHS:
+            seconds = time_formatting(make_sql(depth))
+            print(
+                "  depth {:>5}: {:8.2f} ms, {:6.2f} us per level".format(
+                    depth, seconds * 1000, seconds / depth * 1_000_000
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measure the memory peak of formatting a large query to a string, and to a
+stream, with tracemalloc.
+
+Streaming renders the text in pieces, so that its peak only adds a buffer to
+the documents of the nodes, where building the string adds the whole text,
+which grows with the indentation of the nested subqueries.
+
+    python benchmarks/format_streaming.py
+"""
+import os
+import time
+import tracemalloc
+from typing import Any, Callable, Tuple
+
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+COLUMNS = 40
+DEPTHS = (50, 100, 200)
+
+
+def reporting_query(depth: int) -> str:
+    columns = ", ".join(
+        "SUM(amount_{0}) AS total_{0}".format(i) for i in range(COLUMNS)
+    )
+    sql = "SELECT {} FROM sales".format(columns)
+    for i in range(depth):
+        sql = "SELECT {} FROM ({}) AS level_{} WHERE total_0 > {}".format(
+            columns, sql, i, i
+        )
+    return sql
+
+
+def measured(format_statement: Callable[[Any], Any], sql: str) -> Tuple[int, float]:
+    statement = SQLStatementParser.parse(to_tokens(sql))
+    tracemalloc.start()
+    start = time.perf_counter()
+    format_statement(statement)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, seconds
+
+
+def main():
+    with open(os.devnull, "w") as devnull:
+        for depth in DEPTHS:
+            sql = reporting_query(depth)
+            output_size = len(SQLStatementParser.parse(to_tokens(sql)).transform())
+            print("depth {}, {:.1f} MB formatted".format(depth, output_size / 1e6))
+            for name, format_statement in (
+                ("string", lambda statement: statement.transform()),
+                ("stream", lambda statement: statement.transform_to(devnull.write)),
+            ):
+                peak, seconds = measured(format_statement, sql)
+                print(
+                    "  {}: {:7.1f} MB peak, {:6.2f} s".format(name, peak / 1e6, seconds)
+                )
+
+
+if __name__ == "__main__":
+    main()
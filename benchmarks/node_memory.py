@@ -0,0 +1,94 @@
+"""
+Measure the memory used by each node of syntax trees, with tracemalloc.
+
+The nodes of a parsed query are copied twice: as instances of their class,
+which keeps attributes in slots, and as instances of plain classes keeping the
+same attributes in a ``__dict__``, like the nodes were before using slots.
+Attribute values are shared by the copies, so only the nodes are measured.
+
+    python benchmarks/node_memory.py
+"""
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlvalidator.grammar import sql
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+QUERY = "SELECT {} FROM t JOIN u ON t.id = u.id WHERE {} GROUP BY 1 ORDER BY 2".format(
+    ", ".join("t.col{0} + u.col{0} * 2 AS c{0}".format(i) for i in range(200)),
+    " AND ".join("t.col{0} > {0}".format(i) for i in range(200)),
+)
+
+
+def attributes(node: Any) -> Dict[str, Any]:
+    values = {}
+    for cls in type(node).__mro__:
+        for name in vars(cls).get("__slots__", ()):
+            try:
+                values[name] = vars(cls)[name].__get__(node)
+            except AttributeError:
+                pass
+    return values
+
+
+def nodes(statement: Any) -> List[Tuple[type, Dict[str, Any]]]:
+    found = []
+    stack = [statement]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif type(value).__module__ == sql.__name__:
+            values = attributes(value)
+            found.append((type(value), values))
+            stack.extend(values.values())
+    return found
+
+
+def allocated(build: Callable[[], List[Any]]) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copies = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del copies
+    return size
+
+
+def slotted_copies(found: List[Tuple[type, Dict[str, Any]]]) -> List[Any]:
+    copies = []
+    for cls, values in found:
+        copy: Any = object.__new__(cls)
+        for name, value in values.items():
+            setattr(copy, name, value)
+        copies.append(copy)
+    return copies
+
+
+def dict_copies(
+    found: List[Tuple[type, Dict[str, Any]]], classes: Dict[type, type]
+) -> List[Any]:
+    copies = []
+    for cls, values in found:
+        copy = classes[cls]()
+        for name, value in values.items():
+            setattr(copy, name, value)
+        copies.append(copy)
+    return copies
+
+
+def main():
+    statement = SQLStatementParser.parse(to_tokens(QUERY))
+    found = nodes(statement)
+    classes = {cls: type(cls.__name__, (), {}) for cls, _ in found}
+
+    with_dict = allocated(lambda: dict_copies(found, classes))
+    with_slots = allocated(lambda: slotted_copies(found))
+    print("{} nodes".format(len(found)))
+    print("  __dict__: {:6.1f} bytes per node".format(with_dict / len(found)))
+    print("  slots:    {:6.1f} bytes per node".format(with_slots / len(found)))
+
+
+if __name__ == "__main__":
+    main()
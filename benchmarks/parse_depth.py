@@ -0,0 +1,80 @@
+"""
+Time the parsing of queries nested deeper and deeper.
+
+The parser runs on an explicit stack, so the time per nesting level should
+stay about the same whatever the depth, and no depth raises RecursionError.
+A syntax error in the innermost subquery should be reported right away,
+without parsing the enclosing levels again.
+
+    python benchmarks/parse_depth.py
+"""
+import sys
+import timeit
+
+from sqlvalidator.grammar.lexer import ParsingError, SQLStatementParser
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+DEPTHS = (100, 200, 400, 800, 1600, 3200)
+
+
+def nested_parenthesis(depth: int) -> str:
+    return "SELECT " + "(" * depth + "a" + ")" * depth + " FROM t"
+
+
+def nested_subqueries(depth: int) -> str:
+    sql = "SELECT a FROM t"
+    for _ in range(depth):
+        sql = "SELECT a FROM (" + sql + ")"
+    return sql
+
+
+def nested_function_calls(depth: int) -> str:
+    return "SELECT " + "f(a, " * depth + "a" + ")" * depth + " FROM t"
+
+
+def nested_joins(depth: int) -> str:
+    from_item = "t0"
+    for i in range(1, depth + 1):
+        from_item = "({} JOIN t{} ON a = b)".format(from_item, i)
+    return "SELECT a FROM " + from_item
+
+
+def invalid_nested_subqueries(depth: int) -> str:
+    sql = "SELECT a FROM t GROUP a"
+    for _ in range(depth):
+        sql = "SELECT a FROM (" + sql + ")"
+    return sql
+
+
+def parse(sql: str) -> None:
+    try:
+        SQLStatementParser.parse(to_tokens(sql))
+    except ParsingError:
+        pass
+
+
+def time_parsing(sql: str, repeat: int = 5) -> float:
+    return min(timeit.repeat(lambda: parse(sql), number=1, repeat=repeat))
+
+
+def main():
+    print("Python recursion limit: {}".format(sys.getrecursionlimit()))
+    for make_sql in (
+        nested_parenthesis,
+        nested_subqueries,
+        nested_function_calls,
+        nested_joins,
+        invalid_nested_subqueries,
+    ):
+        print(make_sql.__name__)
+        for depth in DEPTHS:
+            seconds = time_parsing(make_sql(depth))
+            print(
+                "  depth {:>5}: {:8.2f} ms, {:6.2f} us per level".format(
+                    depth, seconds * 1000, seconds / depth * 1_000_000
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare extract_references with a full parse of the same queries.
+
+The token buffer is built by both, so its time is also shown on its own.
+
+    python benchmarks/references.py
+"""
+import timeit
+
+import sqlvalidator
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import TokenBuffer, to_tokens
+
+REPORTING_QUERY = """
+SELECT a.id, b.name, COUNT(DISTINCT c.value) AS n, SUM(IF(c.x > 1, 1, 0)) total,
+  CASE WHEN a.flag THEN 'y' ELSE 'n' END flag_text,
+  ROW_NUMBER() OVER (PARTITION BY a.id ORDER BY b.ts DESC) rn
+FROM project.dataset.first a
+LEFT JOIN (SELECT id, name, ts FROM second WHERE deleted IS NULL) b ON a.id = b.id
+JOIN third c USING (id)
+WHERE a.created BETWEEN '2020-01-01' AND '2021-01-01' AND c.kind IN ('x', 'y')
+GROUP BY a.id, b.name, flag_text
+HAVING COUNT(*) > 3
+ORDER BY n DESC
+LIMIT 100
+"""
+
+WIDE_QUERY = "SELECT {} FROM t JOIN u ON t.id = u.id WHERE {}".format(
+    ", ".join("t.col{0} + u.col{0} * 2 AS c{0}".format(i) for i in range(200)),
+    " AND ".join("t.col{0} > {0}".format(i) for i in range(200)),
+)
+
+
+def time_call(function, sql: str, number: int = 200, repeat: int = 5) -> float:
+    return min(timeit.repeat(lambda: function(sql), number=number, repeat=repeat))
+
+
+def main():
+    for name, sql in (("reporting", REPORTING_QUERY), ("wide", WIDE_QUERY)):
+        references = time_call(sqlvalidator.extract_references, sql)
+        parse = time_call(lambda s: SQLStatementParser.parse(to_tokens(s)), sql)
+        tokens = time_call(TokenBuffer, sql)
+        print(name)
+        print("  extract_references: {:8.2f} ms".format(references * 1000))
+        print("  full parse:         {:8.2f} ms".format(parse * 1000))
+        print("  token buffer:       {:8.2f} ms".format(tokens * 1000))
+        print("  speed-up: {:.1f}x".format(parse / references))
+
+
+if __name__ == "__main__":
+    main()
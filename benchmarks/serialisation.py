@@ -0,0 +1,91 @@
+"""
+Compare the size and the speed of the serialisation of syntax trees with
+pickling the attributes of each node, which nodes did before being pickled
+with the serialisation format.
+
+    python benchmarks/serialisation.py
+"""
+import copyreg
+import io
+import pickle
+import sys
+import timeit
+
+from sqlvalidator.grammar import serialisation, sql
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+SMALL_QUERY = "SELECT a, COUNT(*) n FROM t WHERE b > 1 GROUP BY a ORDER BY n DESC"
+
+WIDE_QUERY = "SELECT {} FROM t JOIN u ON t.id = u.id WHERE {}".format(
+    ", ".join("t.col{0} + u.col{0} * 2 AS c{0}".format(i) for i in range(200)),
+    " AND ".join("t.col{0} > {0}".format(i) for i in range(200)),
+)
+
+
+def _rebuild(cls, state):
+    node = object.__new__(cls)
+    for name, value in state.items():
+        setattr(node, name, value)
+    return node
+
+
+def _reduce_attributes(node):
+    state = {
+        name: getattr(node, name)
+        for name in sql.node_fields(type(node))
+        if hasattr(node, name)
+    }
+    return _rebuild, (type(node), state)
+
+
+# Pickles the attributes of the nodes, rather than their serialisation
+_DISPATCH_TABLE = copyreg.dispatch_table.copy()
+_DISPATCH_TABLE.update(
+    (cls, _reduce_attributes)
+    for cls in vars(sql).values()
+    if isinstance(cls, type) and issubclass(cls, sql._Node)
+)
+
+
+def pickle_dumps(value) -> bytes:
+    f = io.BytesIO()
+    pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = _DISPATCH_TABLE
+    pickler.dump(value)
+    return f.getvalue()
+
+
+def time_call(function, number: int = 50, repeat: int = 7) -> float:
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def main():
+    # pickle recurses into each level of the long chain of AND conditions
+    sys.setrecursionlimit(10000)
+    for name, query in (("small", SMALL_QUERY), ("wide", WIDE_QUERY)):
+        statement = SQLStatementParser.parse(to_tokens(query))
+        pickled = pickle_dumps(statement)
+        serialised = serialisation.dumps(statement)
+
+        pickle_dumps_time = time_call(lambda: pickle_dumps(statement))
+        dumps = time_call(lambda: serialisation.dumps(statement))
+        pickle_loads = time_call(lambda: pickle.loads(pickled))
+        loads = time_call(lambda: serialisation.loads(serialised))
+
+        print(name)
+        print("  size:  {:8d} B   pickle {:8d} B".format(len(serialised), len(pickled)))
+        print(
+            "  dumps: {:8.3f} ms  pickle {:8.3f} ms".format(
+                dumps * 1000, pickle_dumps_time * 1000
+            )
+        )
+        print(
+            "  loads: {:8.3f} ms  pickle {:8.3f} ms".format(
+                loads * 1000, pickle_loads * 1000
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
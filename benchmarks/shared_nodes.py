@@ -0,0 +1,73 @@
+"""
+Measure the memory saved by sharing identical subtrees between statements, and
+the time to compare statements.
+
+    python benchmarks/shared_nodes.py
+"""
+import timeit
+import tracemalloc
+
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.sharing import SharedNodes
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+# Variations of a query over the same table, like the queries of a dashboard
+QUERIES = [
+    """
+    WITH daily AS (SELECT day, SUM(amount) amount FROM sales GROUP BY day)
+    SELECT day, amount, {0}(amount) OVER (ORDER BY day) metric
+    FROM daily WHERE day > '2020-01-01' AND amount > {1}
+    """.format(
+        function, threshold
+    )
+    for function in ("SUM", "AVG", "MAX", "MIN")
+    for threshold in range(25)
+]
+
+
+def allocated(shared_nodes=None) -> int:
+    tokens = [to_tokens(sql) for sql in QUERIES]
+    tracemalloc.start()
+    statements = [
+        SQLStatementParser.parse(t, shared_nodes=shared_nodes) for t in tokens
+    ]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del statements
+    return size
+
+
+def time_call(function, number: int = 1000, repeat: int = 7) -> float:
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def main():
+    print("{} queries".format(len(QUERIES)))
+    print("  memory:        {:8d} B".format(allocated()))
+    print("  memory shared: {:8d} B".format(allocated(SharedNodes())))
+
+    sql = QUERIES[0]
+    left = SQLStatementParser.parse(to_tokens(sql))
+    right = SQLStatementParser.parse(to_tokens(sql))
+    other = SQLStatementParser.parse(to_tokens(QUERIES[1]))
+    shared_nodes = SharedNodes()
+    shared_left = SQLStatementParser.parse(to_tokens(sql), shared_nodes=shared_nodes)
+    shared_right = SQLStatementParser.parse(to_tokens(sql), shared_nodes=shared_nodes)
+    print(
+        "  equal:            {:8.2f} us".format(time_call(lambda: left == right) * 1e6)
+    )
+    hash(right), hash(other)
+    print(
+        "  different, hashed: {:7.2f} us".format(
+            time_call(lambda: right == other) * 1e6
+        )
+    )
+    print(
+        "  equal, shared:    {:8.2f} us".format(
+            time_call(lambda: shared_left == shared_right) * 1e6
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measure the memory of statements kept resident, with their names interned in
+a symbol table or not, and the time to intern them.
+
+    python benchmarks/symbols.py
+"""
+import gc
+import time
+import tracemalloc
+
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.symbols import SymbolTable
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+COLUMNS = ["customer_id", "order_date", "amount", "quantity", "region"]
+# Queries over the same columns, like the queries of a dashboard
+QUERIES = [
+    "SELECT {0}, SUM(amount) AS total_{1} FROM orders AS o "
+    "WHERE region = 'eu' AND quantity > {1} GROUP BY {0}".format(
+        ", ".join(COLUMNS), threshold
+    )
+    for threshold in range(500)
+]
+
+
+def allocated(symbols=None) -> int:
+    tokens = [to_tokens(sql) for sql in QUERIES]
+    gc.collect()
+    tracemalloc.start()
+    statements = [SQLStatementParser.parse(t, symbols=symbols) for t in tokens]
+    # The token buffers hold the query strings, not the names of the nodes
+    del tokens
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del statements
+    return size
+
+
+def main():
+    print("{} queries".format(len(QUERIES)))
+    print("  memory:          {:8d} B".format(allocated()))
+    print("  memory interned: {:8d} B".format(allocated(SymbolTable())))
+
+    statements = [SQLStatementParser.parse(to_tokens(sql)) for sql in QUERIES]
+    symbols = SymbolTable()
+    start = time.perf_counter()
+    for statement in statements:
+        symbols.intern_names(statement)
+    seconds = time.perf_counter() - start
+    print(
+        "  interning: {:.1f} us per query, {} names".format(
+            seconds / len(statements) * 1e6, len(symbols)
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
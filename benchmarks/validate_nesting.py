@@ -0,0 +1,35 @@
+"""
+Measure the validation time of queries over nested derived tables. Each level
+selects all the columns of the level below, so that the fields of each
+subquery are needed by the validation of every level above it.
+
+    python benchmarks/validate_nesting.py
+"""
+import time
+
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+COLUMNS = 200
+DEPTHS = (5, 10, 20, 40)
+
+
+def nested_query(depth: int) -> str:
+    columns = ", ".join("c{}".format(i) for i in range(COLUMNS))
+    sql = "SELECT {} FROM t".format(columns)
+    for i in range(depth):
+        sql = "SELECT *, c0 + c{0} AS s{0} FROM ({1}) WHERE c{0} > 0".format(i, sql)
+    return sql
+
+
+def main():
+    for depth in DEPTHS:
+        statement = SQLStatementParser.parse(to_tokens(nested_query(depth)))
+        start = time.perf_counter()
+        errors = statement.validate()
+        seconds = time.perf_counter() - start
+        print("depth {:2d}: {:7.3f} s, {} errors".format(depth, seconds, len(errors)))
+
+
+if __name__ == "__main__":
+    main()
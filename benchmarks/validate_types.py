@@ -0,0 +1,37 @@
+"""
+Measure the validation time of queries with long WHERE conditions, whose
+arguments are typed to check that they are booleans.
+
+    python benchmarks/validate_types.py
+"""
+import time
+
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+SIZES = (100, 200, 400, 800)
+
+
+def filtered_query(size: int) -> str:
+    """
+    Query filtering on size nested groups of conditions, like
+    (c0 = 0 OR (c1 = 1 AND (...))).
+    """
+    condition = "flag"
+    for i in range(size):
+        operator = "AND" if i % 2 else "OR"
+        condition = "(c{0} = {0} {1} {2} {1} flag_{0})".format(i, operator, condition)
+    return "SELECT c0 FROM t WHERE {} AND c0 > 0".format(condition)
+
+
+def main():
+    for size in SIZES:
+        statement = SQLStatementParser.parse(to_tokens(filtered_query(size)))
+        start = time.perf_counter()
+        errors = statement.validate()
+        seconds = time.perf_counter() - start
+        print("{:4d} groups: {:7.3f} s, {} errors".format(size, seconds, len(errors)))
+
+
+if __name__ == "__main__":
+    main()
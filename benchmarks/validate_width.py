@@ -0,0 +1,49 @@
+"""
+Measure the validation time of wide SELECTs over a join of two subqueries,
+resolving each column, with or without the alias of its subquery, in the
+fields known by the query.
+
+    python benchmarks/validate_width.py
+"""
+import time
+
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+WIDTHS = (250, 500, 1000, 2000)
+
+
+def wide_query(width: int) -> str:
+    """
+    Query over the even columns of t and the odd columns of u, selecting half
+    of them with the alias of their subquery, and grouping by all of them.
+    """
+    columns = ["c{}".format(i) for i in range(width)]
+    selected = ", ".join(
+        ("l." if i % 4 == 0 else "r." if i % 4 == 1 else "") + column
+        for i, column in enumerate(columns)
+    )
+    return (
+        "SELECT {}, c0 + c1 AS total "
+        "FROM (SELECT {} FROM t) l "
+        "JOIN (SELECT {} FROM u) r ON l.c0 = r.c1 "
+        "WHERE c2 > 0 GROUP BY {}".format(
+            selected,
+            ", ".join(columns[::2]),
+            ", ".join(columns[1::2]),
+            ", ".join(columns),
+        )
+    )
+
+
+def main():
+    for width in WIDTHS:
+        statement = SQLStatementParser.parse(to_tokens(wide_query(width)))
+        start = time.perf_counter()
+        errors = statement.validate()
+        seconds = time.perf_counter() - start
+        print("{:5d} columns: {:7.3f} s, {} errors".format(width, seconds, len(errors)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,4 @@
-from sqlvalidator.sql_formatter import format_sql  # noqa
+from sqlvalidator.cache import disable_parse_cache, enable_parse_cache  # noqa
+from sqlvalidator.grammar.references import extract_references  # noqa
+from sqlvalidator.sql_formatter import format_sql, format_sql_to  # noqa
 from sqlvalidator.sql_validator import parse  # noqa
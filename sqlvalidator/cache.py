@@ -0,0 +1,279 @@
+"""
+Opt-in cache of parsed SQL statements.
+
+Applications formatting or validating the same queries over and over can skip
+the parsing step with::
+
+    import sqlvalidator
+
+    cache = sqlvalidator.enable_parse_cache(max_entries=4096)
+    ...
+    print(cache.info())
+
+Queries are keyed by their token stream, where reserved keywords are
+lowercased. Two queries only differing by their whitespace or by the case of
+their keywords share the same parsed statement.
+
+Formatting or validating a statement caches its documents on its nodes, see
+sql._Node, so the entries are measured again when they grow.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from sqlvalidator.grammar.keywords import keyword_ids
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import KIND_WORD, TokenBuffer, to_tokens
+
+# Keywords that cannot be used as identifiers. The formatted output and the
+# validation of a query do not depend on how they are spelled.
+_RESERVED_KEYWORDS = keyword_ids(
+    (
+        "all",
+        "and",
+        "as",
+        "asc",
+        "between",
+        "by",
+        "case",
+        "cast",
+        "contains",
+        "cross",
+        "desc",
+        "distinct",
+        "else",
+        "end",
+        "except",
+        "false",
+        "from",
+        "full",
+        "group",
+        "having",
+        "ignore",
+        "in",
+        "inner",
+        "intersect",
+        "is",
+        "join",
+        "left",
+        "like",
+        "limit",
+        "no",
+        "not",
+        "null",
+        "nulls",
+        "on",
+        "or",
+        "order",
+        "outer",
+        "over",
+        "partition",
+        "range",
+        "respect",
+        "right",
+        "rollup",
+        "rows",
+        "select",
+        "then",
+        "true",
+        "union",
+        "unnest",
+        "using",
+        "when",
+        "where",
+        "with",
+    )
+)
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+
+
+def _normalised_tokens(buffer: TokenBuffer) -> Tuple[str, ...]:
+    """
+    Tokens of the buffer, with reserved keywords lowercased.
+    """
+    tokens = list(buffer)
+    for index, (kind, keyword) in enumerate(zip(buffer.kinds, buffer.keywords)):
+        if kind == KIND_WORD and keyword in _RESERVED_KEYWORDS:
+            tokens[index] = tokens[index].lower()
+    return tuple(tokens)
+
+
+def _approximate_size(value: Any) -> int:
+    """
+    Rough memory footprint in bytes of an object and everything it refers to.
+    """
+    size = 0
+    seen = set()
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for slot in vars(cls).get("__slots__", ()):
+                    # Read through the slot itself, which a property can hide
+                    try:
+                        stack.append(vars(cls)[slot].__get__(obj))
+                    except AttributeError:
+                        pass
+    return size
+
+
+def _cached_results(statement: Any) -> int:
+    """
+    Number of documents and results cached on the statement itself. Nested
+    nodes only cache new documents when the statement caches a new one.
+    """
+    return len(getattr(statement, "_documents", None) or ())
+
+
+class ParseCache:
+    """
+    Thread-safe LRU cache of parsed statements.
+
+    The cache is bounded by a number of entries, by an approximate size in
+    bytes, or both. The least recently used statements are evicted first.
+    Statements are shared between callers and must not be modified.
+    """
+
+    def __init__(
+        self, max_entries: Optional[int] = 1024, max_bytes: Optional[int] = None
+    ):
+        if max_entries is None and max_bytes is None:
+            raise ValueError("max_entries or max_bytes is required")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Statement, size and number of cached results when it was measured
+        self._statements: "OrderedDict[Hashable, Tuple[Any, int, int]]" = OrderedDict()
+        # Keys of the statements, by id, to measure them again
+        self._keys: Dict[int, Hashable] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._size_bytes = 0
+
+    def parse(self, sql: str) -> Any:
+        tokens = to_tokens(sql)
+        key = _normalised_tokens(tokens.buffer)
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is not None:
+                self._statements.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+        if entry is not None:
+            self.measure(entry[0])
+            return entry[0]
+
+        # Parsing happens outside of the lock, so that threads missing
+        # different queries do not wait on each other.
+        statement = SQLStatementParser.parse(tokens)
+        cached = _cached_results(statement)
+        size = _approximate_size(key) + _approximate_size(statement)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return statement
+
+        with self._lock:
+            if key not in self._statements:
+                self._statements[key] = (statement, size, cached)
+                self._keys[id(statement)] = key
+                self._size_bytes += size
+                self._evict()
+        return statement
+
+    def measure(self, statement: Any) -> None:
+        """
+        Measure the entry of the statement again if formatting or validating
+        it cached new documents, so that max_bytes also bounds them.
+        """
+        with self._lock:
+            key = self._keys.get(id(statement))
+            entry = self._statements.get(key)
+            if entry is None or entry[2] == _cached_results(statement):
+                return
+        # Measured outside of the lock, like the statements are parsed
+        cached = _cached_results(statement)
+        size = _approximate_size(key) + _approximate_size(statement)
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None or entry[0] is not statement:
+                return
+            self._statements[key] = (statement, size, cached)
+            self._size_bytes += size - entry[1]
+            self._evict()
+
+    def _evict(self) -> None:
+        while (
+            self.max_entries is not None and len(self._statements) > self.max_entries
+        ) or (self.max_bytes is not None and self._size_bytes > self.max_bytes):
+            _, (statement, size, _) = self._statements.popitem(last=False)
+            del self._keys[id(statement)]
+            self._size_bytes -= size
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, len(self._statements), self._size_bytes
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._keys.clear()
+            self._hits = self._misses = self._size_bytes = 0
+
+
+_parse_cache: Optional[ParseCache] = None
+
+
+def enable_parse_cache(
+    max_entries: Optional[int] = 1024, max_bytes: Optional[int] = None
+) -> ParseCache:
+    """
+    Cache the statements parsed by sqlvalidator.parse and format_sql.
+    """
+    global _parse_cache
+    _parse_cache = ParseCache(max_entries=max_entries, max_bytes=max_bytes)
+    return _parse_cache
+
+
+def disable_parse_cache() -> None:
+    global _parse_cache
+    _parse_cache = None
+
+
+def parse_statement(sql: str) -> Any:
+    cache = _parse_cache
+    if cache is None:
+        return SQLStatementParser.parse(to_tokens(sql))
+    return cache.parse(sql)
+
+
+def measure_statement(statement: Any) -> None:
+    """
+    Measure the statement again in the cache, after formatting or validating
+    it.
+    """
+    cache = _parse_cache
+    if cache is not None:
+        cache.measure(statement)
@@ -4,6 +4,7 @@ import tokenize
 from typing import IO, List, Optional, Set, Tuple
 
 from . import sql_validator
+from .result_cache import ResultCache
 
 NO_SQLFORMAT_COMMENT = "nosqlformat"
 NO_SQLVALIDATION_COMMENT = "nosqlvalidation"
@@ -70,6 +71,7 @@ def handle_inputs(
     check_input_format: bool,
     validate_input: bool,
     verbose_validate_input: bool,
+    cache: Optional[ResultCache] = None,
 ):
     inputs_info = InputSQLAnalyseInfo()
 
@@ -81,6 +83,7 @@ def handle_inputs(
             validate_input,
             verbose_validate_input,
             inputs_info.seen_files,
+            cache,
         )
         inputs_info.update(single_input_info)
 
@@ -108,6 +111,7 @@ def handle_one_input(
     validate_input_format: bool,
     verbose_validate_input_format: bool,
     seen_files: Set[str],
+    cache: Optional[ResultCache] = None,
 ) -> InputSQLAnalyseInfo:
 
     if os.path.isdir(src_input):
@@ -118,6 +122,7 @@ def handle_one_input(
             validate_input_format,
             verbose_validate_input_format,
             seen_files,
+            cache,
         )
     elif os.path.isfile(src_input):
         try:
@@ -128,6 +133,7 @@ def handle_one_input(
                 validate_input_format,
                 verbose_validate_input_format,
                 seen_files,
+                cache,
             )
         except RecursionError:
             print("could not analyse {}".format(src_input))
@@ -148,6 +154,7 @@ def analyse_dir(
     validate: bool,
     verbose_validate: bool,
     seen_files: Set[str],
+    cache: Optional[ResultCache] = None,
 ) -> InputSQLAnalyseInfo:
     seen_files = seen_files or set()
     result_infos = InputSQLAnalyseInfo(seen_files=seen_files)
@@ -164,6 +171,7 @@ def analyse_dir(
                         validate,
                         verbose_validate,
                         result_infos.seen_files,
+                        cache,
                     )
                     result_infos.update(file_result_info)
                 except RecursionError:
@@ -185,6 +193,7 @@ def analyse_file(
     validate: bool,
     verbose_validate: bool,
     seen_files: Set[str],
+    cache: Optional[ResultCache] = None,
 ) -> InputSQLAnalyseInfo:
     abs_filename = os.path.abspath(filename)
     if abs_filename in seen_files:
@@ -198,7 +207,7 @@ def analyse_file(
             count_has_errors,
             errors_locations,
         ) = compute_file_content(
-            file, format_input or check, validate or verbose_validate
+            file, format_input or check, validate or verbose_validate, cache
         )
 
     file_changed = count_changed_sql > 0
@@ -237,7 +246,10 @@ def analyse_file(
 
 
 def compute_file_content(
-    file: IO, should_format: bool, should_validate: bool
+    file: IO,
+    should_format: bool,
+    should_validate: bool,
+    cache: Optional[ResultCache] = None,
 ) -> Tuple[int, str, int, list]:
     count_changed_sql = 0
     count_has_errors = 0
@@ -262,7 +274,7 @@ def compute_file_content(
             token_generator, (None, None, None, None, None)
         )
         if next_token is None:
-            formatted_sql, sql_query = handle_sql_string(token_value)
+            formatted_sql, sql_query = handle_sql_string(token_value, cache)
             tokens.append((token_type, formatted_sql, starting, ending, line))
             tokens += following_tokens
             if formatted_sql != token_value:
@@ -296,7 +308,7 @@ def compute_file_content(
             should_validate and NO_SQLVALIDATION_COMMENT not in next_token_value
         )
         if next_token != tokenize.COMMENT or needs_format or needs_validate:
-            formatted_sql, sql_query = handle_sql_string(token_value)
+            formatted_sql, sql_query = handle_sql_string(token_value, cache)
             if (
                 formatted_sql != token_value
                 and NO_SQLFORMAT_COMMENT not in next_token_value
@@ -338,10 +350,13 @@ def compute_file_content(
     return count_changed_sql, formatted_file_content, count_has_errors, errors_locations
 
 
-def handle_sql_string(sql_string: str) -> Tuple[str, sql_validator.SQLQuery]:
+def handle_sql_string(
+    sql_string: str, cache: Optional[ResultCache] = None
+) -> Tuple[str, sql_validator.SQLQuery]:
     """
     Read a SQL string as input, potentially with quotes or not,
     and analyse it in order to get the formatter content and know if it is valid.
+    Results already computed by a previous run are read from the cache.
     """
     quotes = None
     quotes_prefix = None
@@ -371,7 +386,10 @@ def handle_sql_string(sql_string: str) -> Tuple[str, sql_validator.SQLQuery]:
         sql_string = sql_string[len(quotes_prefix) :]
     sql_string_without_quotes = sql_string[len(quotes) : -len(quotes)]
 
-    sql_query = sql_validator.SQLQuery(sql_string_without_quotes)
+    if cache is None:
+        sql_query = sql_validator.SQLQuery(sql_string_without_quotes)
+    else:
+        sql_query = cache.query(sql_string_without_quotes)
     formatted_sql = sql_query.format()
 
     if len(quotes) == 1 and "\n" in formatted_sql:
@@ -0,0 +1,264 @@
+"""
+Registry of the words and symbols the SQL parser takes decisions on.
+
+Every keyword gets a small integer id. Tokens are tagged with that id when the
+tokeniser produces them, so that the parser compares integers instead of
+lowercasing the same token again and again.
+"""
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+NOT_A_KEYWORD = 0
+
+_KEYWORD_NAMES: List[str] = [""]
+KEYWORD_IDS: Dict[str, int] = {}
+# Every spelling of a keyword met so far, e.g. "select", "SELECT" or "Select".
+# Only keywords are stored, so the mapping stays small.
+_SPELLINGS: Dict[Optional[str], int] = {}
+
+
+def _register(keyword: str) -> int:
+    if keyword not in KEYWORD_IDS:
+        KEYWORD_IDS[keyword] = len(_KEYWORD_NAMES)
+        _KEYWORD_NAMES.append(keyword)
+        for spelling in (keyword, keyword.upper(), keyword.title()):
+            _SPELLINGS[spelling] = KEYWORD_IDS[keyword]
+    return KEYWORD_IDS[keyword]
+
+
+# Punctuation and operators
+COMMA = _register(",")
+SEMI_COLON = _register(";")
+OPENING_PARENTHESIS = _register("(")
+CLOSING_PARENTHESIS = _register(")")
+OPENING_SQUARE_BRACKET = _register("[")
+CLOSING_SQUARE_BRACKET = _register("]")
+DOT = _register(".")
+PLUS = _register("+")
+MINUS = _register("-")
+ASTERISK = _register("*")
+SLASH = _register("/")
+EQUAL = _register("=")
+LOWER_THAN = _register("<")
+GREATER_THAN = _register(">")
+LOWER_OR_EQUAL = _register("<=")
+GREATER_OR_EQUAL = _register(">=")
+NOT_EQUAL = _register("!=")
+LOWER_OR_GREATER = _register("<>")
+SHIFT_LEFT = _register("<<")
+SHIFT_RIGHT = _register(">>")
+CONCATENATE = _register("||")
+BITWISE_AND = _register("&")
+BITWISE_OR = _register("|")
+BITWISE_XOR = _register("^")
+HASH = _register("#")
+
+# Statements and clauses
+SELECT = _register("select")
+WITH = _register("with")
+ALL = _register("all")
+DISTINCT = _register("distinct")
+ON = _register("on")
+FROM = _register("from")
+WHERE = _register("where")
+GROUP = _register("group")
+EACH = _register("each")
+BY = _register("by")
+ROLLUP = _register("rollup")
+HAVING = _register("having")
+ORDER = _register("order")
+ASC = _register("asc")
+DESC = _register("desc")
+LIMIT = _register("limit")
+OFFSET = _register("offset")
+AS = _register("as")
+USING = _register("using")
+UNNEST = _register("unnest")
+
+# Joins and set operators
+JOIN = _register("join")
+INNER = _register("inner")
+LEFT = _register("left")
+RIGHT = _register("right")
+FULL = _register("full")
+CROSS = _register("cross")
+OUTER = _register("outer")
+UNION = _register("union")
+INTERSECT = _register("intersect")
+EXCEPT = _register("except")
+
+# Expressions
+CASE = _register("case")
+WHEN = _register("when")
+THEN = _register("then")
+ELSE = _register("else")
+END = _register("end")
+CAST = _register("cast")
+ARRAY_AGG = _register("array_agg")
+COUNT = _register("count")
+TIMESTAMP_TRUNC = _register("timestamp_trunc")
+IGNORE = _register("ignore")
+RESPECT = _register("respect")
+NULLS = _register("nulls")
+FILTER = _register("filter")
+OVER = _register("over")
+PARTITION = _register("partition")
+ROWS = _register("rows")
+RANGE = _register("range")
+REPLACE = _register("replace")
+NOT = _register("not")
+IS = _register("is")
+IN = _register("in")
+LIKE = _register("like")
+CONTAINS = _register("contains")
+BETWEEN = _register("between")
+AND = _register("and")
+OR = _register("or")
+
+# Literals
+NULL = _register("null")
+TRUE = _register("true")
+YES = _register("yes")
+FALSE = _register("false")
+NO = _register("no")
+RAW_STRING_PREFIX = _register("r")
+
+# Types and date parts
+INT = _register("int")
+INT64 = _register("int64")
+FLOAT = _register("float")
+STRING = _register("string")
+TIMESTAMP = _register("timestamp")
+DATE = _register("date")
+MICROSECOND = _register("microsecond")
+SECOND = _register("second")
+MINUTE = _register("minute")
+HOUR = _register("hour")
+DAY = _register("day")
+WEEK = _register("week")
+MONTH = _register("month")
+QUARTER = _register("quarter")
+YEAR = _register("year")
+SECOND_MICROSECOND = _register("second_microsecond")
+MINUTE_MICROSECOND = _register("minute_microsecond")
+MINUTE_SECOND = _register("minute_second")
+HOUR_MICROSECOND = _register("hour_microsecond")
+HOUR_SECOND = _register("hour_second")
+HOUR_MINUTE = _register("hour_minute")
+DAY_MICROSECOND = _register("day_microsecond")
+DAY_SECOND = _register("day_second")
+DAY_MINUTE = _register("day_minute")
+DAY_HOUR = _register("day_hour")
+YEAR_MONTH = _register("year_month")
+DAYOFMONTH = _register("dayofmonth")
+DAYOFWEEK = _register("dayofweek")
+DAYOFYEAR = _register("dayofyear")
+
+# Token buffers store keyword ids in an array("B")
+assert len(_KEYWORD_NAMES) <= 256
+
+# Groups of keywords the parser and the reference scanner take decisions on.
+# They match the values of the node classes in sql.py, like Join.VALUES.
+JOIN_KEYWORDS = frozenset((JOIN, INNER, LEFT, RIGHT, FULL, CROSS, OUTER, COMMA, EACH))
+SET_OPERATOR_KEYWORDS = frozenset((UNION, INTERSECT, EXCEPT, ALL))
+BITWISE_KEYWORDS = frozenset(
+    (BITWISE_AND, BITWISE_OR, BITWISE_XOR, CONCATENATE, SHIFT_LEFT, SHIFT_RIGHT, HASH)
+)
+BOOLEAN_KEYWORDS = frozenset((TRUE, YES, FALSE, NO))
+NULL_KEYWORDS = frozenset((NULL,))
+TYPE_KEYWORDS = frozenset((INT, FLOAT, DAY, MONTH, TIMESTAMP, INT64, STRING, DATE))
+DATE_PART_KEYWORDS = frozenset(
+    (
+        MICROSECOND,
+        SECOND,
+        MINUTE,
+        HOUR,
+        DAY,
+        WEEK,
+        MONTH,
+        QUARTER,
+        YEAR,
+        SECOND_MICROSECOND,
+        MINUTE_MICROSECOND,
+        MINUTE_SECOND,
+        HOUR_MICROSECOND,
+        HOUR_SECOND,
+        HOUR_MINUTE,
+        DAY_MICROSECOND,
+        DAY_SECOND,
+        DAY_MINUTE,
+        DAY_HOUR,
+        YEAR_MONTH,
+        DAYOFMONTH,
+        DAYOFWEEK,
+        DAYOFYEAR,
+        DATE,
+    )
+)
+STRING_PREFIX_KEYWORDS = frozenset((RAW_STRING_PREFIX,))
+CONDITION_KEYWORDS = frozenset(
+    (
+        EQUAL,
+        GREATER_THAN,
+        LOWER_THAN,
+        LOWER_OR_EQUAL,
+        GREATER_OR_EQUAL,
+        NOT_EQUAL,
+        IS,
+        LIKE,
+        LOWER_OR_GREATER,
+        IN,
+        NOT,
+        CONTAINS,
+    )
+)
+BOOLEAN_CONDITION_KEYWORDS = frozenset((AND, OR))
+# Clauses ending a FROM clause
+FROM_END_KEYWORDS = frozenset((WHERE, GROUP, HAVING, ORDER, LIMIT, OFFSET, SEMI_COLON))
+# Keywords ending a table of a FROM clause, and starting the next one
+FROM_ITEM_END_KEYWORDS = JOIN_KEYWORDS | SET_OPERATOR_KEYWORDS
+JOIN_CONDITION_KEYWORDS = frozenset((ON, USING))
+# Keywords starting the frame of a window, kept as text
+WINDOW_FRAME_KEYWORDS = frozenset((ROWS, RANGE))
+
+
+def is_date_part_extraction(keyword: int, next_keyword: int) -> bool:
+    """
+    Whether the keywords start a date part extraction, like YEAR FROM date.
+    """
+    return keyword in DATE_PART_KEYWORDS and next_keyword == FROM
+
+
+def keyword_id(token: Optional[str]) -> int:
+    """
+    Id of a token in any case, NOT_A_KEYWORD (0) otherwise or for None.
+
+    Parsers read the ids stored by the tokeniser instead, see
+    TokenCursor.keyword.
+    """
+    if token is None:
+        return NOT_A_KEYWORD
+    return classify(token)
+
+
+def classify(text: str) -> int:
+    """
+    Compute the keyword id of a token text, and remember its spelling, which
+    only saves lowercasing it next time.
+    """
+    keyword = _SPELLINGS.get(text)
+    if keyword is None:
+        keyword = KEYWORD_IDS.get(text.lower(), NOT_A_KEYWORD)
+        if keyword != NOT_A_KEYWORD:
+            _SPELLINGS[text] = keyword
+    return keyword
+
+
+def keyword_name(keyword: int) -> str:
+    """
+    Lowercased form of a keyword.
+    """
+    return _KEYWORD_NAMES[keyword]
+
+
+def keyword_ids(keywords: Iterable[str]) -> FrozenSet[int]:
+    return frozenset(KEYWORD_IDS[keyword] for keyword in keywords)
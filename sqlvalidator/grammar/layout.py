@@ -0,0 +1,148 @@
+"""
+Documents, the formatted text of the nodes before it is rendered.
+
+A document is a string, or a Doc: the concatenation of documents, with the
+lines after each of their line breaks indented. Nodes build their document
+from those of the nested nodes without copying their text, and the width and
+line breaks of a document are known without rendering it, so that nodes can
+choose their layout from the documents of the nested nodes.
+
+The text is only rendered once, in one pass over the whole document. Building
+strings instead, and re-indenting the text of the nested nodes at each level,
+costs the size of the output times the nesting depth.
+"""
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Union
+
+# Longest text built by joining strings instead of as a Doc. Copying such short
+# texts again at each level is cheaper than building Docs, and stays linear.
+MAX_JOINED_WIDTH = 128
+# Length of the pieces of text passed to the writers, see write
+WRITE_BUFFER_SIZE = 8192
+
+
+class Doc:
+    __slots__ = ("parts", "indent", "width", "newlines")
+    parts: Tuple["Document", ...]
+    # Number of spaces added after each line break of the parts
+    indent: int
+    # Length of the rendered text, line breaks included
+    width: int
+    newlines: int
+
+    def __init__(self, parts: Tuple["Document", ...], indent: int = 0):
+        width = newlines = 0
+        for part in parts:
+            if isinstance(part, str):
+                width += len(part)
+                newlines += part.count("\n")
+            else:
+                width += part.width
+                newlines += part.newlines
+        self.parts = parts
+        self.indent = indent
+        self.width = width + indent * newlines
+        self.newlines = newlines
+
+    def __repr__(self):
+        return "<Doc: {!r}>".format(render(self))
+
+
+Document = Union[str, Doc]
+
+
+def concat(*parts: Document) -> Document:
+    for part in parts:
+        if not isinstance(part, str):
+            return Doc(parts)
+    text = "".join(parts)  # type: ignore
+    if len(text) > MAX_JOINED_WIDTH:
+        return Doc(parts)
+    return text
+
+
+def indented(document: Document, indent: int = 1) -> Document:
+    """
+    Document of the text with indent spaces after each line break, like
+    text.replace("\\n", "\\n" + " " * indent).
+    """
+    if isinstance(document, str):
+        if "\n" not in document:
+            return document
+        if len(document) <= MAX_JOINED_WIDTH:
+            return document.replace("\n", "\n" + " " * indent)
+    elif not document.newlines:
+        return document
+    return Doc((document,), indent)
+
+
+def join(separator: str, documents: Iterable[Document]) -> Document:
+    documents = tuple(documents)
+    for document in documents:
+        if not isinstance(document, str):
+            break
+    else:
+        text = separator.join(documents)  # type: ignore
+        if len(text) <= MAX_JOINED_WIDTH:
+            return text
+    parts: List[Document] = []
+    for document in documents:
+        if parts:
+            parts.append(separator)
+        parts.append(document)
+    return Doc(tuple(parts))
+
+
+def width(document: Document) -> int:
+    if isinstance(document, str):
+        return len(document)
+    return document.width
+
+
+def is_multiline(document: Document) -> bool:
+    if isinstance(document, str):
+        return "\n" in document
+    return document.newlines > 0
+
+
+def render(document: Document) -> str:
+    return "".join(chunks(document))
+
+
+def write(document: Document, writer: Callable[[str], Any]) -> None:
+    """
+    Pass the rendered text of the document to writer, in pieces of about
+    WRITE_BUFFER_SIZE characters, without building the whole text.
+    """
+    buffer: List[str] = []
+    size = 0
+    for chunk in chunks(document):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= WRITE_BUFFER_SIZE:
+            writer("".join(buffer))
+            buffer.clear()
+            size = 0
+    if buffer:
+        writer("".join(buffer))
+
+
+def chunks(document: Document) -> Iterator[str]:
+    """
+    Iterate over the rendered text of the document, in pieces.
+    """
+    if isinstance(document, str):
+        yield document
+        return
+    stack = [(iter(document.parts), document.indent)]
+    while stack:
+        parts, indent = stack[-1]
+        for part in parts:
+            if isinstance(part, str):
+                if indent and "\n" in part:
+                    part = part.replace("\n", "\n" + " " * indent)
+                yield part
+            else:
+                stack.append((iter(part.parts), indent + part.indent))
+                break
+        else:
+            stack.pop()
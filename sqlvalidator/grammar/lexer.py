@@ -1,5 +1,74 @@
-from typing import Any, Optional, Tuple
-
+from typing import Any, Callable, Dict, FrozenSet, Generator, Optional, Tuple
+
+from sqlvalidator.grammar.keywords import (
+    ALL,
+    AND,
+    ARRAY_AGG,
+    AS,
+    ASC,
+    ASTERISK,
+    BETWEEN,
+    BITWISE_KEYWORDS,
+    BOOLEAN_CONDITION_KEYWORDS,
+    BOOLEAN_KEYWORDS,
+    BY,
+    CASE,
+    CAST,
+    CLOSING_PARENTHESIS,
+    CLOSING_SQUARE_BRACKET,
+    COMMA,
+    CONDITION_KEYWORDS,
+    COUNT,
+    DESC,
+    DISTINCT,
+    EACH,
+    ELSE,
+    END,
+    EXCEPT,
+    FILTER,
+    FROM,
+    FROM_END_KEYWORDS,
+    FROM_ITEM_END_KEYWORDS,
+    GROUP,
+    HAVING,
+    IGNORE,
+    IN,
+    IS,
+    JOIN_CONDITION_KEYWORDS,
+    JOIN_KEYWORDS,
+    LIMIT,
+    MINUS,
+    NOT,
+    NULL_KEYWORDS,
+    NULLS,
+    OFFSET,
+    ON,
+    ORDER,
+    OVER,
+    PARTITION,
+    PLUS,
+    RANGE,
+    REPLACE,
+    RESPECT,
+    ROLLUP,
+    ROWS,
+    SELECT,
+    SEMI_COLON,
+    SET_OPERATOR_KEYWORDS,
+    SLASH,
+    STRING_PREFIX_KEYWORDS,
+    THEN,
+    TIMESTAMP_TRUNC,
+    TYPE_KEYWORDS,
+    UNNEST,
+    USING,
+    WHEN,
+    WHERE,
+    WINDOW_FRAME_KEYWORDS,
+    WITH,
+    is_date_part_extraction,
+)
+from sqlvalidator.grammar.sharing import SharedNodes
 from sqlvalidator.grammar.sql import (
     Alias,
     AnalyticsClause,
@@ -47,118 +116,190 @@ from sqlvalidator.grammar.sql import (
     WithQuery,
     WithStatement,
 )
-from sqlvalidator.grammar.tokeniser import (
-    get_tokens_until_closing_parenthesis,
-    get_tokens_until_not_in,
-    get_tokens_until_one_of,
-    lower,
-)
+from sqlvalidator.grammar.symbols import SymbolTable
+from sqlvalidator.grammar.tokeniser import is_number
+from sqlvalidator.grammar.traversal import run
 
 
 class ParsingError(Exception):
     pass
 
 
-class SQLStatementParser:
+def _end_of_query() -> ParsingError:
+    return ParsingError("Unexpected end of query")
+
+
+class Parser:
+    """
+    Parsers implement _parse as a generator, see traversal.run. Running out
+    of tokens, with next(tokens), is a ParsingError.
+    """
+
+    _parse: Callable[..., Generator[Any, Any, Any]]
+
+    @classmethod
+    def parse(cls, *args, **kwargs):
+        return run(cls._parse(*args, **kwargs), exhausted=_end_of_query)
+
+
+# Keyword ids the parser takes decisions on, computed once
+_ARITHMETIC_KEYWORDS = frozenset((PLUS, MINUS, ASTERISK, SLASH))
+
+# Binding powers of the binary operators read by ExpressionParser. Every level
+# groups to the right and all arithmetic operators share one level, which is
+# the tree shape the formatter output is built from.
+_BOOLEAN_POWER = 1
+_COMPARISON_POWER = 2
+_ARITHMETIC_POWER = 3
+_BINDING_POWERS: Dict[int, int] = {
+    **{keyword: _BOOLEAN_POWER for keyword in BOOLEAN_CONDITION_KEYWORDS},
+    **{keyword: _COMPARISON_POWER for keyword in CONDITION_KEYWORDS},
+    **{keyword: _COMPARISON_POWER for keyword in BITWISE_KEYWORDS},
+    BETWEEN: _COMPARISON_POWER,
+    **{keyword: _ARITHMETIC_POWER for keyword in _ARITHMETIC_KEYWORDS},
+}
+
+_NO_KEYWORDS: FrozenSet[int] = frozenset()
+_STATEMENT_START = frozenset((SELECT, WITH))
+_SELECT_EXPRESSIONS_END = frozenset(
+    (SEMI_COLON, FROM, WHERE, GROUP, HAVING, ORDER, LIMIT, OFFSET)
+)
+_WHERE_END = frozenset((GROUP, HAVING, ORDER, LIMIT, OFFSET, SEMI_COLON))
+_GROUP_BY_END = frozenset((HAVING, ORDER, LIMIT, OFFSET, SEMI_COLON))
+_HAVING_END = frozenset((ORDER, LIMIT, OFFSET, SEMI_COLON))
+_ORDER_BY_END = frozenset((LIMIT, OFFSET, SEMI_COLON))
+_LIMIT_END = frozenset((OFFSET, SEMI_COLON))
+_OFFSET_END = frozenset((SEMI_COLON,))
+_WITH_OFFSET = frozenset(((WITH, OFFSET),))
+_CLOSING_SQUARE_BRACKET = frozenset((CLOSING_SQUARE_BRACKET,))
+_COMMA = frozenset((COMMA,))
+_ORDER_DIRECTIONS = frozenset((ASC, DESC))
+_CASE_END = frozenset((END,))
+_CASE_WHEN = frozenset((WHEN,))
+_CASE_THEN = frozenset((THEN,))
+_CASE_WHEN_OR_ELSE = frozenset((WHEN, ELSE))
+_CAST_AS = frozenset((AS,))
+_ARRAY_AGG_ARGUMENT_END = frozenset(
+    (CLOSING_PARENTHESIS, IGNORE, RESPECT, ORDER, LIMIT)
+)
+_ARRAY_AGG_ORDER_BY_END = frozenset((LIMIT, CLOSING_PARENTHESIS))
+_PARTITION_BY_END = frozenset((ORDER, ROWS, RANGE))
+
+
+class SQLStatementParser(Parser):
+    @classmethod
+    def parse(
+        cls,
+        tokens,
+        shared_nodes: Optional[SharedNodes] = None,
+        symbols: Optional[SymbolTable] = None,
+    ):
+        """
+        Parse a statement. With a SharedNodes table, its identical subtrees
+        are shared with those of the other statements parsed with the table.
+        With a SymbolTable, its names are interned in the table.
+        """
+        statement = run(cls._parse(tokens), exhausted=_end_of_query)
+        if symbols is not None:
+            statement = symbols.intern_names(statement)
+        if shared_nodes is not None:
+            statement = shared_nodes.share(statement)
+        return statement
+
     @staticmethod
-    def parse(tokens):
-        next_token = next(tokens)
-        if lower(next_token) == "select":
-            return SelectStatementParser.parse(tokens)
-        if lower(next_token) == "with":
-            return WithStatementParser.parse(tokens)
+    def _parse(tokens):
+        next(tokens)
+        keyword = tokens.keyword
+        if keyword == SELECT:
+            return (yield SelectStatementParser._parse(tokens))
+        if keyword == WITH:
+            return (yield WithStatementParser._parse(tokens))
         raise ParsingError
 
 
-class SelectStatementParser:
-    keywords = (";", "from", "where", "group", "having", "order", "limit", "offset")
+class SelectStatementParser(Parser):
+    keywords = _SELECT_EXPRESSIONS_END
 
     @classmethod
-    def parse(cls, tokens):
+    def _parse(cls, tokens):
         first_expression_token = None
         next_token = next(tokens)
 
         select_all = select_distinct = False
         select_distinct_on = None
-        if lower(next_token) == "all":
+        keyword = tokens.keyword
+        if keyword == ALL:
             select_all = True
-        elif lower(next_token) == "distinct":
+        elif keyword == DISTINCT:
             select_distinct = True
             next_token = next(tokens)
-            if lower(next_token) == "on":
+            if tokens.keyword == ON:
                 next(tokens)  # Consume parenthesis
-                distinct_on_tokens = get_tokens_until_closing_parenthesis(tokens)
-                select_distinct_on = ExpressionListParser.parse(
-                    iter(distinct_on_tokens)
+                distinct_on_tokens = tokens.until_closing_parenthesis()
+                select_distinct_on = yield ExpressionListParser._parse(
+                    distinct_on_tokens
                 )
             else:
                 first_expression_token = next_token
         else:
             first_expression_token = next_token
 
-        expression_tokens, next_token = get_tokens_until_one_of(
-            tokens, cls.keywords, first_token=first_expression_token
+        expression_tokens, next_token = tokens.until_keyword(
+            cls.keywords, include_previous=first_expression_token is not None
         )
-        expressions = ExpressionListParser.parse(iter(expression_tokens))
+        expressions = yield ExpressionListParser._parse(expression_tokens)
 
-        if lower(next_token) == "from":
-            expression_tokens, next_token = get_tokens_until_one_of(
-                tokens,
-                ["where", "group", "having", "order", "limit", "offset", ";"],
-                keep=[("with", "offset")],
+        if tokens.keyword == FROM:
+            expression_tokens, next_token = tokens.until_keyword(
+                FROM_END_KEYWORDS, keep=_WITH_OFFSET
             )
-            from_statement = FromStatementParser.parse(iter(expression_tokens))
+            from_statement = yield FromStatementParser._parse(expression_tokens)
         else:
             from_statement = None
 
-        if lower(next_token) == "where":
-            where_clause, next_token = WhereClauseParser.parse(tokens)
+        if tokens.keyword == WHERE:
+            where_clause, next_token = yield WhereClauseParser._parse(tokens)
         else:
             where_clause = None
 
-        if lower(next_token) == "group":
+        if tokens.keyword == GROUP:
             next_token = next(tokens, None)
             group_each_by = False
-            if lower(next_token) == "each":
+            if tokens.keyword == EACH:
                 group_each_by = True
                 next_token = next(tokens, None)
-            if not lower(next_token) == "by":
+            if tokens.keyword != BY:
                 raise ParsingError("Missing BY after GROUP")
-            expression_tokens, next_token = get_tokens_until_one_of(
-                tokens, ["having", "order", "limit", "offset", ";"]
+            expression_tokens, next_token = tokens.until_keyword(_GROUP_BY_END)
+            group_by_clause = yield GroupByParser._parse(
+                expression_tokens, group_each_by=group_each_by
             )
-            group_by_clause = GroupByParser.parse(iter(expression_tokens))
-            group_by_clause.group_each_by = group_each_by
         else:
             group_by_clause = None
 
-        if lower(next_token) == "having":
-            having_clause, next_token = HavingClauseParser.parse(tokens)
+        if tokens.keyword == HAVING:
+            having_clause, next_token = yield HavingClauseParser._parse(tokens)
         else:
             having_clause = None
 
-        if lower(next_token) == "order":
+        if tokens.keyword == ORDER:
             next_token = next(tokens, None)
-            if not lower(next_token) == "by":
+            if tokens.keyword != BY:
                 raise ParsingError("Missing BY after ORDER")
-            expression_tokens, next_token = get_tokens_until_one_of(
-                tokens, ["limit", "offset", ";"]
-            )
-            order_by_clause = OrderByParser.parse(iter(expression_tokens))
+            expression_tokens, next_token = tokens.until_keyword(_ORDER_BY_END)
+            order_by_clause = yield OrderByParser._parse(expression_tokens)
         else:
             order_by_clause = None
 
-        if lower(next_token) == "limit":
-            expression_tokens, next_token = get_tokens_until_one_of(
-                tokens, ["offset", ";"]
-            )
-            limit_clause = LimitClauseParser.parse(iter(expression_tokens))
+        if tokens.keyword == LIMIT:
+            expression_tokens, next_token = tokens.until_keyword(_LIMIT_END)
+            limit_clause = yield LimitClauseParser._parse(expression_tokens)
         else:
             limit_clause = None
 
-        if lower(next_token) == "offset":
-            expression_tokens, next_token = get_tokens_until_one_of(tokens, [";"])
-            offset_clause = OffsetClauseParser.parse(iter(expression_tokens))
+        if tokens.keyword == OFFSET:
+            expression_tokens, next_token = tokens.until_keyword(_OFFSET_END)
+            offset_clause = yield OffsetClauseParser._parse(expression_tokens)
         else:
             offset_clause = None
 
@@ -179,53 +320,46 @@ class SelectStatementParser:
         )
 
 
-class FromStatementParser:
+class FromStatementParser(Parser):
     @staticmethod
-    def parse(tokens):
+    def _parse(tokens):
         next_token = next(tokens)
         if next_token == "(":
-            argument_tokens = get_tokens_until_closing_parenthesis(tokens)
-            try:
-                argument = SQLStatementParser.parse(iter(argument_tokens))
-            except ParsingError:
-                argument = FromStatementParser.parse(iter(argument_tokens))
+            argument_tokens = tokens.until_closing_parenthesis()
+            # A subquery, or a parenthesised table expression
+            if argument_tokens.peek_keyword() in _STATEMENT_START:
+                argument = yield SQLStatementParser._parse(argument_tokens)
+            else:
+                argument = yield FromStatementParser._parse(argument_tokens)
             expression = Parenthesis(argument)
             next_token = next(tokens, None)
         elif next_token in String.QUOTES:
             table_name = StringParser.parse(tokens, next_token)
             next_token = next(tokens, None)
             while next_token == ".":
-                right_hand, next_token = ExpressionParser.parse(
+                right_hand, next_token = yield ExpressionParser._parse(
                     tokens,
                     is_chained_columns=True,
                 )
                 table_name = ChainedColumns(table_name, right_hand)
             expression = Table(table_name)
         elif next_token == "[":
-            argument_tokens, next_token = get_tokens_until_one_of(
-                tokens, stop_words=["]"]
-            )
-            table, _ = ExpressionParser.parse(iter(argument_tokens))
+            argument_tokens, next_token = tokens.until_keyword(_CLOSING_SQUARE_BRACKET)
+            table, _ = yield ExpressionParser._parse(argument_tokens)
             expression = Table(table, in_square_brackets=True)
             assert next_token == "]", next_token
             next_token = next(tokens, None)
         else:
-            if lower(next_token) == "unnest":
-                expression, next_token = UnnestParser.parse(tokens)
+            if tokens.keyword == UNNEST:
+                expression, next_token = yield UnnestParser._parse(tokens)
             else:
-                argument_tokens, next_token = get_tokens_until_one_of(
-                    tokens,
-                    stop_words=Join.VALUES + CombinedQueries.SET_OPERATORS,
-                    first_token=next_token,
+                argument_tokens, next_token = tokens.until_keyword(
+                    FROM_ITEM_END_KEYWORDS, include_previous=True
                 )
-                expression = Table(ExpressionParser.parse(iter(argument_tokens))[0])
+                expression = Table((yield ExpressionParser._parse(argument_tokens))[0])
 
-        if (
-            next_token is not None
-            and lower(next_token) not in Join.VALUES
-            and lower(next_token) not in CombinedQueries.SET_OPERATORS
-        ):
-            if lower(next_token) == "as":
+        if next_token is not None and tokens.keyword not in FROM_ITEM_END_KEYWORDS:
+            if tokens.keyword == AS:
                 with_as = True
                 alias = next(tokens)
             else:
@@ -236,28 +370,24 @@ class FromStatementParser:
             expression = Alias(expression, alias, with_as)
             next_token = next(tokens, None)
 
-        while lower(next_token) in CombinedQueries.SET_OPERATORS:
+        while tokens.keyword in SET_OPERATOR_KEYWORDS:
             left_expr = expression
-            expression_tokens, next_token = get_tokens_until_not_in(
-                tokens, CombinedQueries.SET_OPERATORS, first_token=next_token
+            expression_tokens, next_token = tokens.while_keyword(
+                SET_OPERATOR_KEYWORDS, include_previous=True
             )
-            set_operator = SetOperatorTypeParser.parse(iter(expression_tokens))
-            expression_tokens, next_token = get_tokens_until_one_of(
-                tokens,
-                CombinedQueries.SET_OPERATORS,
-                first_token=next_token,
+            set_operator = SetOperatorTypeParser.parse(expression_tokens)
+            expression_tokens, next_token = tokens.until_keyword(
+                SET_OPERATOR_KEYWORDS, include_previous=next_token is not None
             )
-            if lower(expression_tokens[0]) == "select":
-                right_expr = SelectStatementParser.parse(iter(expression_tokens[1:]))
+            if expression_tokens.peek_keyword() == SELECT:
+                next(expression_tokens)
+                right_expr = yield SelectStatementParser._parse(expression_tokens)
             else:
-                right_expr = FromStatementParser.parse(iter(expression_tokens))
+                right_expr = yield FromStatementParser._parse(expression_tokens)
             expression = CombinedQueries(set_operator, left_expr, right_expr)
 
-            if (
-                next_token is not None
-                and lower(next_token) not in CombinedQueries.SET_OPERATORS
-            ):
-                if lower(next_token) == "as":
+            if next_token is not None and tokens.keyword not in SET_OPERATOR_KEYWORDS:
+                if tokens.keyword == AS:
                     with_as = True
                     alias = next(tokens)
                 else:
@@ -268,38 +398,37 @@ class FromStatementParser:
                 expression = Alias(expression, alias, with_as)
                 next_token = next(tokens, None)
 
-        while lower(next_token) in Join.VALUES:
+        while tokens.keyword in JOIN_KEYWORDS:
             left_expr = expression
-            expression_tokens, next_token = get_tokens_until_not_in(
-                tokens, Join.VALUES, first_token=next_token
+            expression_tokens, next_token = tokens.while_keyword(
+                JOIN_KEYWORDS, include_previous=True
             )
-            join_type = JoinTypeParser.parse(iter(expression_tokens))
+            join_type = JoinTypeParser.parse(expression_tokens)
 
             if join_type in ("CROSS JOIN", ","):
-                expression_tokens, next_token = [next_token] + list(tokens), None
+                expression_tokens, next_token = tokens.until_keyword(
+                    _NO_KEYWORDS, include_previous=next_token is not None
+                )
             else:
-                expression_tokens, next_token = get_tokens_until_one_of(
-                    tokens, ("on", "using"), first_token=next_token
+                expression_tokens, next_token = tokens.until_keyword(
+                    JOIN_CONDITION_KEYWORDS, include_previous=next_token is not None
                 )
-            right_expr = FromStatementParser.parse(iter(expression_tokens))
+            right_expr = yield FromStatementParser._parse(expression_tokens)
             on = None
             using = None
-            on_or_using = next_token
-            expression_tokens, next_token = get_tokens_until_one_of(
-                tokens,
-                Join.VALUES,
-            )
-            if lower(on_or_using) == "on":
-                expression, _ = ExpressionParser.parse(iter(expression_tokens))
+            on_or_using = tokens.keyword
+            expression_tokens, next_token = tokens.until_keyword(JOIN_KEYWORDS)
+            if on_or_using == ON:
+                expression, _ = yield ExpressionParser._parse(expression_tokens)
                 on = OnClause(expression)
-            elif lower(on_or_using) == "using":
-                expressions, _ = ExpressionParser.parse(iter(expression_tokens))
+            elif on_or_using == USING:
+                expressions, _ = yield ExpressionParser._parse(expression_tokens)
                 using = UsingClause(expressions)
 
             expression = Join(join_type, left_expr, right_expr, on=on, using=using)
 
-            if next_token is not None and lower(next_token) not in Join.VALUES:
-                if lower(next_token) == "as":
+            if next_token is not None and tokens.keyword not in JOIN_KEYWORDS:
+                if tokens.keyword == AS:
                     with_as = True
                     alias = next(tokens)
                 else:
@@ -320,23 +449,22 @@ class JoinTypeParser:
         return " ".join(tokens).upper()
 
 
-class UnnestParser:
+class UnnestParser(Parser):
     @staticmethod
-    def parse(tokens):
+    def _parse(tokens):
         next_token = next(tokens)
         assert next_token == "("
-        argument_tokens = get_tokens_until_closing_parenthesis(tokens)
-        arguments = ExpressionListParser.parse(iter(argument_tokens))
+        argument_tokens = tokens.until_closing_parenthesis()
+        arguments = yield ExpressionListParser._parse(argument_tokens)
         expression = FunctionCall("unnest", *arguments)
 
         next_token = next(tokens, None)
         if (
             next_token is not None
-            and lower(next_token) not in Join.VALUES
-            and lower(next_token) not in CombinedQueries.SET_OPERATORS
-            and lower(next_token) != "with"
+            and tokens.keyword not in FROM_ITEM_END_KEYWORDS
+            and tokens.keyword != WITH
         ):
-            if lower(next_token) == "as":
+            if tokens.keyword == AS:
                 with_as = True
                 alias = next(tokens)
             else:
@@ -351,18 +479,14 @@ class UnnestParser:
         with_offset_as = False
         offset_alias = None
 
-        if lower(next_token) == "with":
+        if tokens.keyword == WITH:
             next_token = next(tokens)
-            assert lower(next_token) == "offset", next_token
+            assert tokens.keyword == OFFSET, next_token
             with_offset = True
 
             next_token = next(tokens, None)
-            if (
-                next_token is not None
-                and lower(next_token) not in Join.VALUES
-                and lower(next_token) not in CombinedQueries.SET_OPERATORS
-            ):
-                if lower(next_token) == "as":
+            if next_token is not None and tokens.keyword not in FROM_ITEM_END_KEYWORDS:
+                if tokens.keyword == AS:
                     with_offset_as = True
                     offset_alias = next(tokens)
                 else:
@@ -380,26 +504,26 @@ class UnnestParser:
         )
 
 
-class WithStatementParser:
+class WithStatementParser(Parser):
     @staticmethod
-    def parse(tokens):
+    def _parse(tokens):
         with_queries = []
 
-        with_query_name = None
-        while lower(with_query_name) != "select":
+        # The queries follow WITH and the commas, until SELECT
+        while tokens.keyword != SELECT:
             with_query_name = next(tokens)
             next_token = next(tokens)
-            assert lower(next_token) == "as", next_token
+            assert tokens.keyword == AS, next_token
             next_token = next(tokens)
-            assert lower(next_token) == "(", next_token
-            with_statement = SQLStatementParser.parse(
-                iter(get_tokens_until_closing_parenthesis(tokens))
+            assert next_token == "(", next_token
+            with_statement = yield SQLStatementParser._parse(
+                tokens.until_closing_parenthesis()
             )
 
             with_queries.append(WithQuery(with_query_name, with_statement))
-            with_query_name = next(tokens)
+            next(tokens)
 
-        select_statement = SelectStatementParser.parse(tokens)
+        select_statement = yield SelectStatementParser._parse(tokens)
         return WithStatement(with_queries, select_statement)
 
 
@@ -409,67 +533,68 @@ class SetOperatorTypeParser:
         return " ".join(tokens).upper()
 
 
-class WhereClauseParser:
+class WhereClauseParser(Parser):
     @staticmethod
-    def parse(tokens):
-        expression, next_token = ExpressionParser.parse(
+    def _parse(tokens):
+        expression, next_token = yield ExpressionParser._parse(
             tokens,
             can_alias=False,
-            until_one_of=("group", "having", "order", "limit", "offset", ";"),
+            until_one_of=_WHERE_END,
         )
         return WhereClause(expression), next_token
 
 
-class GroupByParser:
+class GroupByParser(Parser):
     @staticmethod
-    def parse(tokens):
+    def _parse(tokens, group_each_by=False):
         next_token = next(tokens)
-        if lower(next_token) == "rollup":
+        if tokens.keyword == ROLLUP:
             rollup = True
             next_token = None
         else:
             rollup = False
-        expression_tokens, _ = get_tokens_until_one_of(
-            tokens, [], first_token=next_token
+        expression_tokens, _ = tokens.until_keyword(
+            _NO_KEYWORDS, include_previous=next_token is not None
         )
-        expressions = ExpressionListParser.parse(iter(expression_tokens))
-        return GroupByClause(*expressions, rollup=rollup)
+        expressions = yield ExpressionListParser._parse(expression_tokens)
+        return GroupByClause(*expressions, rollup=rollup, group_each_by=group_each_by)
 
 
-class HavingClauseParser:
+class HavingClauseParser(Parser):
     @staticmethod
-    def parse(tokens):
-        expression, next_token = ExpressionParser.parse(
-            tokens, can_alias=False, until_one_of=["order", "limit", "offset", ";"]
+    def _parse(tokens):
+        expression, next_token = yield ExpressionParser._parse(
+            tokens, can_alias=False, until_one_of=_HAVING_END
         )
         return HavingClause(expression), next_token
 
 
-class OrderByParser:
+class OrderByParser(Parser):
     @staticmethod
-    def parse(tokens):
+    def _parse(tokens):
         expressions = []
 
-        expression_tokens, next_token = get_tokens_until_one_of(tokens, [","])
-        expression = OrderByItemParser.parse(iter(expression_tokens))
+        expression_tokens, next_token = tokens.until_keyword(_COMMA)
+        expression = yield OrderByItemParser._parse(expression_tokens)
         expressions.append(expression)
         while next_token:
-            expression_tokens, next_token = get_tokens_until_one_of(tokens, [","])
-            expression = OrderByItemParser.parse(iter(expression_tokens))
+            expression_tokens, next_token = tokens.until_keyword(_COMMA)
+            expression = yield OrderByItemParser._parse(expression_tokens)
             expressions.append(expression)
 
         return OrderByClause(*expressions)
 
 
-class OrderByItemParser:
+class OrderByItemParser(Parser):
     @staticmethod
-    def parse(tokens):
-        expression_tokens, next_token = get_tokens_until_one_of(tokens, ["asc", "desc"])
-        expression, _ = ExpressionParser.parse(iter(expression_tokens))
-        if lower(next_token) == "asc":
+    def _parse(tokens):
+        expression_tokens, next_token = tokens.until_keyword(_ORDER_DIRECTIONS)
+        expression, _ = yield ExpressionParser._parse(expression_tokens)
+        direction = tokens.keyword
+        if direction == ASC:
             has_asc = True
             has_desc = False
-        elif lower(next_token) == "desc":
+        elif direction == DESC:
             has_asc = False
             has_desc = True
         else:
@@ -479,71 +604,44 @@ class OrderByItemParser:
         return OrderByItem(expression, has_asc=has_asc, has_desc=has_desc)
 
 
-class LimitClauseParser:
+class LimitClauseParser(Parser):
     @staticmethod
-    def parse(tokens):
+    def _parse(tokens):
         next_token = next(tokens)
-        if lower(next_token) == "all":
+        if tokens.keyword == ALL:
             limit_all = True
             expression = None
         else:
             limit_all = False
-            expression_tokens, next_token = get_tokens_until_one_of(
-                tokens, [], first_token=next_token
+            expression_tokens, next_token = tokens.until_keyword(
+                _NO_KEYWORDS, include_previous=True
             )
-            expression, _ = ExpressionParser.parse(iter(expression_tokens))
+            expression, _ = yield ExpressionParser._parse(expression_tokens)
         return LimitClause(limit_all, expression)
 
 
-class OffsetClauseParser:
+class OffsetClauseParser(Parser):
     @staticmethod
-    def parse(tokens):
-        expression, _ = ExpressionParser.parse(tokens)
+    def _parse(tokens):
+        expression, _ = yield ExpressionParser._parse(tokens)
         return OffsetClause(expression)
 
 
-class ExpressionListParser:
+class ExpressionListParser(Parser):
     @staticmethod
-    def parse(tokens, can_be_type=False):
-        next_token = next(tokens, None)
-
+    def _parse(tokens, can_be_type=False):
         expressions = []
-        expression_tokens = []
-        count_parenthesis = 0
-        count_square_brackets = 0
-        in_string = False
-        while next_token is not None:
-            expression_tokens.append(next_token)
-            if next_token == "(":
-                count_parenthesis += 1
-            elif next_token == ")":
-                count_parenthesis -= 1
-            elif next_token == "[":
-                count_square_brackets += 1
-            elif next_token == "]":
-                count_square_brackets -= 1
-            elif next_token in String.QUOTES:
-                in_string = not in_string
-
-            next_token = next(tokens, None)
-            if next_token is None or (
-                next_token == ","
-                and count_parenthesis == 0
-                and count_square_brackets == 0
-                and in_string is False
-            ):
-                expression, _ = ExpressionParser.parse(
-                    iter(expression_tokens), can_be_type=can_be_type
-                )
-                expressions.append(expression)
-                expression_tokens = []
-                next_token = next(tokens, None)
+        for expression_tokens in tokens.split_on_commas():
+            expression, _ = yield ExpressionParser._parse(
+                expression_tokens, can_be_type=can_be_type
+            )
+            expressions.append(expression)
         return expressions
 
 
-class ExpressionParser:
+class ExpressionParser(Parser):
     @staticmethod
-    def parse(
+    def _parse(
         tokens,
         is_right_hand=False,
         can_be_type=False,
@@ -551,384 +649,407 @@ class ExpressionParser:
         until_one_of=None,
         first_token=None,
         is_chained_columns=False,
-    ) -> Tuple[Expression, Any]:
-        until_one_of = until_one_of or []
-
-        main_token = first_token or next(tokens)
-        next_token = None
-
-        if main_token in String.QUOTES:
-            expression = StringParser.parse(tokens, main_token)
-        elif main_token.isdigit():
-            expression = Integer(main_token)
-        elif main_token.replace(".", "").isdigit():
-            expression = Float(main_token)
-        elif lower(main_token) in Boolean.BOOLEAN_VALUES:
-            expression = Boolean(main_token)
-        elif lower(main_token) in Null.VALUES:
-            expression = Null()
-        elif lower(main_token) == Negation.PREDICATE:
-            rest_expression, next_token = ExpressionParser.parse(
-                tokens,
-                is_right_hand=True,
-                until_one_of=until_one_of,
-            )
-            expression = Negation(rest_expression)
-        elif main_token == "(":
-            argument_tokens = get_tokens_until_closing_parenthesis(tokens)
-            arguments = ExpressionListParser.parse(iter(argument_tokens))
-            expression = Parenthesis(*arguments)
-        elif main_token == "[":
-            argument_tokens, next_token = get_tokens_until_one_of(
-                tokens, stop_words=["]"]
-            )
-            assert next_token == "]", next_token
-            arguments = ExpressionListParser.parse(iter(argument_tokens))
-            expression = Array(*arguments)
-            next_token = next(tokens, None)
-        elif lower(main_token) == "case":
-            argument_tokens, next_token = get_tokens_until_one_of(tokens, ["end"])
-            assert lower(next_token) == "end"
-            next_token = next(tokens, None)
-            expression = CaseParser.parse(iter(argument_tokens))
-        elif lower(main_token) == "select":
-            argument_tokens, next_token = get_tokens_until_one_of(tokens, [])
-            next_token = next(tokens, None)
-            expression = SelectStatementParser.parse(iter(argument_tokens))
-        else:
-            expression = None
-
-        if next_token is None:
-            next_token = next(tokens, None)
+    ) -> Generator[Any, Any, Tuple[Expression, Any]]:
+        until_one_of = until_one_of or _NO_KEYWORDS
+
+        # Arithmetic operands are collected in a loop and folded to the right
+        # once the chain ends, instead of recursing once per operator.
+        arithmetic_operands = []
+        while True:
+            main_token = first_token or next(tokens)
+            main_keyword = tokens.keyword
+            next_token = None
 
-        # Expressions that need the next_token to be read
-        if expression is None:
-            if next_token is not None and next_token == "(":
-                if lower(main_token) == "cast":
-                    column_tokens, next_token = get_tokens_until_one_of(
-                        tokens, stop_words=["as"]
-                    )
-                    column, _ = ExpressionParser.parse(
-                        iter(column_tokens),
-                        is_right_hand=True,
-                        until_one_of=until_one_of,
-                    )
-                    assert lower(next_token) == "as", next_token
-                    next_token = next(tokens)
-                    cast_type = Type(next_token)
-                    expression = CastFunctionCall(column, cast_type)
-                    next_token = next(tokens)
-                    assert lower(next_token) == ")", next_token
-                elif lower(main_token) == "array_agg":
-                    next_token = next(tokens)
-                    if lower(next_token) == "distinct":
-                        distinct = True
-                        first_token = None
-                    else:
-                        distinct = False
-                        first_token = next_token
+            if main_token in String.QUOTES:
+                expression = StringParser.parse(tokens, main_token)
+            elif main_token.isdigit():
+                expression = Integer(main_token)
+            elif is_number(main_token):
+                expression = Float(main_token)
+            elif main_keyword in BOOLEAN_KEYWORDS:
+                expression = Boolean(main_token)
+            elif main_keyword in NULL_KEYWORDS:
+                expression = Null()
+            elif main_keyword == NOT:
+                rest_expression, next_token = yield ExpressionParser._parse(
+                    tokens,
+                    is_right_hand=True,
+                    until_one_of=until_one_of,
+                )
+                expression = Negation(rest_expression)
+            elif main_token == "(":
+                argument_tokens = tokens.until_closing_parenthesis()
+                arguments = yield ExpressionListParser._parse(argument_tokens)
+                expression = Parenthesis(*arguments)
+            elif main_token == "[":
+                argument_tokens, next_token = tokens.until_keyword(
+                    _CLOSING_SQUARE_BRACKET
+                )
+                assert next_token == "]", next_token
+                arguments = yield ExpressionListParser._parse(argument_tokens)
+                expression = Array(*arguments)
+                next_token = next(tokens, None)
+            elif main_keyword == CASE:
+                argument_tokens, next_token = tokens.until_keyword(_CASE_END)
+                assert tokens.keyword == END
+                next_token = next(tokens, None)
+                expression = yield CaseParser._parse(argument_tokens)
+            elif main_keyword == SELECT:
+                argument_tokens, next_token = tokens.until_keyword(_NO_KEYWORDS)
+                next_token = next(tokens, None)
+                expression = yield SelectStatementParser._parse(argument_tokens)
+            else:
+                expression = None
 
-                    column_tokens, next_token = get_tokens_until_one_of(
-                        tokens,
-                        stop_words=[")", "ignore", "respects", "order", "limit"],
-                        first_token=first_token,
-                    )
-                    column, _ = ExpressionParser.parse(
-                        iter(column_tokens), until_one_of=until_one_of
-                    )
+            if next_token is None:
+                next_token = next(tokens, None)
 
-                    ignore_nulls = respect_nulls = False
-                    if lower(next_token) == "ignore":
-                        next_token = next(tokens)
-                        assert lower(next_token) == "nulls"
-                        ignore_nulls = True
+            # Expressions that need the next_token to be read
+            if expression is None:
+                if next_token is not None and next_token == "(":
+                    if main_keyword == CAST:
+                        column_tokens, next_token = tokens.until_keyword(_CAST_AS)
+                        column, _ = yield ExpressionParser._parse(
+                            column_tokens,
+                            is_right_hand=True,
+                            until_one_of=until_one_of,
+                        )
+                        assert tokens.keyword == AS, next_token
                         next_token = next(tokens)
-                    elif lower(next_token) == "respect":
+                        cast_type = Type(next_token)
+                        expression = CastFunctionCall(column, cast_type)
                         next_token = next(tokens)
-                        assert lower(next_token) == "nulls"
-                        respect_nulls = True
+                        assert next_token == ")", next_token
+                    elif main_keyword == ARRAY_AGG:
                         next_token = next(tokens)
+                        if tokens.keyword == DISTINCT:
+                            distinct = True
+                            first_token = None
+                        else:
+                            distinct = False
+                            first_token = next_token
+
+                        column_tokens, next_token = tokens.until_keyword(
+                            _ARRAY_AGG_ARGUMENT_END,
+                            include_previous=first_token is not None,
+                        )
+                        column, _ = yield ExpressionParser._parse(
+                            column_tokens, until_one_of=until_one_of
+                        )
 
-                    if lower(next_token) == "order":
+                        ignore_nulls = respect_nulls = False
+                        if tokens.keyword == IGNORE:
+                            next_token = next(tokens)
+                            assert tokens.keyword == NULLS
+                            ignore_nulls = True
+                            next_token = next(tokens)
+                        elif tokens.keyword == RESPECT:
+                            next_token = next(tokens)
+                            assert tokens.keyword == NULLS
+                            respect_nulls = True
+                            next_token = next(tokens)
+
+                        if tokens.keyword == ORDER:
+                            next_token = next(tokens)
+                            assert tokens.keyword == BY
+                            expression_tokens, next_token = tokens.until_keyword(
+                                _ARRAY_AGG_ORDER_BY_END
+                            )
+                            order_bys = yield OrderByParser._parse(expression_tokens)
+                        else:
+                            order_bys = None
+
+                        limit = None
+                        if tokens.keyword == LIMIT:
+                            next_token = next(tokens)
+                            limit = int(next_token)
+                            next_token = next(tokens)
+
+                        assert next_token == ")", next_token
+                        expression = ArrayAggFunctionCall(
+                            column=column,
+                            distinct=distinct,
+                            ignore_nulls=ignore_nulls,
+                            respect_nulls=respect_nulls,
+                            order_bys=order_bys,
+                            limit=limit,
+                        )
+                    elif main_keyword == COUNT:
                         next_token = next(tokens)
-                        assert lower(next_token) == "by"
-                        expression_tokens, next_token = get_tokens_until_one_of(
-                            tokens, ["limit", ")"]
+                        if tokens.keyword == DISTINCT:
+                            distinct = True
+                            first_token = None
+                        else:
+                            distinct = False
+                            first_token = next_token
+
+                        argument_tokens = tokens.until_closing_parenthesis(
+                            include_previous=first_token is not None
                         )
-                        order_bys = OrderByParser.parse(iter(expression_tokens))
+                        arguments = yield ExpressionListParser._parse(argument_tokens)
+                        expression = CountFunctionCall(*arguments, distinct=distinct)
                     else:
-                        order_bys = None
+                        argument_tokens = tokens.until_closing_parenthesis()
+                        arguments_can_be_type = (
+                            can_be_type
+                            or argument_tokens.contains_keyword(TIMESTAMP_TRUNC)
+                        )
+                        arguments = yield ExpressionListParser._parse(
+                            argument_tokens, can_be_type=arguments_can_be_type
+                        )
+                        expression = FunctionCall(main_token, *arguments)
 
-                    limit = None
-                    if lower(next_token) == "limit":
-                        next_token = next(tokens)
-                        limit = int(next_token)
-                        next_token = next(tokens)
+                    next_token = next(tokens, None)
+                    if tokens.keyword == FILTER:
+                        next_next_token = next(tokens)
+                        assert next_next_token == "(", next_next_token
+                        argument_tokens = tokens.until_closing_parenthesis()
+                        next(argument_tokens, None)
+                        assert argument_tokens.keyword == WHERE
+                        filter_condition, next_token = yield ExpressionParser._parse(
+                            argument_tokens,
+                            can_alias=False,
+                        )
 
-                    assert lower(next_token) == ")", next_token
-                    expression = ArrayAggFunctionCall(
-                        column=column,
-                        distinct=distinct,
-                        ignore_nulls=ignore_nulls,
-                        respect_nulls=respect_nulls,
-                        order_bys=order_bys,
-                        limit=limit,
-                    )
-                elif lower(main_token) == "count":
-                    next_token = next(tokens)
-                    if lower(next_token) == "distinct":
-                        distinct = True
-                        first_token = None
-                    else:
-                        distinct = False
-                        first_token = next_token
+                        expression = FilteredFunctionCall(expression, filter_condition)
+                        next_token = next(tokens, None)
 
-                    argument_tokens = get_tokens_until_closing_parenthesis(
-                        tokens, first_token=first_token
-                    )
-                    arguments = ExpressionListParser.parse(iter(argument_tokens))
-                    expression = CountFunctionCall(*arguments, distinct=distinct)
-                else:
-                    argument_tokens = get_tokens_until_closing_parenthesis(tokens)
-                    arguments_can_be_type = can_be_type or any(
-                        lower(t) == "timestamp_trunc" for t in argument_tokens
+                elif next_token is not None and is_date_part_extraction(
+                    main_keyword, tokens.keyword
+                ):
+                    rest_expression, next_token = yield ExpressionParser._parse(
+                        tokens, until_one_of=until_one_of
                     )
-                    arguments = ExpressionListParser.parse(
-                        iter(argument_tokens), can_be_type=arguments_can_be_type
+                    expression = DatePartExtraction(main_token, rest_expression)
+                elif main_keyword in TYPE_KEYWORDS and can_be_type:
+                    expression = Type(main_token)
+                elif next_token is not None and next_token == "[":
+                    argument_tokens, next_token = tokens.until_keyword(
+                        _CLOSING_SQUARE_BRACKET
                     )
-                    expression = FunctionCall(main_token, *arguments)
-
-                next_token = next(tokens, None)
-                if next_token and lower(next_token) == "filter":
-                    next_next_token = next(tokens)
-                    assert next_next_token == "(", next_next_token
-                    argument_tokens = get_tokens_until_closing_parenthesis(tokens)
-                    assert lower(argument_tokens[0]) == "where", argument_tokens
-                    filter_condition, next_token = ExpressionParser.parse(
-                        iter(argument_tokens[1:]),
-                        can_alias=False,
-                    )
-
-                    expression = FilteredFunctionCall(expression, filter_condition)
+                    arguments = yield ExpressionListParser._parse(argument_tokens)
+                    expression = Index(
+                        Column(main_token), arguments
+                    )  # left item will not always be a column
                     next_token = next(tokens, None)
+                elif (
+                    next_token is not None
+                    and main_token == "-"
+                    and next_token.isdigit()
+                ):
+                    expression = Integer(-int(next_token))
+                    next_token = next(tokens, None)
+                elif (
+                    next_token is not None
+                    and main_token == "-"
+                    and is_number(next_token)
+                ):
+                    expression = Float(-float(next_token))
+                    next_token = next(tokens, None)
+                elif (
+                    main_keyword in STRING_PREFIX_KEYWORDS
+                    and next_token is not None
+                    and next_token in String.QUOTES
+                ):
+                    expression = StringParser.parse(
+                        tokens, start_quote=next_token, prefix=main_token
+                    )
+                else:
+                    expression = Column(main_token)
 
-            elif (
-                next_token is not None
-                and lower(main_token) in DatePartExtraction.PARTS
-                and lower(next_token) == "from"
-            ):
-                rest_expression, next_token = ExpressionParser.parse(
-                    tokens, until_one_of=until_one_of
-                )
-                expression = DatePartExtraction(main_token, rest_expression)
-            elif lower(main_token) in Type.VALUES and can_be_type:
-                expression = Type(main_token)
-            elif next_token is not None and next_token == "[":
-                argument_tokens, next_token = get_tokens_until_one_of(
-                    tokens, stop_words=["]"]
-                )
-                arguments = ExpressionListParser.parse(iter(argument_tokens))
-                expression = Index(
-                    Column(main_token), arguments
-                )  # left item will not always be a column
-                next_token = next(tokens, None)
-            elif next_token is not None and main_token == "-" and next_token.isdigit():
-                expression = Integer(-int(next_token))
-                next_token = next(tokens, None)
-            elif (
-                next_token is not None
-                and main_token == "-"
-                and next_token.replace(".", "").isdigit()
-            ):
-                expression = Float(-float(next_token))
-                next_token = next(tokens, None)
-            elif (
-                lower(main_token) in String.PREFIXES
-                and next_token is not None
-                and lower(next_token) in String.QUOTES
-            ):
-                expression = StringParser.parse(
-                    tokens, start_quote=next_token, prefix=main_token
-                )
-            else:
-                expression = Column(main_token)
-
-        if lower(next_token) == "over":
-            opening_parenthesis = next(tokens, None)
-            if opening_parenthesis != "(":
-                raise ParsingError("expected '('")
+            if tokens.keyword == OVER:
+                opening_parenthesis = next(tokens, None)
+                if opening_parenthesis != "(":
+                    raise ParsingError("expected '('")
 
-            argument_tokens = iter(get_tokens_until_closing_parenthesis(tokens))
-            argument_next_token = next(argument_tokens, None)
-            if lower(argument_next_token) == "partition":
+                argument_tokens = tokens.until_closing_parenthesis()
                 argument_next_token = next(argument_tokens, None)
-                if not argument_next_token or lower(argument_next_token) != "by":
-                    raise ParsingError("Missing BY after PARTITION")
-                expression_tokens, argument_next_token = get_tokens_until_one_of(
-                    argument_tokens, ["order", "rows", "range"]
-                )
-                partition_by = ExpressionListParser.parse(iter(expression_tokens))
-            else:
-                partition_by = None
+                if argument_tokens.keyword == PARTITION:
+                    argument_next_token = next(argument_tokens, None)
+                    if argument_tokens.keyword != BY:
+                        raise ParsingError("Missing BY after PARTITION")
+                    (
+                        expression_tokens,
+                        argument_next_token,
+                    ) = argument_tokens.until_keyword(_PARTITION_BY_END)
+                    partition_by = yield ExpressionListParser._parse(expression_tokens)
+                else:
+                    partition_by = None
+
+                if argument_tokens.keyword == ORDER:
+                    argument_next_token = next(argument_tokens, None)
+                    if argument_tokens.keyword != BY:
+                        raise ParsingError("Missing BY after ORDER")
+                    (
+                        expression_tokens,
+                        argument_next_token,
+                    ) = argument_tokens.until_keyword(WINDOW_FRAME_KEYWORDS)
+                    order_by = yield OrderByParser._parse(expression_tokens)
+                else:
+                    order_by = None
 
-            if lower(argument_next_token) == "order":
-                argument_next_token = next(argument_tokens, None)
-                if not argument_next_token or lower(argument_next_token) != "by":
-                    raise ParsingError("Missing BY after ORDER")
-                expression_tokens, argument_next_token = get_tokens_until_one_of(
-                    argument_tokens, ["rows", "range"]
-                )
-                order_by = OrderByParser.parse(iter(expression_tokens))
-            else:
-                order_by = None
+                if argument_tokens.keyword in WINDOW_FRAME_KEYWORDS:
+                    rows_range = argument_next_token
+                    expression_tokens, _ = argument_tokens.until_keyword(_NO_KEYWORDS)
+                    frame_clause: Optional[WindowFrameClause] = WindowFrameClause(
+                        rows_range, " ".join(expression_tokens)
+                    )
+                else:
+                    frame_clause = None
 
-            if lower(argument_next_token) in ("rows", "range"):
-                rows_range = argument_next_token
-                expression_tokens, _ = get_tokens_until_one_of(argument_tokens, [])
-                frame_clause: Optional[WindowFrameClause] = WindowFrameClause(
-                    rows_range, " ".join(expression_tokens)
+                expression = AnalyticsClause(
+                    expression,
+                    partition_by=partition_by,
+                    order_by=order_by,
+                    frame_clause=frame_clause,
                 )
-            else:
-                frame_clause = None
+                next_token = next(tokens, None)
 
-            expression = AnalyticsClause(
-                expression,
-                partition_by=partition_by,
-                order_by=order_by,
-                frame_clause=frame_clause,
-            )
-            next_token = next(tokens, None)
+            while next_token == ".":
+                right_hand, next_token = yield ExpressionParser._parse(
+                    tokens, until_one_of=until_one_of, is_chained_columns=True
+                )
+                expression = ChainedColumns(expression, right_hand)
 
-        while next_token == ".":
-            right_hand, next_token = ExpressionParser.parse(
-                tokens, until_one_of=until_one_of, is_chained_columns=True
-            )
-            expression = ChainedColumns(expression, right_hand)
-
-        if next_token and next_token in ("+", "-", "*", "/") and not is_chained_columns:
-            left_hand = expression
-            symbol = next_token
-            right_hand, next_token = ExpressionParser.parse(
-                tokens,
-                is_right_hand=True,
-                until_one_of=until_one_of,
-            )
-            expression = ArithmaticOperator(symbol, left_hand, right_hand)
+            if (
+                _BINDING_POWERS.get(tokens.keyword) == _ARITHMETIC_POWER
+                and not is_chained_columns
+            ):
+                arithmetic_operands.append((expression, next_token))
+                first_token = None
+                can_be_type = False
+                continue
+            break
 
         while next_token == "[":
-            argument_tokens, next_token = get_tokens_until_one_of(
-                tokens, stop_words=["]"]
-            )
-            arguments = ExpressionListParser.parse(iter(argument_tokens))
+            argument_tokens, next_token = tokens.until_keyword(_CLOSING_SQUARE_BRACKET)
+            arguments = yield ExpressionListParser._parse(argument_tokens)
             expression = Index(expression, arguments)
             next_token = next(tokens, None)
 
+        for left_hand, symbol in reversed(arithmetic_operands):
+            expression = ArithmaticOperator(symbol, left_hand, expression)
+
         if is_right_hand or is_chained_columns:
             return expression, next_token
 
-        if lower(next_token) in Condition.PREDICATES:
-            first_token = None
-            symbol = next_token
-            if lower(next_token) == "is":
-                next_next_token = next(tokens)
-                if lower(next_next_token) == "not":
-                    symbol = "is not"
-                else:
-                    first_token = next_next_token
-            elif lower(next_token) == "not":
-                next_next_token = next(tokens)
-                if lower(next_next_token) == "in":
-                    symbol = "not in"
+        # Each boolean operand holds at most one comparison; its right hand
+        # side is an arithmetic chain parsed in right hand mode.
+        boolean_operands = []
+        while True:
+            next_keyword = tokens.keyword
+            if _BINDING_POWERS.get(next_keyword) == _COMPARISON_POWER:
+                if next_keyword in CONDITION_KEYWORDS:
+                    right_first_token = None
+                    symbol = next_token
+                    if next_keyword == IS:
+                        next_next_token = next(tokens)
+                        if tokens.keyword == NOT:
+                            symbol = "is not"
+                        else:
+                            right_first_token = next_next_token
+                    elif next_keyword == NOT:
+                        next_next_token = next(tokens)
+                        if tokens.keyword == IN:
+                            symbol = "not in"
+                        else:
+                            right_first_token = next_next_token
+
+                    right_hand, next_token = yield ExpressionParser._parse(
+                        tokens,
+                        is_right_hand=True,
+                        until_one_of=until_one_of,
+                        first_token=right_first_token,
+                    )
+                    expression = Condition(expression, symbol, right_hand)
+                elif next_keyword == BETWEEN:
+                    symbol = next_token
+                    right_hand_left, next_token = yield ExpressionParser._parse(
+                        tokens, is_right_hand=True, until_one_of=until_one_of
+                    )
+                    if tokens.keyword != AND:
+                        raise ParsingError("expected AND")
+                    right_hand_right, next_token = yield ExpressionParser._parse(
+                        tokens, is_right_hand=True, until_one_of=until_one_of
+                    )
+                    right_hand = BooleanCondition(
+                        "and",
+                        right_hand_left,
+                        right_hand_right,
+                    )
+                    expression = Condition(expression, symbol, right_hand)
                 else:
-                    first_token = next_next_token
+                    operator = next_token
+                    right_hand, next_token = yield ExpressionParser._parse(
+                        tokens, is_right_hand=True, until_one_of=until_one_of
+                    )
+                    expression = BitwiseOperation(expression, operator, right_hand)
 
-            right_hand, next_token = ExpressionParser.parse(
-                tokens,
-                is_right_hand=True,
-                until_one_of=until_one_of,
-                first_token=first_token,
-            )
-            expression = Condition(expression, symbol, right_hand)
-        elif lower(next_token) == "between":
-            symbol = next_token
-            right_hand_left, next_token = ExpressionParser.parse(
-                tokens, is_right_hand=True, until_one_of=until_one_of
-            )
-            if lower(next_token) != "and":
-                raise ParsingError("expected AND")
-            right_hand_right, next_token = ExpressionParser.parse(
-                tokens, is_right_hand=True, until_one_of=until_one_of
-            )
-            right_hand = BooleanCondition(
-                "and",
-                right_hand_left,
-                right_hand_right,
-            )
-            expression = Condition(expression, symbol, right_hand)
-        elif next_token in BitwiseOperation.OPERATORS:
-            operator = next_token
-            right_hand, next_token = ExpressionParser.parse(
+            if _BINDING_POWERS.get(tokens.keyword) != _BOOLEAN_POWER:
+                break
+            boolean_operands.append((expression, next_token))
+            expression, next_token = yield ExpressionParser._parse(
                 tokens, is_right_hand=True, until_one_of=until_one_of
             )
-            expression = BitwiseOperation(expression, operator, right_hand)
 
-        if lower(next_token) in BooleanCondition.PREDICATES:
-            left_hand = expression
-            symbol = next_token
-            right_hand, next_token = ExpressionParser.parse(
-                tokens, until_one_of=until_one_of
-            )
-            right_alias = None
-            if isinstance(right_hand, Alias):
-                right_alias = right_hand
-                right_hand = right_hand.expression
-            expression = BooleanCondition(symbol, left_hand, right_hand)
-            if right_alias is not None:
-                right_alias.expression = expression
-                expression = right_alias
-
-        if lower(next_token) == "except":
-            opening_parenthesis = next(tokens, None)
-            if opening_parenthesis != "(":
-                raise ParsingError("expected '('")
-            argument_tokens = get_tokens_until_closing_parenthesis(tokens)
-            arguments = ExpressionListParser.parse(iter(argument_tokens))
-            expression = ExceptClause(expression, arguments)
-            next_token = next(tokens, None)
+        # Boolean operators fold to the right. The trailing clauses and alias
+        # are read once per operand, innermost first, and an alias read for
+        # the right hand side is hoisted above the condition.
+        while True:
+            if tokens.keyword == EXCEPT:
+                opening_parenthesis = next(tokens, None)
+                if opening_parenthesis != "(":
+                    raise ParsingError("expected '('")
+                argument_tokens = tokens.until_closing_parenthesis()
+                arguments = yield ExpressionListParser._parse(argument_tokens)
+                expression = ExceptClause(expression, arguments)
+                next_token = next(tokens, None)
 
-        if lower(next_token) == "replace":
-            opening_parenthesis = next(tokens, None)
-            if opening_parenthesis != "(":
-                raise ParsingError("expected '('")
-            argument_tokens = get_tokens_until_closing_parenthesis(tokens)
-            arguments = ExpressionListParser.parse(iter(argument_tokens))
-            for arg in arguments:
-                assert (
-                    isinstance(arg, Alias) and arg.with_as is True
-                ), "SELECT * REPLACE arguments must be alias with AS"
-            expression = ReplaceClause(expression, arguments)
-            next_token = next(tokens, None)
+            if tokens.keyword == REPLACE:
+                opening_parenthesis = next(tokens, None)
+                if opening_parenthesis != "(":
+                    raise ParsingError("expected '('")
+                argument_tokens = tokens.until_closing_parenthesis()
+                arguments = yield ExpressionListParser._parse(argument_tokens)
+                for arg in arguments:
+                    assert (
+                        isinstance(arg, Alias) and arg.with_as is True
+                    ), "SELECT * REPLACE arguments must be alias with AS"
+                expression = ReplaceClause(expression, arguments)
+                next_token = next(tokens, None)
 
-        if (
-            next_token is not None
-            and next_token != ")"
-            and not (next_token in String.QUOTES and isinstance(expression, String))
-            and next_token != ";"
-            and lower(next_token) not in until_one_of
-            and can_alias
-        ):
-            if lower(next_token) == "as":
-                with_as = True
-                alias, _ = ExpressionParser.parse(
-                    tokens, is_right_hand=True, until_one_of=until_one_of
+            if (
+                next_token is not None
+                and next_token != ")"
+                and not (next_token in String.QUOTES and isinstance(expression, String))
+                and next_token != ";"
+                and tokens.keyword not in until_one_of
+                and (can_alias or boolean_operands)
+            ):
+                if tokens.keyword == AS:
+                    with_as = True
+                    alias, _ = yield ExpressionParser._parse(
+                        tokens, is_right_hand=True, until_one_of=until_one_of
+                    )
+                else:
+                    with_as = False
+                    alias = next_token
+                if alias in String.QUOTES:
+                    alias = StringParser.parse(tokens, alias)
+                expression = Alias(expression, alias, with_as)
+                next_token = next(tokens, None)
+
+            if not boolean_operands:
+                return expression, next_token
+            left_hand, symbol = boolean_operands.pop()
+            if isinstance(expression, Alias):
+                expression = Alias(
+                    BooleanCondition(symbol, left_hand, expression.expression),
+                    expression.alias,
+                    expression.with_as,
                 )
             else:
-                with_as = False
-                alias = next_token
-            if alias in String.QUOTES:
-                alias = StringParser.parse(tokens, alias)
-            return Alias(expression, alias, with_as), next(tokens, None)
-        return expression, next_token
+                expression = BooleanCondition(symbol, left_hand, expression)
 
 
 class StringParser:
@@ -947,31 +1068,32 @@ class StringParser:
         return string_expression
 
 
-class CaseParser:
+class CaseParser(Parser):
     @staticmethod
-    def parse(tokens):
+    def _parse(tokens):
         next_token = next(tokens)
-        if lower(next_token) == "when":
+        if tokens.keyword == WHEN:
             expression = None
         else:
-            expressions_tokens, next_token = get_tokens_until_one_of(
-                tokens, ["when"], first_token=next_token
+            expressions_tokens, next_token = tokens.until_keyword(
+                _CASE_WHEN, include_previous=True
             )
-            expression, _ = ExpressionParser.parse(iter(expressions_tokens))
+            expression, _ = yield ExpressionParser._parse(expressions_tokens)
 
         when_then = []
         else_expression = None
         while next_token:
-            if lower(next_token) == "when":
-                expressions_tokens, _ = get_tokens_until_one_of(tokens, ["then"])
-                when_expression, _ = ExpressionParser.parse(iter(expressions_tokens))
-                expressions_tokens, next_token = get_tokens_until_one_of(
-                    tokens, ["when", "else"]
+            keyword = tokens.keyword
+            if keyword == WHEN:
+                expressions_tokens, _ = tokens.until_keyword(_CASE_THEN)
+                when_expression, _ = yield ExpressionParser._parse(expressions_tokens)
+                expressions_tokens, next_token = tokens.until_keyword(
+                    _CASE_WHEN_OR_ELSE
                 )
-                then_expression, _ = ExpressionParser.parse(iter(expressions_tokens))
+                then_expression, _ = yield ExpressionParser._parse(expressions_tokens)
                 when_then.append((when_expression, then_expression))
-            elif lower(next_token) == "else":
-                expressions_tokens, next_token = get_tokens_until_one_of(tokens, [])
-                else_expression, _ = ExpressionParser.parse(iter(expressions_tokens))
+            elif keyword == ELSE:
+                expressions_tokens, next_token = tokens.until_keyword(_NO_KEYWORDS)
+                else_expression, _ = yield ExpressionParser._parse(expressions_tokens)
 
         return Case(expression, when_then, else_expression)
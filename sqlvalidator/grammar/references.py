@@ -0,0 +1,272 @@
+"""
+Tables and columns referenced by a query, read from its tokens.
+
+The scanner follows the FROM and JOIN rules of FromStatementParser and the
+identifier rules of ExpressionParser, without building the syntax tree. It
+takes its decisions on the keyword groups and predicates of keywords.py and
+tokeniser.py, which the parser takes them on too.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+
+from sqlvalidator.grammar.keywords import (
+    AS,
+    BETWEEN,
+    BITWISE_KEYWORDS,
+    BOOLEAN_CONDITION_KEYWORDS,
+    BOOLEAN_KEYWORDS,
+    CONDITION_KEYWORDS,
+    DOT,
+    END,
+    FROM,
+    FROM_END_KEYWORDS,
+    FROM_ITEM_END_KEYWORDS,
+    JOIN_CONDITION_KEYWORDS,
+    NOT_A_KEYWORD,
+    NULL_KEYWORDS,
+    OFFSET,
+    OPENING_PARENTHESIS,
+    OPENING_SQUARE_BRACKET,
+    SELECT,
+    STRING_PREFIX_KEYWORDS,
+    TIMESTAMP_TRUNC,
+    TYPE_KEYWORDS,
+    UNNEST,
+    WINDOW_FRAME_KEYWORDS,
+    WITH,
+    is_date_part_extraction,
+    keyword_ids,
+)
+from sqlvalidator.grammar.tokeniser import (
+    KIND_CLOSING_QUOTE,
+    KIND_OPENING_QUOTE,
+    KIND_STRING,
+    KIND_WORD,
+    TokenBuffer,
+    is_number,
+)
+
+# Keywords that are never read as a column: those the parser ends clauses and
+# expressions on, and those of the clauses and expressions it reads
+_NOT_COLUMN_KEYWORDS = (
+    FROM_END_KEYWORDS
+    | FROM_ITEM_END_KEYWORDS
+    | JOIN_CONDITION_KEYWORDS
+    | CONDITION_KEYWORDS
+    | BOOLEAN_CONDITION_KEYWORDS
+    | {BETWEEN}
+    | keyword_ids(
+        (
+            "select",
+            "with",
+            "distinct",
+            "from",
+            "by",
+            "asc",
+            "desc",
+            "as",
+            "case",
+            "when",
+            "then",
+            "else",
+            "end",
+            "ignore",
+            "respect",
+            "nulls",
+            "partition",
+            "over",
+            "filter",
+            "replace",
+        )
+    )
+)
+# Keywords ending an operand, after which a word is an alias
+_OPERAND_KEYWORDS = NULL_KEYWORDS | BOOLEAN_KEYWORDS | {END}
+# Keywords after which a FROM clause expects a table
+_FROM_ITEM_START = FROM_ITEM_END_KEYWORDS | {FROM}
+
+_EXPRESSION = 0
+_FROM = 1
+_JOIN_CONDITION = 2
+_WITH = 3
+
+
+class References(NamedTuple):
+    tables: List[str]
+    columns: List[str]
+
+
+def extract_references(sql: str) -> References:
+    """
+    Names of the tables and of the columns used by a SQL query.
+
+    Names are listed once, in the order they appear. Dotted names, like
+    ``dataset.table`` or ``t.col``, are kept whole. Aliases, function names
+    and the names of WITH queries are not references.
+    """
+    buffer = TokenBuffer(sql)
+    kinds, keywords, partners = buffer.kinds, buffer.keywords, buffer.partners
+    length = len(buffer)
+    has_timestamp_trunc = TIMESTAMP_TRUNC in keywords
+
+    tables: Dict[str, None] = {}
+    columns: Dict[str, None] = {}
+    with_names = set()
+
+    context = _EXPRESSION
+    expects_table = False
+    can_be_type = in_function = False
+    after_operand = False
+    # Context, type permission, function flag and end of the enclosing brackets
+    stack: List[Tuple[int, bool, bool, int]] = []
+    end = length
+
+    index = 0
+    while index < length:
+        if index == end:
+            context, can_be_type, in_function, end = stack.pop()
+            expects_table = False
+            after_operand = True
+            index += 1
+            continue
+
+        kind = kinds[index]
+        keyword = keywords[index]
+        next_keyword = keywords[index + 1] if index + 1 < length else NOT_A_KEYWORD
+
+        if keyword in (OPENING_PARENTHESIS, OPENING_SQUARE_BRACKET):
+            stack.append((context, can_be_type, in_function, end))
+            end = partners[index] if partners[index] >= 0 else length
+            in_function = (
+                keyword == OPENING_PARENTHESIS
+                and index > 0
+                and kinds[index - 1] == KIND_WORD
+                and keywords[index - 1] not in _NOT_COLUMN_KEYWORDS
+            )
+            can_be_type = in_function and (
+                can_be_type
+                or has_timestamp_trunc
+                and buffer.find_keyword(TIMESTAMP_TRUNC, index + 1, end) >= 0
+            )
+            if not (context == _FROM and expects_table) and context != _WITH:
+                context = _EXPRESSION
+            after_operand = False
+            index += 1
+            continue
+
+        if kind == KIND_OPENING_QUOTE:
+            if context == _FROM and expects_table:
+                name, index = _dotted_name(buffer, index)
+                tables[name] = None
+                expects_table = False
+            else:
+                # Strings, and quoted identifiers read as strings by the parser
+                index += 1
+                while index < length and kinds[index] != KIND_CLOSING_QUOTE:
+                    index += 1
+                index += 1
+            after_operand = True
+            continue
+
+        if keyword == SELECT:
+            context = _EXPRESSION
+            in_function = after_operand = False
+        elif keyword == WITH and next_keyword != OFFSET:
+            context = _WITH
+        elif context == _WITH:
+            if kind == KIND_WORD and keyword != AS:
+                with_names.add(buffer.text(index))
+        elif keyword in FROM_END_KEYWORDS or keyword == FROM:
+            context = _FROM if keyword == FROM else _EXPRESSION
+            expects_table = keyword == FROM
+            after_operand = False
+        elif context in (_FROM, _JOIN_CONDITION) and keyword in _FROM_ITEM_START:
+            context = _FROM
+            expects_table = True
+        elif context == _FROM and keyword in JOIN_CONDITION_KEYWORDS:
+            context = _JOIN_CONDITION
+            after_operand = False
+        elif context == _FROM:
+            if keyword == AS or (keyword == WITH and next_keyword == OFFSET):
+                # The alias is skipped with the next token
+                index += 1
+            elif expects_table and kind == KIND_WORD and keyword != UNNEST:
+                name, index = _dotted_name(buffer, index)
+                tables[name] = None
+                expects_table = False
+                continue
+            else:
+                # UNNEST arguments, or alias of the previous table
+                expects_table = False
+        elif keyword in WINDOW_FRAME_KEYWORDS and next_keyword != OPENING_PARENTHESIS:
+            # Window frame, kept as text by the parser
+            index = end
+            continue
+        elif kind == KIND_WORD:
+            if keyword in _NOT_COLUMN_KEYWORDS:
+                after_operand = keyword in _OPERAND_KEYWORDS
+            elif keyword in BITWISE_KEYWORDS:
+                # Binary operator, like | or ||, followed by an operand
+                after_operand = False
+            elif keyword in _OPERAND_KEYWORDS:
+                after_operand = True
+            elif next_keyword == OPENING_PARENTHESIS:
+                after_operand = False
+            elif (
+                keyword in STRING_PREFIX_KEYWORDS
+                and index + 1 < length
+                and kinds[index + 1] == KIND_OPENING_QUOTE
+            ):
+                after_operand = False
+            elif after_operand or keywords[index - 1] == AS:
+                # Alias
+                after_operand = True
+            elif is_date_part_extraction(keyword, next_keyword) and in_function:
+                index += 2
+                after_operand = False
+                continue
+            elif keyword in TYPE_KEYWORDS and can_be_type:
+                after_operand = True
+            elif is_number(buffer.text(index)):
+                after_operand = True
+            else:
+                name, index = _dotted_name(buffer, index)
+                if not name.endswith("*"):
+                    columns[name] = None
+                after_operand = True
+                continue
+        else:
+            after_operand = False
+
+        index += 1
+
+    return References(
+        [table for table in tables if table not in with_names], list(columns)
+    )
+
+
+def _dotted_name(buffer: TokenBuffer, index: int) -> Tuple[str, int]:
+    """
+    Name starting at the token index, with the parts following dots, and
+    the index of the token after it.
+    """
+    kinds, keywords = buffer.kinds, buffer.keywords
+    length = len(buffer)
+    parts = []
+    while True:
+        if kinds[index] == KIND_OPENING_QUOTE:
+            index += 1
+            if index < length and kinds[index] == KIND_STRING:
+                parts.append(buffer.text(index))
+                index += 1
+            index += 1
+        else:
+            parts.append(buffer.text(index))
+            index += 1
+        if (
+            index + 1 < length
+            and keywords[index] == DOT
+            and keywords[index + 1] not in (OPENING_PARENTHESIS, OPENING_SQUARE_BRACKET)
+        ):
+            index += 1
+        else:
+            return ".".join(parts), index
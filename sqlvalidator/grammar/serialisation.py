@@ -0,0 +1,333 @@
+"""
+Compact serialisation of the syntax trees of grammar/sql.py.
+
+The values of a tree are numbered in one table: the distinct constants
+(strings, numbers, booleans and None), then the nodes, grouped by class and
+set attributes, then the tuples and lists. The payload holds the constants,
+the items of the tuples and lists and, attribute by attribute, the values of
+the nodes, as numbers of the table stored in arrays of the smallest integer
+type that fits them.
+
+Nothing is recursive, so trees of any depth are handled. The payload is read
+with marshal, which is not secure against malicious data: like pickle, only
+load data from a trusted source.
+"""
+import marshal
+import sys
+from array import array
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlvalidator.grammar import sql
+
+FORMAT_VERSION = 3
+
+_CONSTANT_TYPES = frozenset((str, int, float, bool, type(None)))
+_CONTAINER_TYPES = frozenset((tuple, list))
+_NODE_TYPES = frozenset(
+    cls
+    for name, cls in vars(sql).items()
+    if isinstance(cls, type)
+    and cls.__module__ == sql.__name__
+    and not name.startswith("_")
+)
+_FIELDS = {cls: sql.node_fields(cls) for cls in _NODE_TYPES}
+_UNSET = object()
+_UNSET_ID = id(_UNSET)
+
+# Node class and names of its set attributes
+_Shape = Tuple[type, Tuple[str, ...]]
+
+
+class SerialisationError(ValueError):
+    pass
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Serialise a syntax tree, or any value made of nodes, tuples, lists,
+    strings, numbers, booleans and None.
+    """
+    shapes, containers = _collect(value)
+    table = _Table(value, shapes, containers)
+    return marshal.dumps(
+        (
+            FORMAT_VERSION,
+            tuple(table.constants),
+            tuple(_serialised_shape(shape) for shape in shapes),
+            _pack(len(members.nodes) for members in shapes.values()),
+            bytes(type(container) is list for container in containers),
+            _pack(len(container) for container in containers),
+            _pack(table.numbers(chain.from_iterable(containers))),
+            _pack(table.numbers(_attribute_values(shapes))),
+            table.number(value),
+        )
+    )
+
+
+def loads(data: bytes) -> Any:
+    """
+    Rebuild the value serialised by dumps. Only call it on trusted data.
+    """
+    try:
+        (
+            version,
+            constants,
+            shapes,
+            shape_sizes,
+            container_are_lists,
+            container_sizes,
+            item_numbers,
+            attribute_numbers,
+            root,
+        ) = marshal.loads(data)
+    except (EOFError, TypeError, ValueError) as e:
+        raise SerialisationError("Invalid serialised data") from e
+    if version != FORMAT_VERSION:
+        raise SerialisationError("Unsupported format version {}".format(version))
+
+    try:
+        table = list(constants)
+        shapes = [_shape(serialised) for serialised in shapes]
+        nodes = _new_nodes(shapes, _unpack(shape_sizes))
+        for members in nodes:
+            table.extend(members)
+        _build_containers(
+            table,
+            container_are_lists,
+            _unpack(container_sizes),
+            iter(_unpack(item_numbers)),
+        )
+        _set_attributes(table, shapes, nodes, iter(_unpack(attribute_numbers)))
+        return table[root]
+    except (AttributeError, IndexError, StopIteration, TypeError, ValueError) as e:
+        raise SerialisationError("Invalid serialised data") from e
+
+
+class _Members:
+    """
+    Nodes of a shape, and the values of their attributes, in the order of the
+    attribute names of the shape.
+    """
+
+    __slots__ = ("nodes", "rows")
+
+    def __init__(self):
+        self.nodes: List[Any] = []
+        self.rows: List[List[Any]] = []
+
+
+def _collect(value: Any) -> Tuple[Dict[_Shape, _Members], List[Any]]:
+    """
+    Nodes of the value grouped by shape, and its containers, each one once,
+    the containers after the containers they hold, so that they can be built
+    in that order.
+    """
+    shapes: Dict[_Shape, _Members] = {}
+    containers: List[Any] = []
+    # Nodes shared by several parents, see sharing.py, are only stored once
+    seen = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        item_type = type(item)
+        if item_type in _CONSTANT_TYPES:
+            continue
+        if item_type is _ItemsCollected:
+            containers.append(item.container)
+            continue
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if item_type in _NODE_TYPES:
+            names, children = _set_attributes_of(item)
+            members = shapes.get((item_type, names))
+            if members is None:
+                members = shapes[(item_type, names)] = _Members()
+            members.nodes.append(item)
+            members.rows.append(children)
+        elif item_type in _CONTAINER_TYPES:
+            stack.append(_ItemsCollected(item))
+            children = item
+        else:
+            raise SerialisationError(
+                "Cannot serialise value of type {}".format(item_type.__name__)
+            )
+        stack.extend(children)
+    return shapes, containers
+
+
+class _ItemsCollected:
+    """
+    Marker of a container on the stack of _collect, popped once its items are
+    collected.
+    """
+
+    __slots__ = ("container",)
+
+    def __init__(self, container: Any):
+        self.container = container
+
+
+def _set_attributes_of(node: Any) -> Tuple[Tuple[str, ...], List[Any]]:
+    """
+    Names and values of the attributes set on the node, like all but the
+    value of a FunctionCall.
+    """
+    fields = _FIELDS[type(node)]
+    values = [getattr(node, name, _UNSET) for name in fields]
+    # Compared by id, not to compare the nodes with _UNSET
+    if _UNSET_ID not in map(id, values):
+        return fields, values
+    names = tuple(name for name, value in zip(fields, values) if value is not _UNSET)
+    return names, [value for value in values if value is not _UNSET]
+
+
+def _attribute_values(shapes: Dict[_Shape, _Members]) -> Iterator[Any]:
+    """
+    Values of the attributes of the nodes, attribute by attribute for each
+    shape, in the order of _set_attributes.
+    """
+    for members in shapes.values():
+        for column in zip(*members.rows):
+            yield from column
+
+
+class _Table:
+    """
+    Numbers of the values of a tree in the table of the payload: the distinct
+    constants, keyed with their type, not to merge 1, 1.0 and True, then the
+    nodes of each shape and the containers. Values are numbered by id, as
+    the same objects are referenced many times.
+    """
+
+    def __init__(
+        self, value: Any, shapes: Dict[_Shape, _Members], containers: List[Any]
+    ):
+        self.constants: List[Any] = []
+        constant_numbers: Dict[Tuple[type, Any], int] = {}
+        self._numbers: Dict[int, int] = {}
+        values = chain(
+            (value,), chain.from_iterable(containers), _attribute_values(shapes)
+        )
+        for item in values:
+            if id(item) in self._numbers or type(item) not in _CONSTANT_TYPES:
+                continue
+            key = (type(item), item)
+            number = constant_numbers.get(key)
+            if number is None:
+                number = constant_numbers[key] = len(self.constants)
+                self.constants.append(item)
+            self._numbers[id(item)] = number
+        nodes = chain.from_iterable(members.nodes for members in shapes.values())
+        structured = chain(nodes, containers)
+        for number, item in enumerate(structured, len(self.constants)):
+            self._numbers[id(item)] = number
+
+    def number(self, value: Any) -> int:
+        return self._numbers[id(value)]
+
+    def numbers(self, values: Iterable[Any]) -> Iterator[int]:
+        return map(self._numbers.__getitem__, map(id, values))
+
+
+def _serialised_shape(shape: _Shape) -> Any:
+    """
+    Class name and attribute names, or the class name alone when all the
+    attributes of the class are set.
+    """
+    cls, names = shape
+    if names == _FIELDS[cls]:
+        return cls.__name__
+    return cls.__name__, names
+
+
+def _shape(serialised: Any) -> _Shape:
+    """
+    Node class and attribute names of a shape serialised by _serialised_shape.
+    """
+    if isinstance(serialised, str):
+        name, names = serialised, None
+    else:
+        name, names = serialised
+    cls = getattr(sql, name, None)
+    if cls not in _NODE_TYPES:
+        raise SerialisationError("Unknown node class {}".format(name))
+    if names is None:
+        return cls, _FIELDS[cls]
+    if len(set(names)) != len(names) or not set(names) <= set(_FIELDS[cls]):
+        raise SerialisationError("Invalid attributes for {}".format(name))
+    return cls, tuple(names)
+
+
+def _new_nodes(shapes: List[_Shape], sizes: Sequence[int]) -> List[List[Any]]:
+    """
+    Nodes of each shape, without their attributes, set once all the values
+    of the table are created.
+    """
+    if len(sizes) != len(shapes):
+        raise SerialisationError("Invalid serialised data")
+    return [
+        [object.__new__(cls) for _ in range(size)]
+        for (cls, _), size in zip(shapes, sizes)
+    ]
+
+
+def _build_containers(
+    table: List[Any],
+    are_lists: bytes,
+    sizes: Sequence[int],
+    item_numbers: Iterator[int],
+) -> None:
+    """
+    Append the tuples and lists to the table, built from the numbers of their
+    items, which come before them in the table.
+    """
+    if len(sizes) != len(are_lists):
+        raise SerialisationError("Invalid serialised data")
+    for is_list, size in zip(are_lists, sizes):
+        items = [table[next(item_numbers)] for _ in range(size)]
+        table.append(items if is_list else tuple(items))
+
+
+def _set_attributes(
+    table: List[Any],
+    shapes: List[_Shape],
+    nodes: List[List[Any]],
+    attribute_numbers: Iterator[int],
+) -> None:
+    """
+    Set the attributes of the nodes, attribute by attribute for each shape.
+    """
+    for (cls, names), members in zip(shapes, nodes):
+        for name in names:
+            # Set through the slot, as the attributes of the new nodes are
+            # only set once, without the check of _Node.__setattr__
+            set_slot = getattr(cls, name).__set__
+            for member in members:
+                set_slot(member, table[next(attribute_numbers)])
+
+
+def _pack(numbers: Iterable[int]) -> Tuple[str, bytes]:
+    """
+    Numbers stored in an array of the smallest integer type that fits them,
+    little-endian.
+    """
+    values = array("Q", numbers)
+    largest = max(values, default=0)
+    for typecode in ("B", "H", "I", "Q"):
+        if largest < 1 << (8 * array(typecode).itemsize):
+            break
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return typecode, packed.tobytes()
+
+
+def _unpack(packed: Tuple[str, bytes]) -> array:
+    typecode, data = packed
+    numbers = array(typecode)
+    numbers.frombytes(data)
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    return numbers
@@ -0,0 +1,119 @@
+"""
+Sharing of identical subtrees between syntax trees (hash-consing).
+
+A table keeps one instance of each distinct node it was given. Sharing a tree
+replaces each node by the instance of the table with the same structure, so
+that a column, a function call or a CTE body repeated in a query, or across
+the queries shared with the same table, is only kept once in memory. Equality
+of shared nodes is then an identity check.
+
+Nodes are matched on their exact structure: type and all their attributes.
+It is stricter than their equality, which ignores the quotes of strings or the
+AS of aliases, as sharing must not change the formatted query.
+"""
+from typing import Any, Dict, Hashable, List, Tuple
+
+from sqlvalidator.grammar import sql
+
+_UNSET = object()
+# Attributes of each node class met, see sql.node_fields
+_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+class SharedNodes:
+    """
+    Table of the distinct nodes of the trees shared with it.
+
+    The table keeps its nodes alive: use one table for a batch of related
+    queries rather than for the lifetime of a process.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def clear(self) -> None:
+        self._nodes.clear()
+
+    def share(self, value: Any) -> Any:
+        """
+        Return the value with its nodes replaced by those of the table.
+
+        The nodes of the value are updated in place to point to the shared
+        nodes below them, which leaves their structure unchanged.
+        """
+        # Replacement of each visited node, tuple or list, by id. The visited
+        # values are kept alive, so that their ids are not reused meanwhile.
+        shared: Dict[int, Any] = {}
+        visited = []
+        stack = [(value, False)]
+        while stack:
+            item, children_done = stack.pop()
+            if id(item) in shared:
+                continue
+            if not children_done:
+                stack.append((item, True))
+                stack.extend((child, False) for child in _children(item))
+                continue
+            visited.append(item)
+            if isinstance(item, (list, tuple)):
+                shared[id(item)] = _replaced_items(item, shared)
+            else:
+                shared[id(item)] = self._share_node(item, shared)
+        return shared.get(id(value), value)
+
+    def _share_node(self, node: Any, shared: Dict[int, Any]) -> Any:
+        key: List[Any] = [type(node)]
+        for name in _fields(type(node)):
+            value = getattr(node, name, _UNSET)
+            replacement = shared.get(id(value), value)
+            if replacement is not value:
+                sql.replace_field(node, name, replacement)
+            key.append(_structure(replacement))
+        return self._nodes.setdefault(tuple(key), node)
+
+
+def _children(item: Any) -> List[Any]:
+    if isinstance(item, (list, tuple)):
+        values = item
+    elif isinstance(item, sql._Node):
+        values = [getattr(item, name, None) for name in _fields(type(item))]
+    else:
+        return []
+    return [value for value in values if isinstance(value, (list, tuple, sql._Node))]
+
+
+def _fields(cls: type) -> Tuple[str, ...]:
+    fields = _FIELDS.get(cls)
+    if fields is None:
+        fields = _FIELDS[cls] = sql.node_fields(cls)
+    return fields
+
+
+def _replaced_items(container: Any, shared: Dict[int, Any]) -> Any:
+    items = [shared.get(id(item), item) for item in container]
+    if all(item is original for item, original in zip(items, container)):
+        return container
+    return type(container)(items)
+
+
+def _structure(value: Any) -> Hashable:
+    """
+    Key of an attribute value whose nodes are already shared.
+
+    Strings, booleans and None are their own key, so that most keys only hold
+    references to existing objects. The other numbers are keyed with their
+    type, to not be mixed with the ids of nodes.
+    """
+    if isinstance(value, sql._Node):
+        # Shared nodes are kept alive by the table, so their id is not reused
+        return id(value)
+    if isinstance(value, tuple):
+        return tuple(map(_structure, value))
+    if isinstance(value, list):
+        return (list, *map(_structure, value))
+    if value is None or value is _UNSET or type(value) in (str, bool):
+        return value
+    return (type(value), value)
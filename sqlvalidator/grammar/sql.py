@@ -1,7 +1,21 @@
 from dataclasses import dataclass
-from typing import Any, List, Optional, Set
-
+from types import GeneratorType
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlvalidator.grammar import layout
 from sqlvalidator.grammar.tokeniser import lower
+from sqlvalidator.grammar.traversal import Stored, each, run
 
 DEFAULT_LINE_LENGTH = 88
 
@@ -12,8 +26,131 @@ def transform(obj: Any) -> str:
     return str(obj)
 
 
+# Generators of transform(obj), str(obj) and repr(obj), or the result itself
+# for the values without nested nodes, to yield from the generators of the nodes
+
+
+def _transformed(obj: Any) -> Any:
+    if isinstance(obj, _Node):
+        # The documents of the leaf nodes are cheaper to build again than to
+        # cache
+        if obj._child_fields:
+            return obj._document("_transform")
+        return obj._transform()
+    return transform(obj)
+
+
+def _stringified(obj: Any) -> Any:
+    if isinstance(obj, _Node):
+        if obj._child_fields:
+            return obj._document("_str")
+        return obj._str()
+    return str(obj)
+
+
+def _represented(obj: Any) -> Any:
+    if isinstance(obj, _Node):
+        return obj._repr()
+    if type(obj) is list or type(obj) is tuple:
+        return _represented_items(obj)
+    return repr(obj)
+
+
+def _represented_items(items: Any) -> Generator[Any, Any, Any]:
+    represented = yield each(map(_represented, items))
+    if type(items) is list:
+        return "[{}]".format(", ".join(represented))
+    if len(represented) == 1:
+        return "({},)".format(represented[0])
+    return "({})".format(", ".join(represented))
+
+
+def _typed(node: "_Node") -> Any:
+    """
+    Generator of the return type of the node, or the type itself when it is
+    cached or the node is a leaf, whose type is a constant.
+    """
+    if node._child_fields:
+        return node._document("_return_type")
+    return node._return_type()
+
+
+def _field_name(node: "_Node") -> Optional[str]:
+    """
+    Name of the known field the node can be, built from the values of a
+    column or of chained columns, like a.b, as they are formatted. The other
+    nodes are not named like fields: their text holds quotes, spaces or
+    brackets, or they are constants.
+    """
+    if isinstance(node, Column):
+        return _column_name(node)
+    if isinstance(node, ChainedColumns):
+        return _chained_name(node.columns)
+    return None
+
+
+def _chained_name(columns: Sequence["_Node"]) -> Optional[str]:
+    """
+    Name of chained columns, like a.b, or of the first ones, like the alias
+    a of a.b. None when one of them is not a column or a string.
+    """
+    names = []
+    # Chained columns can be nested, like (a.b).c
+    stack = list(reversed(columns))
+    while stack:
+        part = stack.pop()
+        if isinstance(part, ChainedColumns):
+            stack.extend(reversed(part.columns))
+        elif isinstance(part, Column):
+            names.append(_column_name(part))
+        elif isinstance(part, String):
+            # Like String._str, as in `project.dataset`.table
+            names.append(
+                "{}{}{}{}".format(
+                    part.prefix or "", part.quotes, part.value, part.quotes
+                )
+            )
+        else:
+            return None
+    return ".".join(names)
+
+
+def _column_name(column: "Column") -> str:
+    # Like Column._str
+    if column.value in Column.KEYWORDS:
+        return column.value.upper()
+    return str(column.value)
+
+
+def _known_fields(obj: Any) -> Generator[Any, Any, Any]:
+    """
+    Generator of the known fields of obj, or None when obj has no known_fields.
+    """
+    if not isinstance(obj, _Node):
+        return None
+    try:
+        return (yield obj._document("_known_fields"))
+    except AttributeError:
+        return None
+
+
+def _condition_clause(value: Any) -> Generator[Any, Any, Any]:
+    """
+    Generator of the text of a WHERE, HAVING, ON or USING clause.
+    """
+    transformed_value = yield _transformed(value)
+    if isinstance(value, Parenthesis) and layout.is_multiline(transformed_value):
+        transformed_value = yield _transformed(value.args[0])
+        return layout.concat(" (\n ", layout.indented(transformed_value), "\n)")
+    if layout.is_multiline(transformed_value):
+        return layout.concat("\n ", layout.indented(transformed_value))
+    return layout.concat(" ", transformed_value)
+
+
 @dataclass
 class _FieldInfo:
+    __slots__ = ("name", "type")
+
     name: str
     type: type
 
@@ -21,7 +158,333 @@ class _FieldInfo:
         return hash(self.name)
 
 
-class SelectStatement:
+class _KnownFields(frozenset):
+    """
+    Immutable set of known fields, indexed to resolve a column in constant
+    time: by name, by the name after the alias for the fields of an alias,
+    like b for a.b, and whether one of the fields is the * wildcard.
+
+    Fields are listed in the order of the set, and the set can hold several
+    fields of the same name, with different types.
+    """
+
+    __slots__ = ("_by_name", "_by_suffix", "has_wildcard")
+
+    def __init__(self, fields: Iterable[_FieldInfo] = ()):
+        by_name: Dict[str, List[_FieldInfo]] = {}
+        by_suffix: Dict[str, List[_FieldInfo]] = {}
+        for field in self:
+            by_name.setdefault(field.name, []).append(field)
+            # Names can also be nodes, like the string of an alias
+            if isinstance(field.name, str):
+                _, dot, suffix = field.name.partition(".")
+                if dot:
+                    by_suffix.setdefault(suffix, []).append(field)
+        self._by_name = by_name
+        self._by_suffix = by_suffix
+        self.has_wildcard = "*" in by_name
+
+    def named(self, name: Any) -> Sequence[_FieldInfo]:
+        return self._by_name.get(name, ())
+
+    def with_suffix(self, name: Any) -> Sequence[_FieldInfo]:
+        """
+        Fields named name after an alias, like a.name.
+        """
+        return self._by_suffix.get(name, ())
+
+
+def _indexed(known_fields: Optional[AbstractSet[_FieldInfo]]) -> _KnownFields:
+    if isinstance(known_fields, _KnownFields):
+        return known_fields
+    return _KnownFields(known_fields or ())
+
+
+# Fields of a table, whose columns are unknown
+_TABLE_FIELDS = _KnownFields({_FieldInfo("*", type=object)})
+
+
+class _Node:
+    """
+    Base of the syntax tree nodes.
+
+    Nodes are compared on the values returned by _key, and hashed from them.
+    They are immutable, as their hash and texts are cached, and those of the
+    nodes above them: each field can only be set once, when building the
+    node, see __setattr__. The lists held by the nodes must not be modified
+    either.
+
+    Formatting, validation and representation are implemented by generators,
+    _transform, _str, _validate and _repr, which yield the generators of the
+    nested nodes, see traversal.run. Those of the leaf nodes return their
+    result directly, but a method which is not a generator must never call
+    the methods of the nested nodes, to not recurse. _transform and _str
+    return the document of the text, rendered by transform and __str__, see
+    layout.
+
+    Like the hash, the documents and texts of a node are cached, in
+    _documents, so that formatting a node again or measuring the width of its
+    text does not go over the nested nodes again. So are the fields a node
+    provides to the query selecting from it, returned by _known_fields as an
+    immutable _KnownFields shared by all the queries over the node, and the
+    return types of the expressions, and the errors of validate on the
+    statement. The type of a column depends on the query it is in, so it is
+    looked up in the known fields on validation, by the name of the column.
+    """
+
+    __slots__ = ("_hash", "_documents")
+    _hash: int
+    # Document of each formatting method and arguments, text of each
+    # formatting method, known fields and return type, see _document and _text
+    _documents: Dict[Any, Any]
+    # Attributes which can hold nested nodes, or lists or tuples of them
+    _child_fields: Tuple[str, ...] = ()
+    _validate: Callable[..., Any]
+    # Only defined by the nodes providing columns, like tables and subqueries
+    _known_fields: Callable[[], Any]
+    # Only defined by the expressions
+    _return_type: Callable[[], Any]
+
+    def _key(self) -> tuple:
+        # The fields of the node, unless the node class compares them
+        # differently
+        fields = _NODE_FIELDS.get(type(self))
+        if fields is None:
+            fields = _NODE_FIELDS[type(self)] = node_fields(type(self))
+        return tuple(getattr(self, name, None) for name in fields)
+
+    def _same_type(self, other) -> bool:
+        return type(self) == type(other)
+
+    def __setattr__(self, name, value):
+        if name not in _CACHES and hasattr(self, name):
+            raise AttributeError(
+                "{} nodes are immutable, cannot set {}".format(
+                    type(self).__name__, name
+                )
+            )
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            "{} nodes are immutable, cannot delete {}".format(type(self).__name__, name)
+        )
+
+    def __eq__(self, other):
+        return _equal(self, other)
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            return _structural_hash(self)
+
+    def __reduce__(self):
+        # Pickled with the format of serialisation.py, which does not recurse
+        # into each level of deep trees, unlike pickle. The cached hash and
+        # documents are left out and computed again when needed.
+        from sqlvalidator.grammar import serialisation
+
+        return serialisation.loads, (serialisation.dumps(self),)
+
+    def transform(self, **kwargs) -> str:
+        return self._text("_transform", **kwargs)
+
+    def _transform(self, **kwargs) -> Any:
+        return self._str()
+
+    def __str__(self):
+        return self._text("_str")
+
+    def transform_to(self, writer: Callable[[str], Any], **kwargs) -> None:
+        """
+        Pass the text of transform to writer in pieces, without building the
+        whole text, unless it is cached already.
+        """
+        if not self._child_fields:
+            writer(self.transform(**kwargs))
+            return
+        text = self._documents_cache().get(("text", "_transform", *kwargs.items()))
+        if text is not None:
+            writer(text)
+            return
+        layout.write(run(self._document("_transform", **kwargs)), writer)
+
+    def _text(self, method: str, **kwargs) -> str:
+        if not self._child_fields:
+            # Like in _transformed
+            return layout.render(run(getattr(self, method)(**kwargs)))
+        key = ("text", method, *kwargs.items())
+        documents = self._documents_cache()
+        text = documents.get(key)
+        if text is None:
+            text = layout.render(run(self._document(method, **kwargs)))
+            documents[key] = text
+        return text
+
+    def _document(self, method: str, **kwargs) -> Any:
+        """
+        Generator of the document returned by the formatting method, or the
+        document itself when it is cached. Also caches _known_fields and
+        _return_type.
+        """
+        key = (method, *kwargs.items()) if kwargs else method
+        documents = self._documents_cache()
+        document = documents.get(key)
+        if document is None:
+            document = getattr(self, method)(**kwargs)
+            if type(document) is GeneratorType:
+                return Stored(document, documents, key)
+            documents[key] = document
+        return document
+
+    def _documents_cache(self) -> Dict[Any, Any]:
+        documents = getattr(self, "_documents", None)
+        if documents is None:
+            documents = self._documents = {}
+        return documents
+
+    def _str(self) -> Any:
+        # Like object.__str__
+        return self._repr()
+
+    def __repr__(self):
+        return run(self._repr())
+
+    def _repr(self) -> Any:
+        return object.__repr__(self)
+
+    def validate(self, *args, **kwargs) -> list:
+        if args or kwargs:
+            return run(self._validate(*args, **kwargs))
+        # Cached like the documents, and copied as callers can add errors
+        return list(run(self._document("_validate")))
+
+
+def _equal(node: _Node, other: Any) -> bool:
+    """
+    Compare two nodes on their keys, with an explicit stack of the values left
+    to compare.
+    """
+    stack = [(node, other)]
+    while stack:
+        value, other = stack.pop()
+        if value is other:
+            continue
+        if isinstance(value, _Node):
+            if not value._same_type(other):
+                return False
+            # Different cached hashes tell the nodes apart without walking them
+            value_hash = getattr(value, "_hash", None)
+            other_hash = getattr(other, "_hash", None)
+            if value_hash is not None and other_hash is not None:
+                if value_hash != other_hash:
+                    return False
+            key, other_key = value._key(), other._key()
+            if len(key) != len(other_key):
+                return False
+            stack.extend(zip(key, other_key))
+        elif isinstance(other, _Node):
+            return False
+        elif type(value) in (list, tuple):
+            if type(value) is not type(other) or len(value) != len(other):
+                return False
+            stack.extend(zip(value, other))
+        elif not value == other:
+            return False
+    return True
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_hashable, value))
+    return value
+
+
+def _structural_hash(node: _Node) -> int:
+    """
+    Hash of a node, computed after the hashes of the nodes below it, so that
+    hashing a deep tree does not recurse.
+    """
+    # Nodes without a cached hash, each one before the nodes below it
+    unhashed = []
+    stack: List[Any] = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, _Node):
+            if not hasattr(item, "_hash"):
+                unhashed.append(item)
+                stack.extend(item._key())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    for item in reversed(unhashed):
+        key = item._key()
+        # The type is left out, as an Addition equals an ArithmaticOperator
+        try:
+            item._hash = hash(key)
+        except TypeError:
+            # Lists compared as they are, like the indices of an Index
+            item._hash = hash(_hashable(key))
+    return node._hash
+
+
+_CACHES = ("_hash", "_documents")
+
+
+def replace_field(node: _Node, name: str, value: Any) -> None:
+    """
+    Replace a field of a built node by an equal value, like a shared node or
+    an interned string. The caches of the node and of the nodes above it stay
+    valid, as the value is equal to the one it replaces.
+    """
+    object.__setattr__(node, name, value)
+
+
+# Fields of each node class, for the default _Node._key
+_NODE_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+def node_fields(cls: type) -> Tuple[str, ...]:
+    """
+    Attributes of a node class, from the slots of the class and its bases,
+    except the cached hash and documents and those hidden by a property, like
+    the value of Parenthesis.
+    """
+    return tuple(
+        name
+        for base in cls.__mro__[::-1]
+        for name in vars(base).get("__slots__", ())
+        if name not in _CACHES and getattr(cls, name) is vars(base)[name]
+    )
+
+
+class SelectStatement(_Node):
+    __slots__ = (
+        "expressions",
+        "select_all",
+        "select_distinct",
+        "select_distinct_on",
+        "from_statement",
+        "where_clause",
+        "group_by_clause",
+        "having_clause",
+        "order_by_clause",
+        "limit_clause",
+        "offset_clause",
+        "semi_colon",
+    )
+    _child_fields = (
+        "expressions",
+        "select_distinct_on",
+        "from_statement",
+        "where_clause",
+        "group_by_clause",
+        "having_clause",
+        "order_by_clause",
+        "limit_clause",
+        "offset_clause",
+    )
+
     def __init__(
         self,
         expressions,
@@ -50,28 +513,21 @@ class SelectStatement:
         self.offset_clause = offset_clause
         self.semi_colon = semi_colon
 
-    def transform(self, is_subquery=False):
-        statement_str = "SELECT"
+    def _transform(self, is_subquery=False):
+        parts = ["SELECT"]
         if self.select_all:
-            statement_str += " ALL"
+            parts.append(" ALL")
         elif self.select_distinct:
-            statement_str += " DISTINCT"
+            parts.append(" DISTINCT")
             if self.select_distinct_on:
-                statement_str += " ON ({})".format(
-                    ", ".join(map(str, self.select_distinct_on))
-                )
+                distinct_on = yield each(map(_stringified, self.select_distinct_on))
+                parts += [" ON (", layout.join(", ", distinct_on), ")"]
 
+        expressions = yield each(map(_transformed, self.expressions))
         if len(self.expressions) == 1:
-            statement_str += " {}".format(transform(self.expressions[0]))
+            parts += [" ", expressions[0]]
         else:
-            statement_str += "\n {}".format(
-                ",\n ".join(
-                    map(
-                        lambda s: s.replace("\n", "\n "),
-                        map(transform, self.expressions),
-                    )
-                )
-            )
+            parts += ["\n ", layout.join(",\n ", map(layout.indented, expressions))]
 
         if self.from_statement:
             if isinstance(self.from_statement, Alias):
@@ -83,72 +539,92 @@ class SelectStatement:
 
             if isinstance(from_statement, Parenthesis):
                 if isinstance(from_statement.args[0], SelectStatement):
-                    inner_from_str = from_statement.args[0].transform(is_subquery=True)
-                else:
-                    inner_from_str = " " + transform(from_statement.args[0]).replace(
-                        "\n", "\n "
+                    inner_from_str = yield from_statement.args[0]._document(
+                        "_transform", is_subquery=True
                     )
-                from_str = f"(\n{inner_from_str}\n)"
+                else:
+                    inner_from_str = yield _transformed(from_statement.args[0])
+                    inner_from_str = layout.concat(" ", layout.indented(inner_from_str))
+                from_str = layout.concat("(\n", inner_from_str, "\n)")
             else:
-                from_str = transform(from_statement)
+                from_str = yield _transformed(from_statement)
 
             if alias:
-                from_str = alias.transform(from_str)
-            statement_str += "\nFROM {}".format(from_str)
+                from_str = yield alias._transform(from_str)
+            parts += ["\nFROM ", from_str]
 
         if self.where_clause:
-            statement_str += "\nWHERE{}".format(transform(self.where_clause))
+            where_str = yield _transformed(self.where_clause)
+            parts += ["\nWHERE", where_str]
 
         if self.group_by_clause:
-            statement_str += "\nGROUP {}BY{}".format(
-                "EACH " if self.group_by_clause.group_each_by else "",
-                transform(self.group_by_clause),
-            )
+            group_by_str = yield _transformed(self.group_by_clause)
+            parts += [
+                "\nGROUP {}BY".format(
+                    "EACH " if self.group_by_clause.group_each_by else ""
+                ),
+                group_by_str,
+            ]
 
         if self.having_clause:
-            statement_str += "\nHAVING{}".format(transform(self.having_clause))
+            having_str = yield _transformed(self.having_clause)
+            parts += ["\nHAVING", having_str]
 
         if self.order_by_clause:
-            statement_str += "\nORDER BY{}".format(transform(self.order_by_clause))
+            order_by_str = yield _transformed(self.order_by_clause)
+            parts += ["\nORDER BY", order_by_str]
 
         if self.limit_clause:
-            statement_str += "\nLIMIT {}".format(transform(self.limit_clause))
+            limit_str = yield _transformed(self.limit_clause)
+            parts += ["\nLIMIT ", limit_str]
 
         if self.offset_clause:
-            statement_str += "\nOFFSET {}".format(transform(self.offset_clause))
+            offset_str = yield _transformed(self.offset_clause)
+            parts += ["\nOFFSET ", offset_str]
 
         if is_subquery:
-            statement_str = " " + statement_str.replace("\n", "\n ")
-        elif self.semi_colon:
-            statement_str += ";"
-        return statement_str
+            return layout.concat(" ", layout.indented(layout.concat(*parts)))
+        if self.semi_colon:
+            parts.append(";")
+        return layout.concat(*parts)
 
-    def validate(self, known_fields: Optional[Set[_FieldInfo]] = None) -> list:
+    def _validate(self, known_fields: Optional[AbstractSet[_FieldInfo]] = None):
         errors = []
-        known_fields = known_fields or set()
-        if hasattr(self.from_statement, "known_fields"):
-            known_fields = known_fields | self.from_statement.known_fields
+        from_known_fields = yield _known_fields(self.from_statement)
+        if from_known_fields is not None and known_fields:
+            known_fields = _KnownFields(known_fields | from_known_fields)
+        elif from_known_fields is not None:
+            known_fields = from_known_fields
+        else:
+            known_fields = _indexed(known_fields)
 
         for e in self.expressions:
-            errors += e.validate(known_fields)
+            errors += yield e._validate(known_fields)
         if self.from_statement:
-            errors += self.from_statement.validate(known_fields=set())
+            errors += yield self.from_statement._validate(known_fields=set())
         if self.where_clause:
-            errors += self.where_clause.validate(known_fields)
+            errors += yield self.where_clause._validate(known_fields)
         if self.group_by_clause:
-            errors += self.group_by_clause.validate(known_fields, self.expressions)
+            errors += yield self.group_by_clause._validate(
+                known_fields, self.expressions
+            )
         if self.having_clause:
-            errors += self.having_clause.validate(known_fields)
+            errors += yield self.having_clause._validate(known_fields)
         if self.order_by_clause:
-            errors += self.order_by_clause.validate(known_fields, self.expressions)
+            errors += yield self.order_by_clause._validate(
+                known_fields, self.expressions
+            )
         if self.limit_clause:
-            errors += self.limit_clause.validate(known_fields)
+            errors += yield self.limit_clause._validate(known_fields)
         if self.offset_clause:
-            errors += self.offset_clause.validate(known_fields)
+            errors += yield self.offset_clause._validate(known_fields)
         return errors
 
     @property
-    def known_fields(self) -> Set[_FieldInfo]:
+    def known_fields(self) -> AbstractSet[_FieldInfo]:
+        return run(self._document("_known_fields"))
+
+    def _known_fields(self):
         fields = set()
         for e in self.expressions:
             if isinstance(e, Column):
@@ -163,63 +639,24 @@ class SelectStatement:
             if isinstance(self.from_statement, Parenthesis) and isinstance(
                 self.from_statement.args[0], SelectStatement
             ):
-                subquery_known_fields = self.from_statement.args[0].known_fields
-                if any(f.name == "*" for f in fields) and not any(
-                    f.name == "*" for f in subquery_known_fields
+                subquery_known_fields = yield self.from_statement.args[0]._document(
+                    "_known_fields"
+                )
+                if (
+                    any(f.name == "*" for f in fields)
+                    and not subquery_known_fields.has_wildcard
                 ):
                     fields = {f for f in fields if f.name != "*"}
                     fields |= subquery_known_fields
 
-        return fields
+        return _KnownFields(fields)
 
-    def __eq__(self, other):
+    def _key(self):
         return (
-            type(self) == type(other)
-            and self.select_all == other.select_all
-            and self.select_distinct == other.select_distinct
-            and (
-                (self.select_distinct_on is None and other.select_distinct_on is None)
-                or (
-                    len(self.select_distinct_on) == len(other.select_distinct_on)
-                    and all(
-                        a == o
-                        for a, o in zip(
-                            self.select_distinct_on, other.select_distinct_on
-                        )
-                    )
-                )
-            )
-            and self.from_statement == other.from_statement
-            and len(self.expressions) == len(other.expressions)
-            and all(a == o for a, o in zip(self.expressions, other.expressions))
-            and self.where_clause == other.where_clause
-            and self.group_by_clause == other.group_by_clause
-            and self.having_clause == other.having_clause
-            and self.order_by_clause == other.order_by_clause
-            and self.limit_clause == other.limit_clause
-            and self.offset_clause == other.offset_clause
-            and self.semi_colon == other.semi_colon
-        )
-
-    def __repr__(self):
-        return """<{}:
-  Expressions: {!r}
-  Select All: {!r} - Select Distinct: {!r} - Select Distinct On: {!r}
-  From: {!r}
-  Where: {!r}
-  Group By: {!r}
-  Having: {!r}
-  Order By: {!r}
-  Limit: {!r}
-  Offset: {!r}
-  Semi Colon: {!r}
->
-        """.format(
-            self.__class__.__name__,
-            self.expressions,
+            tuple(self.expressions),
             self.select_all,
             self.select_distinct,
-            self.select_distinct_on,
+            None if self.select_distinct_on is None else tuple(self.select_distinct_on),
             self.from_statement,
             self.where_clause,
             self.group_by_clause,
@@ -230,46 +667,86 @@ class SelectStatement:
             self.semi_colon,
         )
 
+    def _repr(self):
+        return """<{}:
+  Expressions: {}
+  Select All: {!r} - Select Distinct: {!r} - Select Distinct On: {}
+  From: {}
+  Where: {}
+  Group By: {}
+  Having: {}
+  Order By: {}
+  Limit: {}
+  Offset: {}
+  Semi Colon: {!r}
+>
+        """.format(
+            self.__class__.__name__,
+            (yield _represented(self.expressions)),
+            self.select_all,
+            self.select_distinct,
+            (yield _represented(self.select_distinct_on)),
+            (yield _represented(self.from_statement)),
+            (yield _represented(self.where_clause)),
+            (yield _represented(self.group_by_clause)),
+            (yield _represented(self.having_clause)),
+            (yield _represented(self.order_by_clause)),
+            (yield _represented(self.limit_clause)),
+            (yield _represented(self.offset_clause)),
+            self.semi_colon,
+        )
+
+
+class Expression(_Node):
+    __slots__ = ("value",)
+    _child_fields: Tuple[str, ...] = ("value",)
 
-class Expression:
     def __init__(self, value):
         self.value = value
 
-    def __str__(self):
-        return str(self.value)
+    def _str(self):
+        return (yield _stringified(self.value))
 
-    def __repr__(self):
-        return "<{}: {!r}>".format(self.__class__.__name__, self.value)
+    def _repr(self):
+        value = yield _represented(self.value)
+        return "<{}: {}>".format(self.__class__.__name__, value)
 
-    def __eq__(self, other):
-        return type(self) == type(other) and self.value == other.value
+    def _key(self):
+        return (self.value,)
 
-    def validate(self, known_fields: Set[_FieldInfo]) -> list:
+    def _validate(self, known_fields: AbstractSet[_FieldInfo]):
         return []
 
     @property
     def return_type(self):
         return object
 
-    def resolve_return_type(self, known_fields):
-        matching_fields = [f for f in known_fields if f.name == transform(self)]
-        if matching_fields:
-            return matching_fields[0].type
+    def _return_type(self):
+        # Generator of return_type, for the nodes taking it from another node
         return self.return_type
 
+    def resolve_return_type(self, known_fields):
+        """
+        Type of the known field named like the expression, or its return
+        type. Both the name and the return type are cached by the node.
+        """
+        name = _field_name(self)
+        if name is not None:
+            matching_fields = _indexed(known_fields).named(name)
+            if matching_fields:
+                return matching_fields[0].type
+        return run(_typed(self))
+
 
 class WhereClause(Expression):
-    def transform(self):
-        transformed_value = transform(self.value)
-        if isinstance(self.value, Parenthesis) and "\n" in transformed_value:
-            return " (\n " + transform(self.value.args[0]).replace("\n", "\n ") + "\n)"
-        if "\n" in transformed_value:
-            return "\n " + transformed_value.replace("\n", "\n ")
-        return " " + transformed_value
-
-    def validate(self, known_fields: Set[_FieldInfo]) -> list:
-        errors = super().validate(known_fields)
-        errors += self.value.validate(known_fields)
+    __slots__ = ()
+
+    def _transform(self):
+        return _condition_clause(self.value)
+
+    def _validate(self, known_fields: AbstractSet[_FieldInfo]):
+        errors = yield super()._validate(known_fields)
+        errors += yield self.value._validate(known_fields)
         value_type = self.value.resolve_return_type(known_fields)
         if value_type not in (bool, object):
             errors.append(
@@ -279,43 +756,45 @@ class WhereClause(Expression):
             )
         return errors
 
-    def __eq__(self, other):
-        return type(self) == type(other) and self.value == other.value
-
 
 class GroupByClause(Expression):
-    def __init__(self, *args, rollup=False):
+    __slots__ = ("args", "rollup", "group_each_by")
+    _child_fields = ("args",)
+
+    def __init__(self, *args, rollup=False, group_each_by=False):
         self.args = args
         self.rollup = rollup
-        self.group_each_by = False
+        self.group_each_by = group_each_by
 
-    def __str__(self):
+    def _str(self):
         if len(self.args) > 1:
-            group_by_str = "\n{}".format(",\n".join(map(str, self.args))).replace(
-                "\n", "\n "
+            args = yield each(map(_stringified, self.args))
+            group_by_str = layout.indented(
+                layout.concat("\n", layout.join(",\n", args))
             )
         else:
-            group_by_str = " " + transform(self.args[0])
+            group_by_str = layout.concat(" ", (yield _transformed(self.args[0])))
         if self.rollup:
-            group_by_str = " ROLLUP{}".format(group_by_str)
+            group_by_str = layout.concat(" ROLLUP", group_by_str)
         return group_by_str
 
-    def __repr__(self):
-        return "<GroupByClause: {} - rollup={}>".format(
-            ", ".join(map(repr, self.args)), self.rollup
-        )
-
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and len(self.args) == len(other.args)
-            and all(a == o for a, o in zip(self.args, other.args))
-            and self.rollup == other.rollup
-            and self.group_each_by == other.group_each_by
-        )
-
-    def validate(self, known_fields, select_expressions):
-        errors = super().validate(known_fields)
+    def _repr(self):
+        args = yield each(map(_represented, self.args))
+        return "<GroupByClause: {} - rollup={}>".format(", ".join(args), self.rollup)
+
+    def _key(self):
+        return (tuple(self.args), self.rollup, self.group_each_by)
+
+    def _validate(self, known_fields, select_expressions):
+        errors = yield super()._validate(known_fields)
+        known_fields = _indexed(known_fields)
+        # Only the aliases given as strings can be equal to the name of a
+        # column or the value of a string
+        aliases = {
+            e.alias
+            for e in select_expressions
+            if isinstance(e, Alias) and isinstance(e.alias, str)
+        }
         for arg in self.args:
             while isinstance(arg, Parenthesis):
                 arg = arg.args[0]
@@ -327,16 +806,11 @@ class GroupByClause(Expression):
                 )
             elif (
                 isinstance(arg, (Column, String))
-                and (
-                    not any(f.name == arg.value for f in known_fields)
-                    and arg.value
-                    not in [e.alias for e in select_expressions if isinstance(e, Alias)]
-                )
-                and not any(f.name == "*" for f in known_fields)
+                and not known_fields.named(arg.value)
+                and arg.value not in aliases
+                and not known_fields.has_wildcard
             ):
-                fields_without_alias = [
-                    f for f in known_fields if f.name.split(".", 1)[-1] == arg.value
-                ]
+                fields_without_alias = known_fields.with_suffix(arg.value)
                 if len(fields_without_alias) > 1:
                     errors.append('column "{}" is ambiguous'.format(self.value))
                 elif len(fields_without_alias) == 0:
@@ -346,17 +820,14 @@ class GroupByClause(Expression):
 
 
 class HavingClause(Expression):
-    def __str__(self):
-        transformed_value = transform(self.value)
-        if isinstance(self.value, Parenthesis) and "\n" in transformed_value:
-            return " (\n " + transform(self.value.args[0]).replace("\n", "\n ") + "\n)"
-        if "\n" in transformed_value:
-            return "\n " + transformed_value.replace("\n", "\n ")
-        return " " + transformed_value
-
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
-        errors += self.value.validate(known_fields)
+    __slots__ = ()
+
+    def _str(self):
+        return _condition_clause(self.value)
+
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
+        errors += yield self.value._validate(known_fields)
         value_type = self.value.resolve_return_type(known_fields)
         if value_type not in (bool, object):
             errors.append(
@@ -368,67 +839,66 @@ class HavingClause(Expression):
 
 
 class OrderByClause(Expression):
+    __slots__ = ("args",)
+    _child_fields = ("args",)
+
     def __init__(self, *args):
         self.args = args
 
-    def transform(self, allow_linebreak=True):
+    def _transform(self, allow_linebreak=True):
         if len(self.args) > 1:
+            args = yield each(map(_stringified, self.args))
             if allow_linebreak:
-                order_by_str = "\n" + ",\n".join(map(str, self.args))
-                order_by_str = order_by_str.replace("\n", "\n ")
+                order_by_str = layout.indented(
+                    layout.concat("\n", layout.join(",\n", args))
+                )
             else:
-                order_by_str = " " + ", ".join(map(str, self.args))
+                order_by_str = layout.concat(" ", layout.join(", ", args))
         else:
-            order_by_str = " " + transform(self.args[0])
+            order_by_str = layout.concat(" ", (yield _transformed(self.args[0])))
         return order_by_str
 
-    def __repr__(self):
-        return "<OrderByClause: {}>".format(
-            ", ".join(map(repr, self.args)),
-        )
+    def _repr(self):
+        args = yield each(map(_represented, self.args))
+        return "<OrderByClause: {}>".format(", ".join(args))
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and len(self.args) == len(other.args)
-            and all(a == o for a, o in zip(self.args, other.args))
-        )
+    def _key(self):
+        return (tuple(self.args),)
 
-    def validate(self, known_fields, select_expressions):
-        errors = super().validate(known_fields)
+    def _validate(self, known_fields, select_expressions):
+        errors = yield super()._validate(known_fields)
         for arg in self.args:
-            errors += arg.validate(known_fields, select_expressions)
+            errors += yield arg._validate(known_fields, select_expressions)
         return errors
 
 
 class OrderByItem(Expression):
+    __slots__ = ("has_asc", "has_desc")
+
     def __init__(self, expression, has_asc=False, has_desc=False):
         super().__init__(expression)
         self.has_asc = has_asc
         self.has_desc = has_desc
 
-    def __str__(self):
-        order_by_item_str = str(self.value)
+    def _str(self):
+        order_by_item_str = yield _stringified(self.value)
         if self.has_asc:
-            order_by_item_str += " ASC"
+            order_by_item_str = layout.concat(order_by_item_str, " ASC")
         elif self.has_desc:
-            order_by_item_str += " DESC"
+            order_by_item_str = layout.concat(order_by_item_str, " DESC")
         return order_by_item_str
 
-    def __repr__(self):
+    def _repr(self):
+        value = yield _represented(self.value)
         return "<OrderByItem: {} has_asc={} has_desc={}>".format(
-            repr(self.value), self.has_asc, self.has_desc
+            value, self.has_asc, self.has_desc
         )
 
-    def __eq__(self, other):
-        return (
-            super().__eq__(other)
-            and self.has_asc == other.has_asc
-            and self.has_desc == other.has_desc
-        )
+    def _key(self):
+        return (self.value, self.has_asc, self.has_desc)
 
-    def validate(self, known_fields, select_expressions):
-        errors = super().validate(known_fields)
+    def _validate(self, known_fields, select_expressions):
+        errors = yield super()._validate(known_fields)
         value = self.value
         while isinstance(value, Parenthesis):
             value = value.value
@@ -439,30 +909,33 @@ class OrderByItem(Expression):
                     "ORDER BY position {} is not in select list".format(value.value)
                 )
         else:
-            errors += self.value.validate(known_fields)
+            errors += yield self.value._validate(known_fields)
         return errors
 
 
 class LimitClause(Expression):
+    __slots__ = ("limit_all",)
+
     def __init__(self, limit_all, expression):
         super().__init__(expression)
         self.limit_all = limit_all
 
-    def __str__(self):
+    def _str(self):
         if self.limit_all:
             limit_str = "ALL"
         else:
-            limit_str = str(self.value)
+            limit_str = yield _stringified(self.value)
         return limit_str
 
-    def __repr__(self):
-        return "<LimitClause: {} limit_all={}>".format(repr(self.value), self.limit_all)
+    def _repr(self):
+        value = yield _represented(self.value)
+        return "<LimitClause: {} limit_all={}>".format(value, self.limit_all)
 
-    def __eq__(self, other):
-        return super().__eq__(other) and self.limit_all == other.limit_all
+    def _key(self):
+        return (self.value, self.limit_all)
 
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
         value = self.value
         while isinstance(value, Parenthesis):
             value = value.value
@@ -475,8 +948,10 @@ class LimitClause(Expression):
 
 
 class OffsetClause(Expression):
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
+    __slots__ = ()
+
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
         value = self.value
         while isinstance(value, Parenthesis):
             value = value.value
@@ -489,117 +964,122 @@ class OffsetClause(Expression):
 
 
 class WithQuery(Expression):
+    __slots__ = ("name", "statement")
+    _child_fields = ("statement",)
+
     def __init__(self, name: str, statement: SelectStatement):
         self.name = name
         # todo: column name, for recursivity
         self.statement = statement
 
-    def __str__(self):
-        return "{} AS (\n{}\n)".format(
-            self.name, self.statement.transform(is_subquery=True)
-        )
+    def _str(self):
+        statement = yield self.statement._document("_transform", is_subquery=True)
+        return layout.concat("{} AS (\n".format(self.name), statement, "\n)")
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and self.name == other.name
-            and self.statement == other.statement
-        )
+    def _key(self):
+        return (self.name, self.statement)
 
 
 class WithStatement(Expression):
+    __slots__ = ("with_queries", "select_statement")
+    _child_fields = ("with_queries", "select_statement")
+
     def __init__(self, with_queries: List[WithQuery], select_statement):
         # todo: recursive
         self.with_queries = with_queries
         self.select_statement = select_statement
 
-    def transform(self):
-        return "WITH {}\n{}".format(
-            ",\n".join(map(transform, self.with_queries)),
-            transform(self.select_statement),
+    def _transform(self):
+        with_queries = yield each(map(_transformed, self.with_queries))
+        select_statement = yield _transformed(self.select_statement)
+        return layout.concat(
+            "WITH ", layout.join(",\n", with_queries), "\n", select_statement
         )
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and len(self.with_queries) == len(other.with_queries)
-            and all(a == o for a, o in zip(self.with_queries, other.with_queries))
-            and self.select_statement == other.select_statement
-        )
+    def _key(self):
+        return (tuple(self.with_queries), self.select_statement)
 
 
 class FunctionCall(Expression):
+    __slots__ = ("function_name", "args")
+    _child_fields: Tuple[str, ...] = ("args",)
+
     def __init__(self, function_name, *args):
         self.function_name = function_name
         self.args = args
 
-    def __str__(self):
-        transformed_args = [transform(arg) for arg in self.args]
+    def _str(self):
+        transformed_args = yield each(map(_transformed, self.args))
+        joined_args = layout.join(", ", transformed_args)
         with_newlines = (
-            any("\n" in arg for arg in transformed_args)
-            or len(", ".join(transformed_args)) > DEFAULT_LINE_LENGTH
+            any(map(layout.is_multiline, transformed_args))
+            or layout.width(joined_args) > DEFAULT_LINE_LENGTH
         )
 
         function_str = self.function_name.upper() + "("
         if with_newlines:
-            function_str += "\n "
-            function_str += (
-                ",\n ".join(arg.replace("\n", "\n ") for arg in transformed_args)
-                + "\n)"
+            return layout.concat(
+                function_str + "\n ",
+                layout.join(",\n ", map(layout.indented, transformed_args)),
+                "\n)",
             )
-        else:
-            function_str += ", ".join(transformed_args) + ")"
-        return function_str
+        return layout.concat(function_str, joined_args, ")")
 
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
         for a in self.args:
-            errors += a.validate(known_fields)
+            errors += yield a._validate(known_fields)
         return errors
 
-    def __repr__(self):
-        return "<FunctionCall {} - {}>".format(
-            self.function_name, ", ".join(map(repr, self.args))
-        )
+    def _repr(self):
+        args = yield each(map(_represented, self.args))
+        return "<FunctionCall {} - {}>".format(self.function_name, ", ".join(args))
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and self.function_name == other.function_name
-            and len(self.args) == len(other.args)
-            and all(a == o for a, o in zip(self.args, other.args))
-        )
+    def _key(self):
+        return (self.function_name, tuple(self.args))
 
 
 class CastFunctionCall(FunctionCall):
+    __slots__ = ()
+
     def __init__(self, column, cast_type):
         super().__init__("cast", column, "AS", cast_type)
 
-    def __str__(self):
-        return "{}({} AS {})".format(
-            self.function_name.upper(),
-            transform(self.args[0]),
-            transform(self.args[2]),
+    def _str(self):
+        return layout.concat(
+            self.function_name.upper() + "(",
+            (yield _transformed(self.args[0])),
+            " AS ",
+            (yield _transformed(self.args[2])),
+            ")",
         )
 
 
 class CountFunctionCall(FunctionCall):
+    __slots__ = ("distinct",)
+
     def __init__(self, *args, distinct=False):
         super().__init__("count", *args)
         self.distinct = distinct
 
-    def __str__(self):
-        return "{}({}{})".format(
-            self.function_name.upper(),
-            "DISTINCT " if self.distinct else "",
-            ", ".join(map(transform, self.args)),
+    def _str(self):
+        args = yield each(map(_transformed, self.args))
+        return layout.concat(
+            "{}({}".format(
+                self.function_name.upper(), "DISTINCT " if self.distinct else ""
+            ),
+            layout.join(", ", args),
+            ")",
         )
 
-    def __eq__(self, other):
-        return super().__eq__(other) and self.distinct == other.distinct
+    def _key(self):
+        return super()._key() + (self.distinct,)
 
 
 class ArrayAggFunctionCall(FunctionCall):
+    __slots__ = ("distinct", "ignore_nulls", "respect_nulls", "order_bys", "limit")
+    _child_fields = ("args", "order_bys")
+
     def __init__(
         self,
         column,
@@ -617,133 +1097,132 @@ class ArrayAggFunctionCall(FunctionCall):
         self.order_bys = order_bys
         self.limit = limit
 
-    def __str__(self):
-        array_agg_str = "{}(".format(self.function_name.upper())
+    def _str(self):
+        parts = ["{}(".format(self.function_name.upper())]
         if self.distinct:
-            array_agg_str += "DISTINCT "
+            parts.append("DISTINCT ")
 
-        array_agg_str += transform(self.args[0])
+        parts.append((yield _transformed(self.args[0])))
 
         if self.ignore_nulls:
-            array_agg_str += " IGNORE NULLS"
+            parts.append(" IGNORE NULLS")
         elif self.respect_nulls:
-            array_agg_str += " RESPECT NULLS"
+            parts.append(" RESPECT NULLS")
 
         if self.order_bys:
-            array_agg_str += " ORDER BY{}".format(
-                self.order_bys.transform(allow_linebreak=False)
+            order_bys = yield self.order_bys._document(
+                "_transform", allow_linebreak=False
             )
+            parts += [" ORDER BY", order_bys]
 
         if self.limit:
-            array_agg_str += " LIMIT {}".format(self.limit)
+            parts.append(" LIMIT {}".format(self.limit))
 
-        return array_agg_str + ")"
+        parts.append(")")
+        return layout.concat(*parts)
 
 
 class FilteredFunctionCall(Expression):
+    __slots__ = ("function_call", "filter_condition")
+    _child_fields = ("function_call", "filter_condition")
+
     def __init__(self, function_call: FunctionCall, filter_condition):
         self.function_call = function_call
         self.filter_condition = filter_condition
 
-    def __str__(self):
-        return "{} FILTER (WHERE {})".format(
-            transform(self.function_call), transform(self.filter_condition)
+    def _str(self):
+        return layout.concat(
+            (yield _transformed(self.function_call)),
+            " FILTER (WHERE ",
+            (yield _transformed(self.filter_condition)),
+            ")",
         )
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and self.function_call == other.function_call
-            and self.filter_condition == other.filter_condition
-        )
+    def _key(self):
+        return (self.function_call, self.filter_condition)
 
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
-        errors += self.function_call.validate(known_fields)
-        errors += self.filter_condition.validate(known_fields)
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
+        errors += yield self.function_call._validate(known_fields)
+        errors += yield self.filter_condition._validate(known_fields)
         return errors
 
 
 class AnalyticsClause(Expression):
+    __slots__ = ("function", "partition_by", "order_by", "frame_clause")
+    _child_fields = ("function", "partition_by", "order_by", "frame_clause")
+
     def __init__(self, function, partition_by, order_by, frame_clause):
         self.function = function
         self.partition_by = partition_by
         self.order_by = order_by
         self.frame_clause = frame_clause
 
-    def __str__(self):
-        analytics_str = "{} OVER (".format(transform(self.function))
+    def _str(self):
+        parts = [(yield _transformed(self.function)), " OVER ("]
         if self.partition_by:
-            analytics_str += "\n PARTITION BY"
+            parts.append("\n PARTITION BY")
+            partition_by = yield each(map(_transformed, self.partition_by))
             if len(self.partition_by) > 1:
-                analytics_str += "\n  " + ",\n  ".join(
-                    map(transform, self.partition_by)
-                )
+                parts += ["\n  ", layout.join(",\n  ", partition_by)]
             else:
-                analytics_str += " " + transform(self.partition_by[0])
+                parts += [" ", partition_by[0]]
         if self.order_by:
-            analytics_str += "\n ORDER BY{}".format(
-                transform(self.order_by).replace("\n", "\n ")
-            )
+            order_by = yield _transformed(self.order_by)
+            parts += ["\n ORDER BY", layout.indented(order_by)]
         if self.frame_clause:
-            if "\n" in analytics_str:
-                analytics_str += "\n "
-            analytics_str += transform(self.frame_clause)
+            if any(map(layout.is_multiline, parts)):
+                parts.append("\n ")
+            parts.append((yield _transformed(self.frame_clause)))
 
-        analytics_str += "\n)" if "\n" in analytics_str else ")"
-        return analytics_str
+        parts.append("\n)" if any(map(layout.is_multiline, parts)) else ")")
+        return layout.concat(*parts)
 
-    def __eq__(self, other):
+    def _key(self):
         return (
-            type(self) == type(other)
-            and self.function == other.function
-            and (
-                (self.partition_by is None and other.partition_by is None)
-                or (
-                    len(self.partition_by) == len(other.partition_by)
-                    and all(
-                        a == o for a, o in zip(self.partition_by, other.partition_by)
-                    )
-                )
-            )
-            and self.order_by == other.order_by
-            and self.frame_clause == other.frame_clause
+            self.function,
+            None if self.partition_by is None else tuple(self.partition_by),
+            self.order_by,
+            self.frame_clause,
         )
 
-    def __repr__(self):
+    def _repr(self):
         return """<{}:
-  Function: {!r}
-  Partition By: {!r}
-  Order By: {!r}
-  Frame Clause: {!r}
+  Function: {}
+  Partition By: {}
+  Order By: {}
+  Frame Clause: {}
 """.format(
             self.__class__.__name__,
-            self.function,
-            self.partition_by,
-            self.order_by,
-            self.frame_clause,
+            (yield _represented(self.function)),
+            (yield _represented(self.partition_by)),
+            (yield _represented(self.order_by)),
+            (yield _represented(self.frame_clause)),
         )
 
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
-        errors += self.function.validate(known_fields)
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
+        errors += yield self.function._validate(known_fields)
         if self.partition_by:
             for partition in self.partition_by:
-                errors += partition.validate(known_fields)
+                errors += yield partition._validate(known_fields)
         if self.order_by:
-            errors += self.order_by.validate(known_fields, None)
+            errors += yield self.order_by._validate(known_fields, None)
         return errors
 
 
 class WindowFrameClause(Expression):
+    __slots__ = ("rows_range", "frame")
+    _child_fields = ()
+
     def __init__(self, rows_range, frame):
         self.rows_range = rows_range
         self.frame = frame
 
-    def __str__(self):
+    def _str(self):
         return "{} {}".format(self.rows_range.upper(), self.frame.upper())
 
-    def __repr__(self):
+    def _repr(self):
         return """<{}:
   Row Range: {!r}
   Frame: {!r}
@@ -753,15 +1232,14 @@ class WindowFrameClause(Expression):
             self.frame,
         )
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and self.rows_range == other.rows_range
-            and self.frame == other.frame
-        )
+    def _key(self):
+        return (self.rows_range, self.frame)
 
 
 class Column(Expression):
+    __slots__ = ()
+    _child_fields = ()
+
     KEYWORDS = (
         "_table_suffix",
         "_partitiondate",
@@ -778,21 +1256,20 @@ class Column(Expression):
         "sunday",
     )
 
-    def __str__(self):
+    def _str(self):
         if self.value in self.KEYWORDS:
             return self.value.upper()
         return str(self.value)
 
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
+        known_fields = _indexed(known_fields)
         if (
-            not any(f.name == self.value for f in known_fields)
+            not known_fields.named(self.value)
             and self.value != "*"
-            and not any(f.name == "*" for f in known_fields)
+            and not known_fields.has_wildcard
         ):
-            fields_without_alias = [
-                f for f in known_fields if f.name.split(".", 1)[-1] == self.value
-            ]
+            fields_without_alias = known_fields.with_suffix(self.value)
             if len(fields_without_alias) > 1:
                 errors.append('column "{}" is ambiguous'.format(self.value))
             elif len(fields_without_alias) == 0:
@@ -801,47 +1278,62 @@ class Column(Expression):
 
 
 class ChainedColumns(Expression):
+    __slots__ = ("columns",)
+    _child_fields = ("columns",)
+
     def __init__(self, *args):
         self.columns = args
 
-    def __str__(self):
-        return ".".join(map(transform, self.columns))
+    def _str(self):
+        columns = yield each(map(_transformed, self.columns))
+        return layout.join(".", columns)
 
-    def __repr__(self):
-        return "<ChainedColumns: {}>".format(".".join(map(repr, self.columns)))
+    def _repr(self):
+        columns = yield each(map(_represented, self.columns))
+        return "<ChainedColumns: {}>".format(".".join(columns))
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and len(self.columns) == len(other.columns)
-            and all(a == o for a, o in zip(self.columns, other.columns))
-        )
+    def _key(self):
+        return (tuple(self.columns),)
 
     @property
     def return_type(self):
-        return self.columns[-1].return_type
+        return run(_typed(self))
+
+    def _return_type(self):
+        return (yield _typed(self.columns[-1]))
 
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
-        full_value = str(self)
-        alias = ".".join(map(transform, self.columns[:-1]))
-        last_value = self.columns[-1]
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
+        full_value = _field_name(self)
+        alias = _chained_name(self.columns[:-1])
+        known_fields = _indexed(known_fields)
         if (
-            not any(f.name == full_value for f in known_fields)
-            and not any(f.name == f"{alias}.*" for f in known_fields)
-        ) and not any(f.name == "*" for f in known_fields):
+            (full_value is None or not known_fields.named(full_value))
+            and (alias is None or not known_fields.named(f"{alias}.*"))
+            and not known_fields.has_wildcard
+        ):
+            # Only the error message is formatted, like for a.f(x)
+            if alias is None:
+                columns = yield each(map(_transformed, self.columns[:-1]))
+                alias = ".".join(map(layout.render, columns))
+            last_value = layout.render((yield _stringified(self.columns[-1])))
             errors.append(f"The column {last_value} was not found in alias {alias}")
         return errors
 
 
 class Type(Expression):
+    __slots__ = ()
+    _child_fields = ()
+
     VALUES = ("int", "float", "day", "month", "timestamp", "int64", "string", "date")
 
-    def __str__(self):
+    def _str(self):
         return self.value.upper()
 
 
 class DatePartExtraction(Expression):
+    __slots__ = ("part",)
+
     PARTS = (
         "microsecond",
         "second",
@@ -873,11 +1365,15 @@ class DatePartExtraction(Expression):
         super().__init__(date_expression)
         self.part = part
 
-    def __str__(self):
-        return "{} FROM {}".format(self.part.upper(), transform(self.value))
+    def _str(self):
+        value = yield _transformed(self.value)
+        return layout.concat(self.part.upper() + " FROM ", value)
 
 
 class String(Expression):
+    __slots__ = ("quotes", "prefix")
+    _child_fields = ()
+
     QUOTES = ("'", '"', "`")
     PREFIXES = ("r",)
 
@@ -886,12 +1382,12 @@ class String(Expression):
         self.quotes = quotes
         self.prefix = prefix
 
-    def __str__(self):
+    def _str(self):
         return "{prefix}{quotes}{value}{quotes}".format(
             quotes=self.quotes, value=self.value, prefix=self.prefix or ""
         )
 
-    def __repr__(self):
+    def _repr(self):
         return "<{}: {!r} quotes={!r} prefix={!r}>".format(
             self.__class__.__name__, self.value, self.quotes, self.prefix
         )
@@ -902,10 +1398,13 @@ class String(Expression):
 
 
 class Integer(Expression):
+    __slots__ = ()
+    _child_fields = ()
+
     def __init__(self, value):
         super().__init__(int(value))
 
-    def __str__(self):
+    def _str(self):
         return str(self.value)
 
     @property
@@ -914,10 +1413,13 @@ class Integer(Expression):
 
 
 class Float(Expression):
+    __slots__ = ()
+    _child_fields = ()
+
     def __init__(self, value):
         super().__init__(float(value))
 
-    def __str__(self):
+    def _str(self):
         return str(self.value)
 
     @property
@@ -926,12 +1428,15 @@ class Float(Expression):
 
 
 class Null(Expression):
+    __slots__ = ()
+    _child_fields = ()
+
     VALUES = ("null",)
 
     def __init__(self):
         super().__init__(None)
 
-    def __str__(self):
+    def _str(self):
         return "NULL"
 
     @property
@@ -940,6 +1445,9 @@ class Null(Expression):
 
 
 class Boolean(Expression):
+    __slots__ = ()
+    _child_fields = ()
+
     TRUE_VALUES = (
         "true",
         "yes",
@@ -959,7 +1467,7 @@ class Boolean(Expression):
             value = False
         super().__init__(value)
 
-    def __str__(self):
+    def _str(self):
         return str(self.value).upper()
 
     @property
@@ -968,151 +1476,177 @@ class Boolean(Expression):
 
 
 class Parenthesis(Expression):
+    __slots__ = ("args",)
+    _child_fields = ("args",)
+
     def __init__(self, *args):
         self.args = args
 
-    def __str__(self):
-        return "({})".format(
-            ", ".join(
-                "\n" + a.transform(is_subquery=True) + "\n"
-                if isinstance(a, SelectStatement)
-                else transform(a)
-                for a in self.args
-            )
-        )
+    def _str(self):
+        args = []
+        for a in self.args:
+            if isinstance(a, SelectStatement):
+                statement = yield a._document("_transform", is_subquery=True)
+                args.append(layout.concat("\n", statement, "\n"))
+            else:
+                args.append((yield _transformed(a)))
+        return layout.concat("(", layout.join(", ", args), ")")
 
-    def __repr__(self):
-        return "<Parenthesis: {}>".format(", ".join(map(repr, self.args)))
+    def _repr(self):
+        args = yield each(map(_represented, self.args))
+        return "<Parenthesis: {}>".format(", ".join(args))
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and len(self.args) == len(other.args)
-            and all(a == o for a, o in zip(self.args, other.args))
-        )
+    def _key(self):
+        return (tuple(self.args),)
 
     @property
     def value(self):
-        if isinstance(self.args[0], Parenthesis):
-            return self.args[0].value
-        return self.args[0]
+        value = self.args[0]
+        while isinstance(value, Parenthesis):
+            value = value.args[0]
+        return value
 
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
         for a in self.args:
-            errors += a.validate(known_fields)
+            errors += yield a._validate(known_fields)
         return errors
 
     @property
-    def known_fields(self) -> Set[_FieldInfo]:
-        if hasattr(self.args[0], "known_fields"):
-            return self.args[0].known_fields
-        return set()
+    def known_fields(self) -> AbstractSet[_FieldInfo]:
+        return run(self._document("_known_fields"))
+
+    def _known_fields(self):
+        known_fields = yield _known_fields(self.args[0])
+        if known_fields is not None:
+            return known_fields
+        return _KnownFields()
 
     @property
     def return_type(self):
+        return run(_typed(self))
+
+    def _return_type(self):
         for a in self.args:
-            return a.return_type
+            return (yield _typed(a))
 
 
 class Array(Expression):
+    __slots__ = ("args",)
+    _child_fields = ("args",)
+
     def __init__(self, *args):
         self.args = args
 
-    def __str__(self):
-        return "[{}]".format(", ".join(map(transform, self.args)))
+    def _str(self):
+        args = yield each(map(_transformed, self.args))
+        return layout.concat("[", layout.join(", ", args), "]")
 
-    def __repr__(self):
-        return "<Array: {}>".format(", ".join(map(repr, self.args)))
+    def _repr(self):
+        args = yield each(map(_represented, self.args))
+        return "<Array: {}>".format(", ".join(args))
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and len(self.args) == len(other.args)
-            and all(a == o for a, o in zip(self.args, other.args))
-        )
+    def _key(self):
+        return (tuple(self.args),)
 
 
 class Alias(Expression):
+    __slots__ = ("expression", "alias", "with_as")
+    _child_fields = ("expression", "alias")
+
     def __init__(self, expression, alias, with_as):
         self.expression = expression
         self.alias = alias
         self.with_as = with_as
 
-    def transform(self, expression=None):
-        expression = expression or self.expression
-        return "{}{}{}".format(
-            transform(expression),
+    def _transform(self, expression=None):
+        # expression: document of the expression, when already formatted
+        if expression is None:
+            expression = yield _transformed(self.expression)
+        return layout.concat(
+            expression,
             " AS " if self.with_as else " ",
-            transform(self.alias),
+            (yield _transformed(self.alias)),
         )
 
-    def __repr__(self):
-        return "<Alias: {!r} as={} {!r}>".format(
-            self.expression, self.with_as, self.alias
+    def _repr(self):
+        return "<Alias: {} as={} {}>".format(
+            (yield _represented(self.expression)),
+            self.with_as,
+            (yield _represented(self.alias)),
         )
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and self.expression == other.expression
-            and self.alias == other.alias
-        )
+    def _key(self):
+        return (self.expression, self.alias)
 
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
-        errors += self.expression.validate(known_fields)
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
+        errors += yield self.expression._validate(known_fields)
         return errors
 
     @property
     def return_type(self):
-        return self.expression.return_type
+        return run(_typed(self))
+
+    def _return_type(self):
+        return (yield _typed(self.expression))
 
     @property
-    def known_fields(self) -> Set[_FieldInfo]:
-        return {
-            _FieldInfo("{}.{}".format(transform(self.alias), f.name), f.type)
-            for f in self.expression.known_fields
-        }
+    def known_fields(self) -> AbstractSet[_FieldInfo]:
+        return run(self._document("_known_fields"))
+
+    def _known_fields(self):
+        known_fields = yield self.expression._document("_known_fields")
+        alias = layout.render((yield _transformed(self.alias)))
+        return _KnownFields(
+            _FieldInfo("{}.{}".format(alias, f.name), f.type) for f in known_fields
+        )
 
 
 class Index(Expression):
+    __slots__ = ("indices",)
+    _child_fields = ("value", "indices")
+
     def __init__(self, expression, indices):
         super().__init__(expression)
         self.indices = indices
 
-    def __str__(self):
-        return "{}[{}]".format(
-            transform(self.value), ", ".join(map(transform, self.indices))
-        )
+    def _str(self):
+        value = yield _transformed(self.value)
+        indices = yield each(map(_transformed, self.indices))
+        return layout.concat(value, "[", layout.join(", ", indices), "]")
 
-    def __repr__(self):
-        return "<Index: {!r} indices={!r}>".format(
-            self.value, ", ".join(map(repr, self.indices))
-        )
+    def _repr(self):
+        value = yield _represented(self.value)
+        indices = yield each(map(_represented, self.indices))
+        return "<Index: {} indices={!r}>".format(value, ", ".join(indices))
 
 
 class ArithmaticOperator(Expression):
+    __slots__ = ("operator", "args")
+    _child_fields = ("args",)
+
     def __init__(self, operator, *args):
         self.operator = operator
         self.args = args
 
-    def __str__(self):
+    def _str(self):
         join_str = " {} ".format(self.operator)
-        return join_str.join(map(str, self.args))
+        args = yield each(map(_stringified, self.args))
+        return layout.join(join_str, args)
 
-    def __repr__(self):
+    def _repr(self):
+        args = yield each(map(_represented, self.args))
         return "<{} {}: {}>".format(
-            self.__class__.__name__, self.operator, ", ".join(map(repr, self.args))
+            self.__class__.__name__, self.operator, ", ".join(args)
         )
 
-    def __eq__(self, other):
-        return (
-            (isinstance(other, type(self)) or isinstance(self, type(other)))
-            and self.operator == other.operator
-            and len(self.args) == len(other.args)
-            and all(a == o for a, o in zip(self.args, other.args))
-        )
+    def _same_type(self, other):
+        # An Addition is an ArithmaticOperator with the + operator
+        return isinstance(other, type(self)) or isinstance(self, type(other))
+
+    def _key(self):
+        return (self.operator, tuple(self.args))
 
     @property
     def return_type(self):
@@ -1122,11 +1656,16 @@ class ArithmaticOperator(Expression):
 
 
 class Addition(ArithmaticOperator):
+    __slots__ = ()
+
     def __init__(self, *args):
         super().__init__("+", *args)
 
 
 class BitwiseOperation(Expression):
+    __slots__ = ("predicate", "right_hand")
+    _child_fields = ("value", "right_hand")
+
     OPERATORS = ("&", "|", "^", "||", "<<", ">>", "#")
 
     def __init__(self, expression, predicate, right_hand):
@@ -1134,34 +1673,45 @@ class BitwiseOperation(Expression):
         self.predicate = predicate
         self.right_hand = right_hand
 
-    def __str__(self):
-        return "{} {} {}".format(
-            transform(self.value), self.predicate, transform(self.right_hand)
+    def _str(self):
+        return layout.concat(
+            (yield _transformed(self.value)),
+            " {} ".format(self.predicate),
+            (yield _transformed(self.right_hand)),
         )
 
-    def __repr__(self):
-        return "<BitwiseOperation: {!r} {} {!r}>".format(
-            self.value, self.predicate, self.right_hand
+    def _repr(self):
+        return "<BitwiseOperation: {} {} {}>".format(
+            (yield _represented(self.value)),
+            self.predicate,
+            (yield _represented(self.right_hand)),
         )
 
 
 class Table(Expression):
+    __slots__ = ("in_square_brackets",)
+
     def __init__(self, value, in_square_brackets=False):
         super().__init__(value)
         self.in_square_brackets = in_square_brackets
 
-    def __str__(self):
-        table_str = transform(self.value)
+    def _str(self):
+        table_str = yield _transformed(self.value)
         if self.in_square_brackets:
-            table_str = f"[{table_str}]"
+            table_str = layout.concat("[", table_str, "]")
         return table_str
 
     @property
-    def known_fields(self) -> Set[_FieldInfo]:
-        return {_FieldInfo("*", type=object)}
+    def known_fields(self) -> AbstractSet[_FieldInfo]:
+        return run(self._document("_known_fields"))
+
+    def _known_fields(self):
+        return _TABLE_FIELDS
 
 
 class Unnest(Expression):
+    __slots__ = ("with_offset", "with_offset_as", "offset_alias")
+
     def __init__(self, unnest_expression, with_offset, with_offset_as, offset_alias):
         # unnest_expression: can be functiion call or alias of function call
         super().__init__(unnest_expression)
@@ -1169,27 +1719,28 @@ class Unnest(Expression):
         self.with_offset_as = with_offset_as
         self.offset_alias = offset_alias
 
-    def __str__(self):
-        unnest_str = transform(self.value)
+    def _str(self):
+        unnest_str = yield _transformed(self.value)
         if self.with_offset:
-            unnest_str += " WITH OFFSET"
+            offset_str = " WITH OFFSET"
             if self.offset_alias:
                 if self.with_offset_as:
-                    unnest_str += " AS"
-                unnest_str += f" {self.offset_alias}"
+                    offset_str += " AS"
+                offset_str += f" {self.offset_alias}"
+            unnest_str = layout.concat(unnest_str, offset_str)
         return unnest_str
 
-    def __eq__(self, other):
-        return (
-            (isinstance(other, type(self)) or isinstance(self, type(other)))
-            and self.value == other.value
-            and self.with_offset == other.with_offset
-            and self.with_offset_as == other.with_offset_as
-            and self.offset_alias == other.offset_alias
-        )
+    def _same_type(self, other):
+        return isinstance(other, type(self)) or isinstance(self, type(other))
+
+    def _key(self):
+        return (self.value, self.with_offset, self.with_offset_as, self.offset_alias)
 
 
 class Join(Expression):
+    __slots__ = ("join_type", "left_from", "right_from", "on", "using")
+    _child_fields = ("left_from", "right_from", "on", "using")
+
     VALUES = ("join", "inner", "left", "right", "full", "cross", "outer", ",", "each")
 
     def __init__(self, join_type, left_from, right_from, on, using):
@@ -1199,7 +1750,7 @@ class Join(Expression):
         self.on = on
         self.using = using
 
-    def __str__(self):
+    def _str(self):
         right_from = self.right_from
         num_parenthesis = 0
 
@@ -1213,25 +1764,27 @@ class Join(Expression):
             num_parenthesis += 1
 
         if isinstance(right_from, SelectStatement):
-            right_element = right_from.transform(is_subquery=True)
+            right_element = yield right_from._document("_transform", is_subquery=True)
         else:
-            right_element = transform(right_from)
+            right_element = yield _transformed(right_from)
 
         if num_parenthesis:
-            right_element = "\n" + right_element
+            right_element = layout.concat("\n", right_element)
             if not isinstance(right_from, SelectStatement):
-                right_element = right_element.replace("\n", "\n ")
-            right_element = " {}{}\n{}".format(
-                "(" * num_parenthesis,
+                right_element = layout.indented(right_element)
+            right_element = layout.concat(
+                " " + "(" * num_parenthesis,
                 right_element,
-                ")" * num_parenthesis,
+                "\n" + ")" * num_parenthesis,
             )
         else:
-            right_element = " " + right_element
+            right_element = layout.concat(" ", right_element)
 
         if alias:
-            right_element = "{}{} {}".format(
-                right_element, " AS" if alias.with_as else "", alias.alias
+            right_element = layout.concat(
+                right_element,
+                " AS " if alias.with_as else " ",
+                (yield _stringified(alias.alias)),
             )
 
         left_from = self.left_from
@@ -1247,83 +1800,85 @@ class Join(Expression):
             num_parenthesis += 1
 
         if isinstance(left_from, SelectStatement):
-            left_element = left_from.transform(is_subquery=True)
+            left_element = yield left_from._document("_transform", is_subquery=True)
         else:
-            left_element = transform(left_from)
+            left_element = yield _transformed(left_from)
 
         if num_parenthesis:
-            left_element = "\n" + left_element
+            left_element = layout.concat("\n", left_element)
             if not isinstance(left_from, SelectStatement):
-                left_element = left_element.replace("\n", "\n ")
-            left_element = "{}{}\n{}".format(
+                left_element = layout.indented(left_element)
+            left_element = layout.concat(
                 "(" * num_parenthesis,
                 left_element,
-                ")" * num_parenthesis,
+                "\n" + ")" * num_parenthesis,
             )
         if alias:
-            left_element = "{}{} {}".format(
-                left_element, " AS" if alias.with_as else "", alias.alias
+            left_element = layout.concat(
+                left_element,
+                " AS " if alias.with_as else " ",
+                (yield _stringified(alias.alias)),
             )
 
         join_type_str = (
             "\n{}".format(self.join_type.upper()) if self.join_type != "," else ","
         )
-        join_str = "{}{}{}".format(
-            left_element,
-            join_type_str,
-            right_element,
-        )
+        join_str = layout.concat(left_element, join_type_str, right_element)
         if self.on:
-            join_str += "\nON{}".format(transform(self.on))
+            join_str = layout.concat(join_str, "\nON", (yield _transformed(self.on)))
         elif self.using:
-            join_str += "\nUSING{}".format(transform(self.using))
+            join_str = layout.concat(
+                join_str, "\nUSING", (yield _transformed(self.using))
+            )
         return join_str
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and self.join_type == other.join_type
-            and self.left_from == other.left_from
-            and self.right_from == other.right_from
-            and self.on == other.on
-            and self.using == other.using
-        )
+    def _key(self):
+        return (self.join_type, self.left_from, self.right_from, self.on, self.using)
 
-    def __repr__(self):
+    def _repr(self):
         return """<{}:
   Join Type: {!r}
-  Left part: {!r}
-  Right part: {!r}
-  On: {!r}
-  Using {!r}
+  Left part: {}
+  Right part: {}
+  On: {}
+  Using {}
 """.format(
             self.__class__.__name__,
             self.join_type,
-            self.left_from,
-            self.right_from,
-            self.on,
-            self.using,
+            (yield _represented(self.left_from)),
+            (yield _represented(self.right_from)),
+            (yield _represented(self.on)),
+            (yield _represented(self.using)),
         )
 
-    def validate(self, known_fields: Set[_FieldInfo]) -> list:
-        errors = super().validate(known_fields)
+    def _validate(self, known_fields: AbstractSet[_FieldInfo]):
+        errors = yield super()._validate(known_fields)
         if self.join_type not in ("CROSS JOIN", ",") and not (self.using or self.on):
             errors.append("Missing ON or USING for join")
         return errors
 
     @property
-    def known_fields(self) -> Set[_FieldInfo]:
+    def known_fields(self) -> AbstractSet[_FieldInfo]:
+        return run(self._document("_known_fields"))
+
+    def _known_fields(self):
         known_fields = set()
         if isinstance(self.left_from, Alias):
             left_alias = self.left_from.alias
-            for field in self.left_from.expression.known_fields:
+            left_known_fields = yield self.left_from.expression._document(
+                "_known_fields"
+            )
+            for field in left_known_fields:
                 known_fields.add(_FieldInfo(left_alias + "." + field.name, field.type))
         else:
-            known_fields |= self.left_from.known_fields
+            known_fields |= yield self.left_from._document("_known_fields")
 
         if isinstance(self.right_from, Alias):
             right_alias = self.right_from.alias
-            for field in self.right_from.expression.known_fields:
+            right_known_fields = yield self.right_from.expression._document(
+                "_known_fields"
+            )
+            for field in right_known_fields:
                 known_fields.add(
                     _FieldInfo(
                         right_alias + "." + field.name,
@@ -1331,12 +1886,15 @@ class Join(Expression):
                     )
                 )
         else:
-            known_fields |= self.right_from.known_fields
+            known_fields |= yield self.right_from._document("_known_fields")
 
-        return known_fields
+        return _KnownFields(known_fields)
 
 
 class CombinedQueries(Expression):
+    __slots__ = ("set_operator", "left_query", "right_query")
+    _child_fields = ("left_query", "right_query")
+
     SET_OPERATORS = ("union", "intersect", "except", "all")
 
     def __init__(self, set_operator, left_query, right_query):
@@ -1344,58 +1902,50 @@ class CombinedQueries(Expression):
         self.left_query = left_query
         self.right_query = right_query
 
-    def __str__(self):
-        left_query = transform(self.left_query)
-        right_query = transform(self.right_query)
-        if isinstance(self.right_query, Table):
-            right_query = " " + right_query
-        else:
-            right_query = "\n" + right_query
-
-        return "{}\n{}{}".format(left_query, self.set_operator.upper(), right_query)
-
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and self.set_operator == other.set_operator
-            and self.left_query == other.left_query
-            and self.right_query == other.right_query
+    def _str(self):
+        left_query = yield _transformed(self.left_query)
+        right_query = yield _transformed(self.right_query)
+        return layout.concat(
+            left_query,
+            "\n" + self.set_operator.upper(),
+            " " if isinstance(self.right_query, Table) else "\n",
+            right_query,
         )
 
-    def __repr__(self):
+    def _key(self):
+        return (self.set_operator, self.left_query, self.right_query)
+
+    def _repr(self):
         return """<{}:
   Set Operator: {!r}
-  Left query: {!r}
-  Right query: {!r}
+  Left query: {}
+  Right query: {}
 """.format(
             self.__class__.__name__,
             self.set_operator,
-            self.left_query,
-            self.right_query,
+            (yield _represented(self.left_query)),
+            (yield _represented(self.right_query)),
         )
 
 
 class OnClause(Expression):
-    def __str__(self):
-        transformed_value = transform(self.value)
-        if isinstance(self.value, Parenthesis) and "\n" in transformed_value:
-            return " (\n " + transform(self.value.args[0]).replace("\n", "\n ") + "\n)"
-        if "\n" in transformed_value:
-            return "\n " + transformed_value.replace("\n", "\n ")
-        return " " + transformed_value
+    __slots__ = ()
+
+    def _str(self):
+        return _condition_clause(self.value)
 
 
 class UsingClause(Expression):
-    def __str__(self):
-        transformed_value = transform(self.value)
-        if isinstance(self.value, Parenthesis) and "\n" in transformed_value:
-            return " (\n " + transform(self.value.args[0]).replace("\n", "\n ") + "\n)"
-        if "\n" in transformed_value:
-            return "\n " + transformed_value.replace("\n", "\n ")
-        return " " + transformed_value
+    __slots__ = ()
+
+    def _str(self):
+        return _condition_clause(self.value)
 
 
 class Condition(Expression):
+    __slots__ = ("predicate", "right_hand")
+    _child_fields = ("value", "right_hand")
+
     PREDICATES = (
         "=",
         ">",
@@ -1416,31 +1966,32 @@ class Condition(Expression):
         self.predicate = predicate
         self.right_hand = right_hand
 
-    def __str__(self):
-        return "{} {} {}".format(
-            transform(self.value), self.predicate.upper(), transform(self.right_hand)
+    def _str(self):
+        return layout.concat(
+            (yield _transformed(self.value)),
+            " {} ".format(self.predicate.upper()),
+            (yield _transformed(self.right_hand)),
         )
 
-    def __repr__(self):
-        return "<Condition: {!r} {} {!r}>".format(
-            self.value, self.predicate, self.right_hand
+    def _repr(self):
+        return "<Condition: {} {} {}>".format(
+            (yield _represented(self.value)),
+            self.predicate,
+            (yield _represented(self.right_hand)),
         )
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and self.value == other.value
-            and self.predicate == other.predicate
-            and self.right_hand == other.right_hand
-        )
+    def _key(self):
+        return (self.value, self.predicate, self.right_hand)
 
-    def validate(self, known_fields):
-        errors = super().validate(known_fields)
-        errors += self.value.validate(known_fields)
+    def _validate(self, known_fields):
+        errors = yield super()._validate(known_fields)
+        errors += yield self.value._validate(known_fields)
         if self.predicate.lower() == "between":
-            errors += self.right_hand.validate(known_fields, is_between_predicate=True)
+            errors += yield self.right_hand._validate(
+                known_fields, is_between_predicate=True
+            )
         else:
-            errors += self.right_hand.validate(known_fields)
+            errors += yield self.right_hand._validate(known_fields)
         return errors
 
     @property
@@ -1449,6 +2000,9 @@ class Condition(Expression):
 
 
 class BooleanCondition(Expression):
+    __slots__ = ("type", "args")
+    _child_fields = ("args",)
+
     PREDICATES = ("and", "or")
 
     def __init__(self, type, *args):
@@ -1456,46 +2010,46 @@ class BooleanCondition(Expression):
         self.type = type
         self.args = args
 
-    def transform(self, with_newline=False):
+    def _transform(self, with_newline=False):
         join_str = " {} ".format(self.type.upper())
-        transformed_condition = join_str.join(map(transform, self.args))
-        if len(transformed_condition) < DEFAULT_LINE_LENGTH and with_newline is False:
+        transformed_args = yield each(map(_transformed, self.args))
+        transformed_condition = layout.join(join_str, transformed_args)
+        if (
+            layout.width(transformed_condition) < DEFAULT_LINE_LENGTH
+            and with_newline is False
+        ):
             return transformed_condition
 
         join_str = "\n{} ".format(self.type.upper())
         transformed_args = []
         for a in self.args:
             if isinstance(a, BooleanCondition):
-                transformed_a = a.transform(with_newline=True)
+                transformed_a = yield a._document("_transform", with_newline=True)
             elif isinstance(a, Parenthesis):
-                transformed_a = transform(a.args[0])
-                if "\n" in transformed_a:
-                    transformed_a = "(\n " + transformed_a.replace("\n", "\n ") + "\n)"
+                transformed_a = yield _transformed(a.args[0])
+                if layout.is_multiline(transformed_a):
+                    transformed_a = layout.concat(
+                        "(\n ", layout.indented(transformed_a), "\n)"
+                    )
                 else:
-                    transformed_a = f"({transformed_a})"
+                    transformed_a = layout.concat("(", transformed_a, ")")
             else:
-                transformed_a = transform(a)
+                transformed_a = yield _transformed(a)
             transformed_args.append(transformed_a)
 
-        return join_str.join(transformed_args)
+        return layout.join(join_str, transformed_args)
 
-    def __repr__(self):
-        return "<BooleanCondition {}: {}>".format(
-            self.type, ", ".join(map(repr, self.args))
-        )
+    def _repr(self):
+        args = yield each(map(_represented, self.args))
+        return "<BooleanCondition {}: {}>".format(self.type, ", ".join(args))
 
-    def __eq__(self, other):
-        return (
-            type(self) == type(other)
-            and self.type == other.type
-            and len(self.args) == len(other.args)
-            and all(a == o for a, o in zip(self.args, other.args))
-        )
+    def _key(self):
+        return (self.type, tuple(self.args))
 
-    def validate(self, known_fields, is_between_predicate=False):
-        errors = super().validate(known_fields)
+    def _validate(self, known_fields, is_between_predicate=False):
+        errors = yield super()._validate(known_fields)
         for a in self.args:
-            errors += a.validate(known_fields)
+            errors += yield a._validate(known_fields)
             if not is_between_predicate:
                 a_type = a.resolve_return_type(known_fields)
                 if a_type not in (bool, object):
@@ -1513,16 +2067,18 @@ class BooleanCondition(Expression):
 
 
 class Negation(Expression):
+    __slots__ = ()
+
     PREDICATE = "not"
 
     def __init__(self, expression):
         super().__init__(expression)
 
-    def __str__(self):
+    def _str(self):
         negation = "NOT"
         if not isinstance(self.value, Parenthesis):
             negation += " "
-        return negation + transform(self.value)
+        return layout.concat(negation, (yield _transformed(self.value)))
 
     @property
     def return_type(self):
@@ -1530,71 +2086,93 @@ class Negation(Expression):
 
 
 class SelectAllClause(Expression):
+    __slots__ = ("args",)
+    _child_fields = ("value", "args")
+
     KEYWORD = ""
 
     def __init__(self, expression, args):
         super().__init__(expression)
         self.args = args
 
-    def __repr__(self):
-        return "<{}: {!r} args: {!r}>".format(
-            self.__class__.__name__, self.value, self.args
+    def _repr(self):
+        return "<{}: {} args: {}>".format(
+            self.__class__.__name__,
+            (yield _represented(self.value)),
+            (yield _represented(self.args)),
         )
 
-    def __str__(self):
-        except_str = "{} {} (".format(transform(self.value), self.KEYWORD)
+    def _str(self):
+        value = yield _transformed(self.value)
+        parts = [value, " {} (".format(self.KEYWORD)]
         if len(self.args) > 1:
-            except_str += "\n {}\n".format(",\n ".join(map(transform, self.args)))
-        elif except_str:
-            except_str += transform(self.args[0])
-        return except_str + ")"
+            args = yield each(map(_transformed, self.args))
+            parts += ["\n ", layout.join(",\n ", args), "\n"]
+        else:
+            parts.append((yield _transformed(self.args[0])))
+        parts.append(")")
+        return layout.concat(*parts)
 
 
 class ExceptClause(SelectAllClause):
+    __slots__ = ()
+
     KEYWORD = "EXCEPT"
 
 
 class ReplaceClause(SelectAllClause):
+    __slots__ = ()
+
     KEYWORD = "REPLACE"
 
-    def validate(self, known_fields: Set[_FieldInfo]) -> list:
-        errors = super().validate(known_fields)
+    def _validate(self, known_fields: AbstractSet[_FieldInfo]):
+        errors = yield super()._validate(known_fields)
         for arg in self.args:
-            errors += arg.alias.validate(known_fields)
+            errors += yield arg.alias._validate(known_fields)
         return errors
 
 
 class Case(Expression):
+    __slots__ = ("when_then", "else_expression")
+    _child_fields = ("value", "when_then", "else_expression")
+
     def __init__(self, expression, when_then, else_expression):
         super().__init__(expression)
         self.when_then = when_then
         self.else_expression = else_expression
 
-    def __str__(self):
-        case_str = "CASE"
+    def _str(self):
+        parts = ["CASE"]
         if self.value:
-            case_str += " {}".format(transform(self.value))
+            parts += [" ", (yield _transformed(self.value))]
 
-        case_str += "\n "
-        when_then_block_str = []
+        parts.append("\n ")
+        when_then_blocks = []
         for when, then in self.when_then:
-            when_then_str = "WHEN"
-            transformed_when = transform(when)
-            if isinstance(when, Parenthesis) and "\n" in transformed_when:
-                when_then_str += (
-                    " (\n  " + transform(when.args[0]).replace("\n", "\n  ") + "\n )\n "
-                )
-            elif "\n" in transformed_when:
-                when_then_str += "\n  " + transformed_when.replace("\n", "\n  ") + "\n "
+            transformed_when = yield _transformed(when)
+            if isinstance(when, Parenthesis) and layout.is_multiline(transformed_when):
+                transformed_when = yield _transformed(when.args[0])
+                when_parts = [
+                    "WHEN (\n  ",
+                    layout.indented(transformed_when, 2),
+                    "\n )\n ",
+                ]
+            elif layout.is_multiline(transformed_when):
+                when_parts = [
+                    "WHEN\n  ",
+                    layout.indented(transformed_when, 2),
+                    "\n ",
+                ]
             else:
-                when_then_str += " " + transformed_when + " "
+                when_parts = ["WHEN ", transformed_when, " "]
 
-            when_then_str += f"THEN {then}"
-            when_then_block_str.append(when_then_str)
+            when_parts += ["THEN ", (yield _stringified(then))]
+            when_then_blocks.append(layout.concat(*when_parts))
 
-        case_str += "\n ".join(when_then_block_str)
+        parts.append(layout.join("\n ", when_then_blocks))
 
         if self.else_expression:
-            case_str += "\n ELSE {}".format(transform(self.else_expression))
-        case_str += "\nEND"
-        return case_str
+            else_str = yield _transformed(self.else_expression)
+            parts += ["\n ELSE ", else_str]
+        parts.append("\nEND")
+        return layout.concat(*parts)
@@ -0,0 +1,66 @@
+"""
+Interning of the identifiers of syntax trees.
+
+The tokeniser slices a new string out of the query for each token, so a
+column, alias or table name repeated in a query, or across queries, is a
+separate string each time. A symbol table keeps one string of each distinct
+name, and interning a tree replaces its names by those of the table.
+
+Interned names are the same objects, which CPython compares by identity
+before comparing their characters: the lookups of columns in the fields known
+by a query, named after the same columns, succeed without reading the names.
+"""
+from typing import Any, Dict
+
+from sqlvalidator.grammar import sql
+from sqlvalidator.grammar.visitor import walk
+
+
+class SymbolTable:
+    """
+    Table of the distinct names of the trees interned with it.
+
+    Use one table per session, like a batch of related queries. The names of
+    GLOBAL_SYMBOLS are shared by the whole process and never released.
+    """
+
+    def __init__(self):
+        self._names: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def clear(self) -> None:
+        self._names.clear()
+
+    def intern(self, name: str) -> str:
+        """
+        Return the string of the table equal to the name, adding it if new.
+        """
+        return self._names.setdefault(name, name)
+
+    def intern_names(self, node: Any) -> Any:
+        """
+        Replace, in place, the column, alias, table and CTE names of the tree
+        by those of the table, and return it.
+        """
+        if not isinstance(node, sql._Node):
+            return node
+        intern = self.intern
+        replace_field = sql.replace_field
+        for item in walk(node):
+            if isinstance(item, (sql.Column, sql.Table)):
+                if isinstance(item.value, str):
+                    replace_field(item, "value", intern(item.value))
+            elif isinstance(item, sql.Alias):
+                if isinstance(item.alias, str):
+                    replace_field(item, "alias", intern(item.alias))
+            elif isinstance(item, sql.WithQuery):
+                replace_field(item, "name", intern(item.name))
+        return node
+
+
+GLOBAL_SYMBOLS = SymbolTable()
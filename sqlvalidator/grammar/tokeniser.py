@@ -1,4 +1,19 @@
-from typing import Optional
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Collection, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from sqlvalidator.grammar.keywords import (
+    CASE,
+    CLOSING_PARENTHESIS,
+    CLOSING_SQUARE_BRACKET,
+    COMMA,
+    END,
+    NOT_A_KEYWORD,
+    OPENING_PARENTHESIS,
+    OPENING_SQUARE_BRACKET,
+    classify,
+)
 
 STRING_SPLIT_TOKENS = ("'", '"', "`")
 WHITESPACE_SPLIT_TOKENS = (" ", "\n", "\t")
@@ -25,166 +40,528 @@ def lower(s: Optional[str]) -> Optional[str]:
     return s.lower() if s else s
 
 
-def get_tokens_until_closing_parenthesis(tokens, first_token=None):
-    argument_tokens = []
-    next_token = first_token or next(tokens, None)
-    count_parenthesis = 0
-    while next_token is not None and not (next_token == ")" and count_parenthesis == 0):
-        argument_tokens.append(next_token)
-        if next_token == "(":
-            count_parenthesis += 1
-        elif next_token == ")":
-            count_parenthesis -= 1
-        next_token = next(tokens, None)
-
-    return argument_tokens
-
-
-def get_tokens_until_one_of(tokens, stop_words, first_token=None, keep=None):
-    argument_tokens = [first_token] if first_token is not None else []
-    keep = keep or []
-
-    next_token = next(tokens, None)
-    count_parenthesis = 0 if first_token != "(" else 1
-    count_square_brackets = 0 if first_token != "[" else 1
-    count_case_expr = 0 if first_token != "case" else 1
-    while next_token is not None and not (
-        lower(next_token) in stop_words
-        and count_parenthesis <= 0
-        and count_square_brackets <= 0
-        and count_case_expr <= 0
-        and (
-            not argument_tokens
-            or (lower(argument_tokens[-1]), lower(next_token)) not in keep
-        )
-    ):
-        argument_tokens.append(next_token)
-        if next_token == "(":
-            count_parenthesis += 1
-        elif next_token == ")":
-            count_parenthesis -= 1
-        elif next_token == "[":
-            count_square_brackets += 1
-        elif next_token == "]":
-            count_square_brackets -= 1
-        elif lower(next_token) == "case":
-            count_case_expr += 1
-        elif lower(next_token) == "end":
-            count_case_expr -= 1
-        next_token = next(tokens, None)
-
-    return argument_tokens, next_token
-
-
-def get_tokens_until_not_in(tokens, kept_words, first_token=None):
-    argument_tokens = [first_token] if first_token is not None else []
-    next_token = next(tokens, None)
-    while next_token is not None and lower(next_token) in kept_words:
-        argument_tokens.append(next_token)
-        next_token = next(tokens, None)
-
-    return argument_tokens, next_token
-
-
-def split_with_sep(s: str, sep: str):
-    splitted = split_with_escaping(s, sep)
-    for word in splitted[:-1]:
-        if word:
-            yield word
-        yield sep
-    if splitted[-1]:
-        yield splitted[-1]
-
-
-def split_with_escaping(s: str, sep: str):
-    splitted = []
-    split_iterator = iter(s.split(sep))
-    value = next(split_iterator, None)
-    while value is not None:
-        # Glue values together if defined
-        if value.endswith("\\"):
-            value += sep
-            next_value = next(split_iterator, None)
-            if next_value:
-                value += next_value
-        # Add to list, and keep looping
-        splitted.append(value)
-        value = next(split_iterator, None)
-    return splitted
-
-
-def merge_stream(s, goals):
-    for element in s:
-        matching_goals = [g for g in goals if g.startswith(element)]
-        if not matching_goals:
-            yield element
-            continue
-        next_element = next(s, None)
-        if not next_element:
-            yield element
-            continue
-
-        twice_matching_goals = [
-            g for g in matching_goals if (element + next_element) == g
-        ]
-        if len(twice_matching_goals) > 1:
-            raise ValueError("Should not reach here")
-        elif twice_matching_goals:
-            yield twice_matching_goals[0]
-        else:
-            yield element
-            yield next_element
-
-
-def _split_on_string_token(token: str, value: str):
-    split_result = split_with_sep(value, token)
-    in_str = False
-    for elem in split_result:
-        if elem == token:
-            in_str = not in_str
-            yield elem
-        elif in_str is True:
-            yield elem
-        else:
-            yield from split_tokens(elem)
+def is_escaped(s: str, position: int) -> bool:
+    """
+    Whether the character at position is escaped, i.e. preceded by an odd
+    number of backslashes.
 
+    Only the run of backslashes right before the character is read. Runs in
+    front of different separators or quotes never overlap, so scanning a
+    whole string this way stays linear.
+    """
+    run_start = position
+    while run_start > 0 and s[run_start - 1] == "\\":
+        run_start -= 1
+    return (position - run_start) % 2 == 1
 
-def _split_on_whitespace_token(token: str, value: str):
-    for elem in value.split(token):
-        if elem:
-            yield from split_tokens(elem)
 
+def is_number(token: str) -> bool:
+    """
+    Whether the token is an integer or a float, like 12 or 1.5.
+    """
+    return token.replace(".", "").isdigit()
 
-def _split_on_kept_token(token: str, value: str):
-    if token == "." and "." in value and value.replace(".", "").isdigit():
-        yield value
-    else:
-        for elem in split_with_sep(value, token):
-            yield from split_tokens(elem)
 
+KIND_WORD = 1
+KIND_PUNCTUATION = 2
+KIND_OPERATOR = 3
+KIND_OPENING_QUOTE = 4
+KIND_STRING = 5
+KIND_CLOSING_QUOTE = 6
 
-def split_tokens(value: str):
-    for string_token in sorted(
-        STRING_SPLIT_TOKENS,
-        key=lambda token: value.index(token) if token in value else (len(value) + 1),
-    ):
-        if string_token in value:
-            yield from _split_on_string_token(string_token, value)
-            return
-
-    for whitespace_token in WHITESPACE_SPLIT_TOKENS:
-        if whitespace_token in value:
-            yield from _split_on_whitespace_token(whitespace_token, value)
-            return
+_MERGE_TOKENS = frozenset(MERGE_TOKENS)
+_MERGE_PREFIXES = frozenset(
+    token[:i] for token in MERGE_TOKENS for i in range(1, len(token) + 1)
+)
 
-    for kept_token in KEPT_SPLIT_TOKENS:
-        if kept_token in value and value != kept_token:
-            yield from _split_on_kept_token(kept_token, value)
+_QUOTES_RE = re.compile("[{}]".format(re.escape("".join(STRING_SPLIT_TOKENS))))
+# A token is either a single kept character, or a run of anything that is not
+# whitespace, a quote or a kept character. Dots are part of the run, so that
+# floating point numbers stay in one piece; other dots are split afterwards.
+# The whitespace before each token is captured to compute its offsets.
+_TOKEN_RE = re.compile(
+    "([{whitespace}]*)([{kept}]|[^{kept}{whitespace}{quotes}]+)".format(
+        kept=re.escape("".join(t for t in KEPT_SPLIT_TOKENS if t != ".")),
+        whitespace=re.escape("".join(WHITESPACE_SPLIT_TOKENS)),
+        quotes=re.escape("".join(STRING_SPLIT_TOKENS)),
+    )
+)
+_KEPT_TOKENS = frozenset(KEPT_SPLIT_TOKENS)
+
+# Keywords opening a region closed by a partner keyword
+_PARTNERS = {
+    OPENING_PARENTHESIS: CLOSING_PARENTHESIS,
+    OPENING_SQUARE_BRACKET: CLOSING_SQUARE_BRACKET,
+    CASE: END,
+}
+_CLOSING_PARTNERS = {closing: opening for opening, closing in _PARTNERS.items()}
+_BRACKETS = frozenset((OPENING_PARENTHESIS, OPENING_SQUARE_BRACKET))
+_OPENING_PARENTHESIS = frozenset((OPENING_PARENTHESIS,))
+
+
+def _find_closing_quote(value: str, quote: str, start: int) -> int:
+    end = value.find(quote, start)
+    while end != -1 and is_escaped(value, end):
+        end = value.find(quote, end + 1)
+    return end
+
+
+def _scan_unquoted(value: str, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    for match in _TOKEN_RE.finditer(value, start, end):
+        token_start, position = match.span(2)
+        token = match.group(2)
+        if token in _KEPT_TOKENS:
+            yield token_start, position, KIND_PUNCTUATION
+        elif "." not in token or is_number(token):
+            yield token_start, position, KIND_WORD
+        else:
+            part_start = token_start
+            for part in token.split("."):
+                if part:
+                    yield part_start, part_start + len(part), KIND_WORD
+                    part_start += len(part)
+                if part_start < position:
+                    yield part_start, part_start + 1, KIND_PUNCTUATION
+                    part_start += 1
+
+
+def _scan(value: str, position: int = 0) -> Iterator[Tuple[int, int, int]]:
+    """
+    Yield the (start, end, kind) span of each token of a SQL string,
+    without merging multi-character operators.
+
+    The string is read once, from left to right: string literals are skipped
+    with ``str.find`` and the text in between them is cut by a compiled regex.
+    Input without any quote goes through a single regex scan.
+    Tokens are produced lazily, so stopping early does not read the rest.
+    """
+    quote_match = _QUOTES_RE.search(value, position)
+    while quote_match is not None:
+        quote_start = quote_match.start()
+        yield from _scan_unquoted(value, position, quote_start)
+        yield quote_start, quote_start + 1, KIND_OPENING_QUOTE
+
+        quote_end = _find_closing_quote(value, value[quote_start], quote_start + 1)
+        if quote_end == -1:
+            if quote_start + 1 < len(value):
+                yield quote_start + 1, len(value), KIND_STRING
             return
+        if quote_end > quote_start + 1:
+            yield quote_start + 1, quote_end, KIND_STRING
+        yield quote_end, quote_end + 1, KIND_CLOSING_QUOTE
+
+        position = quote_end + 1
+        quote_match = _QUOTES_RE.search(value, position)
+
+    yield from _scan_unquoted(value, position, len(value))
+
+
+def _merge_operators(
+    value: str, spans: Iterator[Tuple[int, int, int]]
+) -> Iterator[Tuple[int, int, int]]:
+    """
+    Merge the spans of multi-character operators, like <= or ||: a prefix of
+    one of MERGE_TOKENS is merged with the token following it when both
+    form the operator, and the following token is not merged again otherwise.
+    """
+    candidate = None
+    for span in spans:
+        start, end, kind = span
+        if candidate is not None:
+            candidate_start, candidate_end, _ = candidate
+            if value[candidate_start:candidate_end] + value[start:end] in _MERGE_TOKENS:
+                yield candidate_start, end, KIND_OPERATOR
+            else:
+                yield candidate
+                yield span
+            candidate = None
+        elif _is_merge_candidate(value, start, end, kind):
+            candidate = span
+        else:
+            yield span
+    if candidate is not None:
+        yield candidate
+
+
+def _is_merge_candidate(value: str, start: int, end: int, kind: int) -> bool:
+    return (
+        end - start <= 2
+        and kind <= KIND_PUNCTUATION
+        and value[start:end] in _MERGE_PREFIXES
+    )
+
+
+def split_tokens(value: str) -> List[str]:
+    """
+    Split a SQL string into tokens, without merging multi-character operators.
+    """
+    return [value[start:end] for start, end, _ in _scan(value)]
+
+
+class TokenBuffer:
+    """
+    Tokens of a SQL string, stored as spans over the original string.
+
+    Each token only costs its start and end offsets, a kind code and a keyword
+    id, kept in compact ``array`` columns. The text of a token is sliced out of
+    the SQL string when it is asked for.
+
+    The partners column holds, for each bracket and each CASE or END keyword,
+    the index of the token closing or opening it, and -1 for any other token
+    or for an unbalanced one.
+    """
+
+    __slots__ = ("sql", "starts", "ends", "kinds", "keywords", "partners", "_positions")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.starts = array("I")
+        self.ends = array("I")
+        self.kinds = array("B")
+        self.keywords = array("B")
+        self._extend(_merge_operators(sql, _scan(sql)))
+        self._build_indexes()
+
+    def _extend(self, spans: Iterator[Tuple[int, int, int]]) -> None:
+        sql = self.sql
+        starts_append = self.starts.append
+        ends_append = self.ends.append
+        kinds_append = self.kinds.append
+        keywords_append = self.keywords.append
+        for start, end, kind in spans:
+            starts_append(start)
+            ends_append(end)
+            kinds_append(kind)
+            if kind == KIND_OPERATOR:
+                keywords_append(classify(sql[start] + sql[end - 1]))
+            elif kind <= KIND_PUNCTUATION:
+                keywords_append(classify(sql[start:end]))
+            else:
+                keywords_append(NOT_A_KEYWORD)
+
+    def _build_indexes(self) -> None:
+        self._positions: Dict[int, List[int]] = {}
+        self.partners = partners = array("i", [-1]) * len(self.keywords)
+        stacks: Dict[int, List[int]] = {opening: [] for opening in _PARTNERS}
+        for index, keyword in enumerate(self.keywords):
+            if keyword in _PARTNERS:
+                stacks[keyword].append(index)
+            elif keyword in _CLOSING_PARTNERS:
+                stack = stacks[_CLOSING_PARTNERS[keyword]]
+                if stack:
+                    opening = stack.pop()
+                    partners[opening] = index
+                    partners[index] = opening
+
+    def find_keyword(self, keyword: int, start: int, end: int) -> int:
+        """
+        Index of the first token between start and end with the keyword id,
+        -1 if there is none.
+
+        The indexes of each keyword are listed on the first search for it,
+        so that searching nested ranges again and again stays cheap.
+        """
+        if keyword not in self._positions:
+            keywords = self.keywords
+            self._positions[keyword] = [
+                index for index in range(len(keywords)) if keywords[index] == keyword
+            ]
+        positions = self._positions[keyword]
+        found = bisect_left(positions, start)
+        if found < len(positions) and positions[found] < end:
+            return positions[found]
+        return -1
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> str:
+        return self.text(index)
+
+    def __iter__(self) -> Iterator[str]:
+        sql = self.sql
+        for start, end, kind in zip(self.starts, self.ends, self.kinds):
+            if kind == KIND_OPERATOR and end - start > 2:
+                # Operator merged from two parts separated by whitespace
+                yield sql[start] + sql[end - 1]
+            else:
+                yield sql[start:end]
+
+    def text(self, index: int) -> str:
+        start, end = self.starts[index], self.ends[index]
+        if self.kinds[index] == KIND_OPERATOR and end - start > 2:
+            return self.sql[start] + self.sql[end - 1]
+        return self.sql[start:end]
+
+    def span(self, index: int) -> Tuple[int, int]:
+        return self.starts[index], self.ends[index]
+
+    def line_column(self, index: int) -> Tuple[int, int]:
+        """
+        Line and column, both starting at 1, where the token begins.
+        """
+        start = self.starts[index]
+        line = self.sql.count("\n", 0, start) + 1
+        column = start - self.sql.rfind("\n", 0, start)
+        return line, column
+
+    def _is_resync_point(self, index: int) -> bool:
+        """
+        Whether lexing from the start of this token gives the same tokens as
+        lexing the whole string: the token is outside a string literal, starts
+        a new run of characters and cannot be merged with the previous token.
+        """
+        kind = self.kinds[index]
+        if kind == KIND_STRING or kind == KIND_CLOSING_QUOTE:
+            return False
+        if index == 0:
+            return True
+        if self.sql[self.starts[index] - 1] not in WHITESPACE_SPLIT_TOKENS:
+            return False
+        return not _is_merge_candidate(
+            self.sql,
+            self.starts[index - 1],
+            self.ends[index - 1],
+            self.kinds[index - 1],
+        )
 
-    yield value
-
+    def edit(
+        self, offset: int, deleted_length: int, inserted_text: str
+    ) -> Tuple["TokenBuffer", range]:
+        """
+        Tokenise the SQL string after replacing ``deleted_length`` characters
+        at ``offset`` with ``inserted_text``, reusing the tokens of this buffer.
+
+        Only the edited region is lexed again: lexing starts at the last safe
+        token before the edit and stops as soon as it meets a token that was
+        already there, at the same place relative to the end of the edit.
+
+        Return the new buffer, and the range of its tokens that were lexed
+        again. Tokens before that range are the same as in this buffer, and
+        tokens after it are the remaining tokens of this buffer, shifted.
+        """
+        sql = self.sql
+        if offset < 0 or deleted_length < 0 or offset + deleted_length > len(sql):
+            raise ValueError(
+                "Edit out of bounds: offset {}, deleted length {}".format(
+                    offset, deleted_length
+                )
+            )
+        new_sql = sql[:offset] + inserted_text + sql[offset + deleted_length :]
+        shift = len(inserted_text) - deleted_length
+        edit_end = offset + len(inserted_text)
+
+        # Last token starting before the edit where lexing can restart
+        first = bisect_right(self.starts, offset)
+        first = max(first - 1, 0)
+        while first > 0 and not self._is_resync_point(first):
+            first -= 1
+
+        result = TokenBuffer.__new__(TokenBuffer)
+        result.sql = new_sql
+        result.starts = self.starts[:first]
+        result.ends = self.ends[:first]
+        result.kinds = self.kinds[:first]
+        result.keywords = self.keywords[:first]
+
+        restart = self.starts[first] if first > 0 else 0
+        resync = len(self)
+        relexed: List[Tuple[int, int, int]] = []
+        for span in _merge_operators(new_sql, _scan(new_sql, restart)):
+            start, end, kind = span
+            # Both lexers are in the same state if the token is found at the
+            # same place, after the edit, and neither follows a merge candidate
+            if start > edit_end and relexed:
+                old_index = bisect_left(self.starts, start - shift, first)
+                if (
+                    old_index < len(self)
+                    and self.starts[old_index] == start - shift
+                    and self.ends[old_index] == end - shift
+                    and self.kinds[old_index] == kind
+                    and self._is_resync_point(old_index)
+                    and not _is_merge_candidate(new_sql, *relexed[-1])
+                ):
+                    resync = old_index
+                    break
+            relexed.append(span)
+        result._extend(iter(relexed))
+        changed = range(first, len(result))
+
+        result.starts.extend(start + shift for start in self.starts[resync:])
+        result.ends.extend(end + shift for end in self.ends[resync:])
+        result.kinds.extend(self.kinds[resync:])
+        result.keywords.extend(self.keywords[resync:])
+        result._build_indexes()
+        return result, changed
+
+
+class TokenCursor:
+    """
+    Iterator over the tokens of a TokenBuffer, between a position and an end.
+
+    Parsers read the tokens of a clause through a bounded view of the same
+    buffer, instead of a copied list of the tokens.
+
+    keyword is the keyword id of the token consumed last, by next or by the
+    until_ methods, and NOT_A_KEYWORD once they found no more tokens: parsers
+    compare it rather than the text of the token.
+    """
+
+    __slots__ = ("buffer", "position", "end", "keyword")
+
+    def __init__(
+        self, buffer: TokenBuffer, position: int = 0, end: Optional[int] = None
+    ):
+        self.buffer = buffer
+        self.position = position
+        self.end = len(buffer) if end is None else end
+        self.keyword = NOT_A_KEYWORD
+
+    def __iter__(self) -> "TokenCursor":
+        return self
+
+    def __next__(self) -> str:
+        position = self.position
+        if position >= self.end:
+            self.keyword = NOT_A_KEYWORD
+            raise StopIteration
+        self.position = position + 1
+        self.keyword = self.buffer.keywords[position]
+        return self.buffer.text(position)
+
+    def __repr__(self) -> str:
+        return "<TokenCursor {}>".format(
+            [self.buffer.text(i) for i in range(self.position, self.end)]
+        )
 
-def to_tokens(value: str):
-    tokens = split_tokens(value)
-    yield from merge_stream(tokens, MERGE_TOKENS)
+    def copy(self) -> "TokenCursor":
+        copy = TokenCursor(self.buffer, self.position, self.end)
+        copy.keyword = self.keyword
+        return copy
+
+    def peek_keyword(self) -> int:
+        """
+        Keyword id of the next token, without consuming it.
+        """
+        if self.position >= self.end:
+            return NOT_A_KEYWORD
+        return self.buffer.keywords[self.position]
+
+    def contains_keyword(self, keyword: int) -> bool:
+        """
+        Whether one of the remaining tokens is the keyword.
+        """
+        return self.buffer.find_keyword(keyword, self.position, self.end) != -1
+
+    def _skip(self, index: int, openings: Collection[int] = _PARTNERS.keys()) -> int:
+        """
+        Index of the token after the one at index, jumping over the whole
+        region it opens, if any. An unbalanced region goes until the end.
+        """
+        if self.buffer.keywords[index] in openings:
+            partner = self.buffer.partners[index]
+            if partner == -1 or partner >= self.end:
+                return self.end
+            return partner + 1
+        return index + 1
+
+    def _view_from(self, include_previous: bool) -> int:
+        if include_previous:
+            return self.position - 1
+        return self.position
+
+    def _consume_until(self, index: int) -> Tuple["TokenCursor", Optional[str]]:
+        """
+        Return the view of the tokens up to index, and consume the token at
+        index, if any.
+        """
+        view = TokenCursor(self.buffer, self.position, index)
+        if index < self.end:
+            self.position = index + 1
+            self.keyword = self.buffer.keywords[index]
+            return view, self.buffer.text(index)
+        self.position = self.end
+        self.keyword = NOT_A_KEYWORD
+        return view, None
+
+    def until_keyword(
+        self,
+        stop_keywords: FrozenSet[int],
+        include_previous: bool = False,
+        keep: FrozenSet[Tuple[int, int]] = frozenset(),
+    ) -> Tuple["TokenCursor", Optional[str]]:
+        """
+        Same as get_tokens_until_one_of, with stop words given as keyword ids.
+
+        Return a view of the tokens before the first stop keyword outside of
+        brackets and CASE expressions, and consume that stop keyword.
+        If include_previous is set, the view starts with the token that was
+        just read, like the first_token of get_tokens_until_one_of.
+        Consecutive keywords in keep, like WITH OFFSET, do not stop.
+        """
+        keywords = self.buffer.keywords
+        start = self._view_from(include_previous)
+        index = start
+        if include_previous and index < self.end:
+            index = self._skip(index)
+        while index < self.end:
+            keyword = keywords[index]
+            if keyword in stop_keywords and (
+                index == start or (keywords[index - 1], keyword) not in keep
+            ):
+                break
+            index = self._skip(index)
+        self.position = start
+        return self._consume_until(index)
+
+    def while_keyword(
+        self, kept_keywords: FrozenSet[int], include_previous: bool = False
+    ) -> Tuple["TokenCursor", Optional[str]]:
+        """
+        Same as get_tokens_until_not_in, with kept words given as keyword ids.
+        """
+        keywords = self.buffer.keywords
+        start = self._view_from(include_previous)
+        index = self.position
+        while index < self.end and keywords[index] in kept_keywords:
+            index += 1
+        self.position = start
+        return self._consume_until(index)
+
+    def until_closing_parenthesis(
+        self, include_previous: bool = False
+    ) -> "TokenCursor":
+        """
+        Same as get_tokens_until_closing_parenthesis.
+        """
+        keywords = self.buffer.keywords
+        start = self._view_from(include_previous)
+        index = start
+        while index < self.end and keywords[index] != CLOSING_PARENTHESIS:
+            index = self._skip(index, _OPENING_PARENTHESIS)
+        self.position = start
+        view, _ = self._consume_until(index)
+        return view
+
+    def split_on_commas(self) -> List["TokenCursor"]:
+        """
+        Split the remaining tokens on the commas outside of brackets.
+
+        A comma is only a separator after at least one token, and a trailing
+        comma does not start an empty view.
+        """
+        keywords = self.buffer.keywords
+        views = []
+        start = index = self.position
+        while index < self.end:
+            index = self._skip(index, _BRACKETS)
+            if index == self.end or keywords[index] == COMMA:
+                views.append(TokenCursor(self.buffer, start, index))
+                index += 1
+                start = index
+        self.position = self.end
+        return views
+
+
+def to_tokens(value: str) -> TokenCursor:
+    return TokenCursor(TokenBuffer(value))
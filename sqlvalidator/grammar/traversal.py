@@ -0,0 +1,111 @@
+"""
+Traversal of syntax trees without using the Python call stack.
+
+Parsing, formatting, validating and representing nodes are written as
+generators which yield the generator of each nested element and get back its
+result, instead of calling it. run drives them with an explicit stack, so that
+deeply nested queries never reach the recursion limit.
+
+Where a nested element does not need a traversal, like a leaf node, its result
+can be yielded directly instead of a generator.
+"""
+from types import GeneratorType
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional
+
+
+class Stored:
+    """
+    A generator whose result run also stores in cache[key], to cache it
+    without wrapping the generator in another one.
+    """
+
+    __slots__ = ("generator", "cache", "key")
+
+    def __init__(self, generator: Generator, cache: Dict[Any, Any], key: Any):
+        self.generator = generator
+        self.cache = cache
+        self.key = key
+
+
+def run(generator: Any, exhausted: Optional[Callable[[], Exception]] = None) -> Any:
+    """
+    Run a generator yielding nested generators, and return its result.
+
+    The result of each nested generator is sent back to the generator which
+    yielded it, and any other yielded value is sent back as it is. An error
+    raised by a nested generator is thrown into its parent, where it can be
+    caught like with a regular function call.
+
+    A generator calling next on an exhausted iterator stops with a
+    RuntimeError, from the StopIteration. With exhausted, that error is
+    replaced by the one exhausted returns, like a parsing error for a
+    truncated query.
+    """
+    if type(generator) is not GeneratorType:
+        if type(generator) is Stored:
+            result = generator.cache[generator.key] = run(
+                generator.generator, exhausted
+            )
+            return result
+        return generator
+    # Generators, each above the Stored it comes from if any
+    stack: List[Any] = [generator]
+    push, pop = stack.append, stack.pop
+    send = generator.send
+    result = None
+    error: Optional[BaseException] = None
+    while True:
+        try:
+            if error is None:
+                nested = send(result)
+            else:
+                thrown, error = error, None
+                nested = stack[-1].throw(thrown)
+        except StopIteration as stop:
+            pop()
+            result = stop.value
+            while stack and type(stack[-1]) is Stored:
+                stored = pop()
+                stored.cache[stored.key] = result
+            if not stack:
+                return result
+            send = stack[-1].send
+            continue
+        except Exception as e:
+            pop()
+            while stack and type(stack[-1]) is Stored:
+                pop()
+            if exhausted is not None and _is_exhausted(e):
+                replacement = exhausted()
+                replacement.__cause__ = e
+                e = replacement
+            if not stack:
+                raise e
+            error = e
+            send = stack[-1].send
+            continue
+        if type(nested) is GeneratorType:
+            push(nested)
+            send = nested.send
+            result = None
+        elif type(nested) is Stored:
+            push(nested)
+            push(nested.generator)
+            send = nested.generator.send
+            result = None
+        else:
+            result = nested
+
+
+def _is_exhausted(error: Exception) -> bool:
+    return type(error) is RuntimeError and isinstance(error.__cause__, StopIteration)
+
+
+def each(values: Iterable[Any]) -> Generator[Any, Any, Any]:
+    """
+    Generator returning the list of the results of the generators or values.
+    """
+    results: List[Any] = []
+    for value in values:
+        results.append((yield value))
+    return results
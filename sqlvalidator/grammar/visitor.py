@@ -0,0 +1,171 @@
+"""
+Generic traversals of syntax trees, from the child fields declared by each
+node class.
+
+walk iterates over the nodes of a tree, NodeVisitor calls a method per node
+class and NodeTransformer rebuilds a tree with some nodes replaced. Several
+analyses can be written as methods of a single visitor, to go over a large
+tree only once. None of them uses the Python call stack, so they handle trees
+of any depth.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlvalidator.grammar.sql import _Node, node_fields
+
+_UNSET = object()
+# Method of each visitor class for each node class, see _method
+_METHODS: Dict[Tuple[type, str, type], Optional[Callable]] = {}
+
+
+def iter_child_nodes(node: _Node) -> Iterator[_Node]:
+    """
+    Iterate over the nodes directly below the node, in the order of its fields.
+    """
+    for name in node._child_fields:
+        yield from _nodes_in(getattr(node, name, None))
+
+
+def _nodes_in(value: Any) -> Iterator[_Node]:
+    if isinstance(value, _Node):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        # Like the (when, then) tuples of a Case
+        for item in value:
+            yield from _nodes_in(item)
+
+
+def walk(node: _Node, postorder: bool = False) -> Iterator[_Node]:
+    """
+    Iterate over the node and all the nodes below it, each node before the
+    nodes below it, or after them with postorder.
+    """
+    stack: List[Tuple[_Node, bool]] = [(node, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if children_done:
+            yield node
+            continue
+        if postorder:
+            stack.append((node, True))
+        else:
+            yield node
+        children = list(iter_child_nodes(node))
+        stack.extend((child, False) for child in reversed(children))
+
+
+def _method(visitor_cls: type, prefix: str, cls: type) -> Optional[Callable]:
+    """
+    Method of the visitor class named after the closest class of the node
+    class, like visit_FunctionCall for a CountFunctionCall.
+    """
+    key = (visitor_cls, prefix, cls)
+    try:
+        return _METHODS[key]
+    except KeyError:
+        pass
+    method = None
+    for base in cls.__mro__:
+        method = getattr(visitor_cls, prefix + base.__name__, None)
+        if method is not None:
+            break
+    _METHODS[key] = method
+    return method
+
+
+class NodeVisitor:
+    """
+    Base of the visitors of syntax trees.
+
+    visit calls visit_<class name>(node) on each node before the nodes below
+    it, and leave_<class name>(node) after them. The methods of the base
+    classes apply to the subclasses without their own, for instance
+    visit_Expression is called for every expression. When a visit method
+    returns False, the nodes below are skipped.
+    """
+
+    def visit(self, node: _Node) -> None:
+        visitor_cls = type(self)
+        stack: List[Tuple[_Node, bool]] = [(node, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                leave = _method(visitor_cls, "leave_", type(node))
+                if leave is not None:
+                    leave(self, node)
+                continue
+            visit = _method(visitor_cls, "visit_", type(node))
+            if visit is not None and visit(self, node) is False:
+                continue
+            stack.append((node, True))
+            children = list(iter_child_nodes(node))
+            stack.extend((child, False) for child in reversed(children))
+
+
+class NodeTransformer:
+    """
+    Base of the transformations of syntax trees.
+
+    visit returns the tree with each node replaced by the result of
+    visit_<class name>(node), called after the nodes below it were replaced.
+    Returning None removes the node: from its list when it is in one,
+    otherwise the field is set to None. The methods of the base classes apply
+    to the subclasses without their own, like with NodeVisitor.
+
+    Nodes are not modified, as their hash is cached: a node with replaced
+    nodes below it is copied. A node met several times in the tree, like with
+    SharedNodes, is only transformed once.
+    """
+
+    def visit(self, node: _Node) -> Optional[_Node]:
+        # Replacement of each transformed node, by id. The original nodes are
+        # kept alive by the tree, so their ids are not reused meanwhile.
+        replaced: Dict[int, Optional[_Node]] = {}
+        stack: List[Tuple[_Node, bool]] = [(node, False)]
+        while stack:
+            item, children_done = stack.pop()
+            if id(item) in replaced:
+                continue
+            if not children_done:
+                stack.append((item, True))
+                children = list(iter_child_nodes(item))
+                stack.extend((child, False) for child in reversed(children))
+                continue
+            replacement = _copy_with_replaced_children(item, replaced)
+            visit = _method(type(self), "visit_", type(item))
+            if visit is not None:
+                replacement = visit(self, replacement)
+            replaced[id(item)] = replacement
+        return replaced[id(node)]
+
+
+def _copy_with_replaced_children(node: _Node, replaced: Dict[int, Any]) -> _Node:
+    changes = {}
+    for name in node._child_fields:
+        value = getattr(node, name, None)
+        new_value = _replaced_value(value, replaced)
+        if new_value is not value:
+            changes[name] = new_value
+    if not changes:
+        return node
+    copy = object.__new__(type(node))
+    for name in node_fields(type(node)):
+        value = changes.get(name, getattr(node, name, _UNSET))
+        if value is not _UNSET:
+            setattr(copy, name, value)
+    return copy
+
+
+def _replaced_value(value: Any, replaced: Dict[int, Any]) -> Any:
+    if isinstance(value, _Node):
+        return replaced.get(id(value), value)
+    if isinstance(value, (list, tuple)):
+        items = [_replaced_value(item, replaced) for item in value]
+        if all(item is original for item, original in zip(items, value)):
+            return value
+        kept = [
+            item
+            for item, original in zip(items, value)
+            if item is not None or original is None
+        ]
+        return type(value)(kept)
+    return value
@@ -1,6 +1,7 @@
 import argparse
 
 from sqlvalidator import file_handler
+from sqlvalidator.result_cache import ResultCache
 
 __version__ = "0.0.20"
 
@@ -40,6 +41,15 @@ def _main() -> None:
         help="run SQL validation and display errors.",
     )
 
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=(
+            "don't read nor write the results cached by previous runs "
+            "(in $XDG_CACHE_HOME/sqlvalidator or ~/.cache/sqlvalidator)."
+        ),
+    )
+
     args = parser.parse_args()
     src_inputs = args.SRC
 
@@ -49,13 +59,19 @@ def _main() -> None:
             "[--format | --check-format | --validate]"
         )
 
-    file_handler.handle_inputs(
-        src_inputs,
-        format_input=args.format,
-        check_input_format=args.check_format,
-        validate_input=args.validate,
-        verbose_validate_input=args.verbose_validate,
-    )
+    cache = None if args.no_cache else ResultCache(version=__version__)
+    try:
+        file_handler.handle_inputs(
+            src_inputs,
+            format_input=args.format,
+            check_input_format=args.check_format,
+            validate_input=args.validate,
+            verbose_validate_input=args.verbose_validate,
+            cache=cache,
+        )
+    finally:
+        if cache is not None:
+            cache.prune()
 
 
 if __name__ == "__main__":
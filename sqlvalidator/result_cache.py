@@ -0,0 +1,184 @@
+"""
+On-disk cache of the formatting and validation results of the command line.
+
+Each SQL string gets one small JSON file, named after a hash of the SQL, of
+the sqlvalidator version and of its source files, under
+``~/.cache/sqlvalidator`` by default. Hashing the sources keeps changes to the
+formatter or the validator made without a version bump, like in a development
+checkout, from reading the results of the previous code. Files are
+written to a temporary name and renamed into place, so that processes running
+in parallel never read a partially written entry.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from sqlvalidator import sql_validator
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Digest of the sources of each package directory, computed once per process
+_SOURCE_DIGESTS: Dict[str, str] = {}
+
+
+def default_cache_directory() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "sqlvalidator")
+
+
+def source_digest(package_directory: str = PACKAGE_DIRECTORY) -> str:
+    """
+    Hash of the paths and contents of the Python files of the package.
+    """
+    digest = _SOURCE_DIGESTS.get(package_directory)
+    if digest is not None:
+        return digest
+    paths: List[str] = []
+    for root, dirnames, filenames in os.walk(package_directory):
+        dirnames.sort()
+        paths.extend(
+            os.path.join(root, filename)
+            for filename in sorted(filenames)
+            if filename.endswith(".py")
+        )
+    sources = hashlib.sha256()
+    for path in paths:
+        sources.update(os.path.relpath(path, package_directory).encode("utf8"))
+        sources.update(b"\0")
+        with open(path, "rb") as f:
+            sources.update(hashlib.sha256(f.read()).digest())
+    digest = _SOURCE_DIGESTS[package_directory] = sources.hexdigest()
+    return digest
+
+
+class ResultCache:
+    def __init__(
+        self,
+        version: str,
+        directory: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        sources: Optional[str] = None,
+    ):
+        self.version = version
+        self.sources = source_digest() if sources is None else sources
+        self.directory = directory or default_cache_directory()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _path(self, sql: str) -> str:
+        digest = hashlib.sha256(
+            "{}\0{}\0{}".format(self.version, self.sources, sql).encode(
+                "utf8", "surrogatepass"
+            )
+        ).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".json")
+
+    def load(self, sql: str) -> Dict[str, Any]:
+        path = self._path(sql)
+        try:
+            with open(path, "r", encoding="utf8") as f:
+                entry = json.load(f)
+            # Entries are evicted by modification time, oldest first
+            os.utime(path)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(entry, dict):
+            return {}
+        return entry
+
+    def store(self, sql: str, entry: Dict[str, Any]) -> None:
+        path = self._path(sql)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf8") as f:
+                    json.dump(entry, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            # A cache that cannot be written only means a slower next run
+            return
+        self.writes += 1
+
+    def query(self, sql: str) -> "CachedSQLQuery":
+        entry = self.load(sql)
+        if "formatted" in entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return CachedSQLQuery(sql, self, entry)
+
+    def prune(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits in max_bytes.
+        """
+        if self.writes == 0:
+            return
+
+        files = []
+        total_size = 0
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        files.sort()
+        for _, size, path in files:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                # Already removed by another process
+                pass
+            total_size -= size
+
+
+class CachedSQLQuery(sql_validator.SQLQuery):
+    """
+    SQLQuery reading its formatted output and its errors from a ResultCache.
+
+    Both results are computed lazily, like for SQLQuery, and stored in the
+    cache once computed.
+    """
+
+    __slots__ = ("cache", "entry")
+
+    def __init__(self, sql: str, cache: ResultCache, entry: Dict[str, Any]):
+        super().__init__(sql)
+        self.cache = cache
+        self.entry = entry
+
+    def format(self) -> str:
+        formatted = self.entry.get("formatted")
+        if not isinstance(formatted, str):
+            formatted = super().format()
+            self.entry["formatted"] = formatted
+            self.cache.store(self.sql, self.entry)
+        return formatted
+
+    def _validate(self):
+        errors: Optional[List[str]] = self.entry.get("errors")
+        if isinstance(errors, list):
+            self.validated = True
+            self.errors = list(errors)
+            return
+        super()._validate()
+        self.entry["errors"] = list(self.errors)
+        self.cache.store(self.sql, self.entry)
@@ -1,6 +1,20 @@
-from sqlvalidator.grammar.lexer import SQLStatementParser
-from sqlvalidator.grammar.tokeniser import to_tokens
+from typing import Any, Callable, List, TextIO, Union
+
+from sqlvalidator.cache import measure_statement, parse_statement
 
 
 def format_sql(sql_string: str) -> str:
-    return SQLStatementParser.parse(to_tokens(sql_string)).transform()
+    pieces: List[str] = []
+    format_sql_to(sql_string, pieces.append)
+    return "".join(pieces)
+
+
+def format_sql_to(sql_string: str, sink: Union[TextIO, Callable[[str], Any]]) -> None:
+    """
+    Write the formatted SQL to a text stream, or pass it to a callable, in
+    pieces, without building the whole formatted text in memory.
+    """
+    writer = sink.write if hasattr(sink, "write") else sink
+    statement = parse_statement(sql_string)
+    statement.transform_to(writer)
+    measure_statement(statement)
@@ -1,10 +1,12 @@
 from typing import List
 
-from sqlvalidator.grammar.lexer import ParsingError, SQLStatementParser
-from sqlvalidator.grammar.tokeniser import to_tokens
+from sqlvalidator.cache import measure_statement, parse_statement
+from sqlvalidator.grammar.lexer import ParsingError
 
 
 class SQLQuery:
+    __slots__ = ("sql", "_sql_query", "validated", "errors")
+
     def __init__(self, sql: str):
         self.sql = sql
         self._sql_query = None
@@ -14,11 +16,13 @@ class SQLQuery:
     @property
     def sql_query(self):
         if self._sql_query is None:
-            self._sql_query = SQLStatementParser.parse(to_tokens(self.sql))
+            self._sql_query = parse_statement(self.sql)
         return self._sql_query
 
     def format(self) -> str:
-        return self.sql_query.transform()
+        text = self.sql_query.transform()
+        measure_statement(self.sql_query)
+        return text
 
     def is_valid(self) -> bool:
         if not self.validated:
@@ -29,6 +33,7 @@ class SQLQuery:
         self.validated = True
         try:
             self.errors = self.sql_query.validate()
+            measure_statement(self.sql_query)
         except ParsingError as ex:
             self.errors.append(str(ex))
 
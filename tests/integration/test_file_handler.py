@@ -1,7 +1,8 @@
 from io import StringIO
 from unittest import mock
 
-from sqlvalidator import file_handler
+from sqlvalidator import file_handler, result_cache
+from sqlvalidator.result_cache import ResultCache, source_digest
 
 
 def test_format_file():
@@ -130,3 +131,59 @@ def test_format_check_does_not_validate():
             input_file, should_format=True, should_validate=False
         )
         assert not is_valid.called, "SQLQuery.is_valid was not "
+
+
+def test_cached_results(tmp_path):
+    cache = ResultCache(version="test", directory=str(tmp_path))
+    file_content = "sql = ('select * from t;', 'select b from (select a from t)')"
+    first_run = file_handler.compute_file_content(
+        StringIO(file_content), True, True, cache
+    )
+    assert cache.misses == 2
+
+    with mock.patch("sqlvalidator.sql_validator.parse_statement") as parse_statement:
+        second_run = file_handler.compute_file_content(
+            StringIO(file_content), True, True, cache
+        )
+        assert not parse_statement.called, "SQL was parsed again"
+    assert cache.hits == 2
+    assert second_run == first_run
+    assert second_run[2] == 1
+
+
+def test_cache_is_keyed_by_version(tmp_path):
+    file_content = "'select id from t'"
+    old_cache = ResultCache(version="1", directory=str(tmp_path))
+    file_handler.compute_file_content(StringIO(file_content), True, False, old_cache)
+    new_cache = ResultCache(version="2", directory=str(tmp_path))
+    file_handler.compute_file_content(StringIO(file_content), True, False, new_cache)
+    assert new_cache.misses == 1
+
+
+def test_cache_is_keyed_by_sources(tmp_path):
+    file_content = "'select id from t'"
+    cache_directory = str(tmp_path / "cache")
+    old_cache = ResultCache(version="1", directory=cache_directory, sources="a")
+    file_handler.compute_file_content(StringIO(file_content), True, False, old_cache)
+    new_cache = ResultCache(version="1", directory=cache_directory, sources="b")
+    file_handler.compute_file_content(StringIO(file_content), True, False, new_cache)
+    assert new_cache.misses == 1
+
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "module.py").write_text("FORMAT = 1\n")
+    digest = source_digest(str(package))
+    (package / "module.py").write_text("FORMAT = 2\n")
+    result_cache._SOURCE_DIGESTS.clear()
+    assert source_digest(str(package)) != digest
+    assert ResultCache(version="1").sources == source_digest()
+
+
+def test_cache_prune(tmp_path):
+    cache = ResultCache(version="test", directory=str(tmp_path), max_bytes=200)
+    for i in range(20):
+        cache.query("SELECT col{} FROM t".format(i)).format()
+    cache.prune()
+    sizes = [f.stat().st_size for f in tmp_path.glob("*/*.json")]
+    assert 0 < len(sizes) < 20
+    assert sum(sizes) <= 200
@@ -1,4 +1,6 @@
-from sqlvalidator import format_sql
+import io
+
+from sqlvalidator import format_sql, format_sql_to
 
 
 def test_format_select_star():
@@ -1782,6 +1784,15 @@ FROM t
     assert format_sql(sql) == expected.strip()
 
 
+def test_array_agg_respect_nulls():
+    sql = "SELECT ARRAY_AGG(a respect nulls) agg from t"
+    expected = """
+SELECT ARRAY_AGG(a RESPECT NULLS) agg
+FROM t
+"""
+    assert format_sql(sql) == expected.strip()
+
+
 def test_where_boolean_followed_by_group():
     sql = """
 SELECT *
@@ -2205,3 +2216,15 @@ END
 FROM table
 """
     assert format_sql(sql) == expected.strip()
+
+
+def test_format_sql_to():
+    sql = "select a, b from (select a, b from t where a > 1) where b = 2;"
+    expected = format_sql(sql)
+    stream = io.StringIO()
+    format_sql_to(sql, stream)
+    assert stream.getvalue() == expected
+
+    pieces = []
+    format_sql_to(sql, pieces.append)
+    assert "".join(pieces) == expected
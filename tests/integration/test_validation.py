@@ -316,6 +316,11 @@ def test_nested_subquery_columns():
     assert_valid_sql(sql)
 
 
+def test_subquery_parsing_error():
+    sql = "SELECT * FROM (SELECT a, b FROM t GROUP x)"
+    assert_invalid_sql(sql, ["Missing BY after GROUP"])
+
+
 def test_nested_subquery_columns_star():
     sql = """
     select x
@@ -566,3 +571,8 @@ FROM (select field from t)
 def test_tab_as_token_separator():
     sql = "\tSELECT * FROM\ttable"
     assert_valid_sql(sql)
+
+
+def test_truncated_join():
+    assert_invalid_sql("SELECT f1 FROM t1 CROSS JOIN", ["Unexpected end of query"])
+    assert_invalid_sql("SELECT f1 FROM t1,", ["Unexpected end of query"])
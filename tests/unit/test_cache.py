@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+import sqlvalidator
+from sqlvalidator.cache import CacheInfo, ParseCache, _approximate_size
+
+
+def test_whitespace_and_keyword_case_share_an_entry():
+    cache = ParseCache()
+    statement = cache.parse("SELECT col FROM t WHERE a = 1")
+    assert cache.parse("select  col\nfrom t\n  where a=1") is statement
+    assert cache.info() == CacheInfo(
+        hits=1, misses=1, entries=1, size_bytes=cache.info().size_bytes
+    )
+
+
+def test_identifier_case_is_kept():
+    cache = ParseCache()
+    statement = cache.parse("SELECT col FROM t")
+    assert cache.parse("SELECT COL FROM t") is not statement
+    assert cache.parse("SELECT 'a' FROM t") is not cache.parse("SELECT 'A' FROM t")
+    assert cache.info().entries == 4
+
+
+def test_least_recently_used_is_evicted():
+    cache = ParseCache(max_entries=2)
+    first = cache.parse("SELECT a FROM t")
+    cache.parse("SELECT b FROM t")
+    cache.parse("SELECT a FROM t")
+    cache.parse("SELECT c FROM t")
+    assert cache.info().entries == 2
+    assert cache.parse("SELECT a FROM t") is first
+    assert cache.info().hits == 2
+
+
+def test_size_bound():
+    cache = ParseCache(max_entries=None, max_bytes=20000)
+    for i in range(50):
+        cache.parse("SELECT col{} FROM t".format(i))
+    info = cache.info()
+    assert 0 < info.entries < 50
+    assert info.size_bytes <= 20000
+
+    with pytest.raises(ValueError):
+        ParseCache(max_entries=None, max_bytes=None)
+
+
+def test_size_bound_after_formatting():
+    cache = sqlvalidator.enable_parse_cache(max_entries=None, max_bytes=300000)
+    try:
+        for i in range(10):
+            query = "SELECT {} FROM t WHERE {}".format(
+                ", ".join("c{} + {}".format(j, i) for j in range(100)),
+                " AND ".join("c{} > {}".format(j, i) for j in range(100)),
+            )
+            sqlvalidator.format_sql(query)
+            sqlvalidator.parse(query).is_valid()
+            sqlvalidator.parse(query).format()
+        sizes = [
+            _approximate_size(key) + _approximate_size(statement)
+            for key, (statement, _, _) in cache._statements.items()
+        ]
+        info = cache.info()
+        assert 0 < info.entries < 10
+        assert info.size_bytes == sum(sizes) <= 300000
+    finally:
+        sqlvalidator.disable_parse_cache()
+
+
+def test_enable_parse_cache():
+    cache = sqlvalidator.enable_parse_cache(max_entries=10)
+    try:
+        assert sqlvalidator.format_sql("select a from t") == "SELECT a\nFROM t"
+        assert sqlvalidator.format_sql("SELECT a FROM t") == "SELECT a\nFROM t"
+        assert sqlvalidator.parse("SELECT a FROM t").is_valid()
+        assert cache.info().hits == 2
+    finally:
+        sqlvalidator.disable_parse_cache()
+    sqlvalidator.format_sql("SELECT a FROM t")
+    assert cache.info().hits == 2
+
+
+def test_concurrent_access():
+    cache = ParseCache(max_entries=5)
+    queries = ["SELECT col{} FROM t".format(i) for i in range(10)]
+
+    def worker():
+        for _ in range(20):
+            for query in queries:
+                assert cache.parse(query).transform().startswith("SELECT col")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    info = cache.info()
+    assert info.hits + info.misses == 4 * 20 * 10
+    assert info.entries == 5
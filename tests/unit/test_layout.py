@@ -0,0 +1,70 @@
+from sqlvalidator.grammar import layout
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+LONG = "x" * layout.MAX_JOINED_WIDTH
+
+
+def test_indented_like_replace():
+    inner = layout.concat(LONG, "\n", layout.indented(layout.concat("a\nb", LONG)))
+    document = layout.concat("(\n", layout.indented(inner, 2), "\n)")
+    text = "(\n" + (LONG + "\n" + ("a\nb" + LONG).replace("\n", "\n ")).replace(
+        "\n", "\n  "
+    )
+    text += "\n)"
+    assert isinstance(document, layout.Doc)
+    assert layout.render(document) == text
+    assert "".join(layout.chunks(document)) == text
+
+
+def test_measures_without_rendering():
+    documents = [
+        "a",
+        "a\nb",
+        layout.join(",\n", [LONG, "a", layout.indented(LONG + "\n" + LONG, 3)]),
+        layout.indented(layout.concat(LONG, "\n", "b"), 4),
+        layout.concat(LONG, LONG),
+    ]
+    for document in documents:
+        text = layout.render(document)
+        assert layout.width(document) == len(text)
+        assert layout.is_multiline(document) == ("\n" in text)
+
+
+def test_short_texts_joined():
+    assert layout.concat("a", " AND ", "b") == "a AND b"
+    assert layout.join(", ", ["a", "b"]) == "a, b"
+    assert layout.indented("a\nb") == "a\n b"
+
+
+def test_write(monkeypatch):
+    monkeypatch.setattr(layout, "WRITE_BUFFER_SIZE", 200)
+    document = layout.join("\n", [layout.indented(LONG + "\n" + LONG)] * 10)
+    pieces = []
+    layout.write(document, pieces.append)
+    assert "".join(pieces) == layout.render(document)
+    assert len(pieces) > 1
+    assert max(map(len, pieces)) < 200 + 2 * len(LONG)
+
+
+def test_format_nested_subqueries():
+    sql = "SELECT a FROM t"
+    for _ in range(3):
+        sql = "SELECT a FROM (" + sql + ") WHERE a > 1"
+    statement = SQLStatementParser.parse(to_tokens(sql))
+    assert statement.transform() == (
+        "SELECT a\n"
+        "FROM (\n"
+        " SELECT a\n"
+        " FROM (\n"
+        "  SELECT a\n"
+        "  FROM (\n"
+        "   SELECT a\n"
+        "   FROM t\n"
+        "  )\n"
+        "  WHERE a > 1\n"
+        " )\n"
+        " WHERE a > 1\n"
+        ")\n"
+        "WHERE a > 1"
+    )
@@ -1,6 +1,12 @@
+import sys
+
+import pytest
+
+from sqlvalidator.grammar import keywords
 from sqlvalidator.grammar.lexer import (
     ExpressionParser,
     FromStatementParser,
+    ParsingError,
     SQLStatementParser,
     WhereClauseParser,
 )
@@ -10,12 +16,16 @@ from sqlvalidator.grammar.sql import (
     AnalyticsClause,
     ArithmaticOperator,
     Array,
+    BitwiseOperation,
+    Boolean,
     BooleanCondition,
     CastFunctionCall,
     ChainedColumns,
     Column,
+    CombinedQueries,
     Condition,
     CountFunctionCall,
+    DatePartExtraction,
     ExceptClause,
     FunctionCall,
     GroupByClause,
@@ -112,6 +122,38 @@ def test_aliased_string_without_as():
     assert actual == expected
 
 
+def test_operators_group_to_the_right():
+    actual, _ = ExpressionParser.parse(
+        to_tokens("a * 2 + b > 1 AND c BETWEEN 1 AND 3 OR d flag")
+    )
+    expected = Alias(
+        BooleanCondition(
+            "AND",
+            Condition(
+                ArithmaticOperator(
+                    "*",
+                    Column("a"),
+                    ArithmaticOperator("+", Integer(2), Column("b")),
+                ),
+                ">",
+                Integer(1),
+            ),
+            BooleanCondition(
+                "OR",
+                Condition(
+                    Column("c"),
+                    "BETWEEN",
+                    BooleanCondition("and", Integer(1), Integer(3)),
+                ),
+                Column("d"),
+            ),
+        ),
+        alias="flag",
+        with_as=False,
+    )
+    assert actual == expected
+
+
 def test_integer():
     actual, _ = ExpressionParser.parse(to_tokens("2"))
     expected = Integer(2)
@@ -966,3 +1008,65 @@ def test_function_with_single_comma_string_param():
     actual, _ = ExpressionParser.parse(to_tokens("test(',')"))
     expected = FunctionCall("test", String(",", quotes="'"))
     assert actual == expected
+
+
+def test_parsing_nesting_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit() * 2
+    sql = "SELECT a FROM t"
+    for _ in range(depth):
+        sql = "SELECT a FROM (" + sql + ")"
+
+    statement = SQLStatementParser.parse(to_tokens(sql))
+    for _ in range(depth):
+        assert isinstance(statement, SelectStatement)
+        assert isinstance(statement.from_statement, Parenthesis)
+        statement = statement.from_statement.args[0]
+    assert isinstance(statement, SelectStatement)
+    assert isinstance(statement.from_statement, Table)
+
+
+def test_parsing_parenthesis_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit() * 2
+    expression, _ = ExpressionParser.parse(
+        to_tokens("(" * depth + "f(a)" + ")" * depth)
+    )
+    for _ in range(depth):
+        assert isinstance(expression, Parenthesis)
+        (expression,) = expression.args
+    assert isinstance(expression, FunctionCall)
+
+
+def test_keyword_groups_match_nodes():
+    for group, values in (
+        (keywords.JOIN_KEYWORDS, Join.VALUES),
+        (keywords.SET_OPERATOR_KEYWORDS, CombinedQueries.SET_OPERATORS),
+        (keywords.BITWISE_KEYWORDS, BitwiseOperation.OPERATORS),
+        (keywords.BOOLEAN_KEYWORDS, Boolean.BOOLEAN_VALUES),
+        (keywords.NULL_KEYWORDS, Null.VALUES),
+        (keywords.TYPE_KEYWORDS, Type.VALUES),
+        (keywords.DATE_PART_KEYWORDS, DatePartExtraction.PARTS),
+        (keywords.STRING_PREFIX_KEYWORDS, String.PREFIXES),
+        (keywords.CONDITION_KEYWORDS, Condition.PREDICATES),
+        (keywords.BOOLEAN_CONDITION_KEYWORDS, BooleanCondition.PREDICATES),
+    ):
+        assert group == keywords.keyword_ids(values)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "",
+        "SELECT",
+        "SELECT a AS",
+        "SELECT a FROM",
+        "SELECT a FROM t WHERE",
+        "SELECT a FROM t AS",
+        "SELECT a FROM t CROSS JOIN",
+        "SELECT a FROM t,",
+        "SELECT CAST(a AS",
+        "WITH x AS",
+    ],
+)
+def test_truncated_statement(sql):
+    with pytest.raises(ParsingError, match="Unexpected end of query"):
+        SQLStatementParser.parse(to_tokens(sql))
@@ -0,0 +1,59 @@
+from sqlvalidator import extract_references
+from sqlvalidator.grammar.references import References
+
+
+def test_tables_and_columns():
+    assert extract_references(
+        "SELECT a, t.b, COUNT(DISTINCT c) total FROM t WHERE d > 1 ORDER BY total"
+    ) == References(tables=["t"], columns=["a", "t.b", "c", "d", "total"])
+
+
+def test_joins():
+    sql = """
+    SELECT x.id, y.name
+    FROM project.dataset.first x
+    LEFT JOIN `project.dataset.second` AS y ON x.id = y.id
+    JOIN third USING (id), fourth
+    """
+    assert extract_references(sql) == References(
+        tables=[
+            "project.dataset.first",
+            "project.dataset.second",
+            "third",
+            "fourth",
+        ],
+        columns=["x.id", "y.name", "y.id", "id"],
+    )
+
+
+def test_subqueries_and_with_queries():
+    sql = """
+    WITH recent AS (SELECT id FROM events WHERE ts > '2020-01-01')
+    SELECT id FROM recent
+    WHERE id IN (SELECT user_id FROM (SELECT user_id FROM users) u)
+    """
+    assert extract_references(sql) == References(
+        tables=["events", "users"], columns=["id", "ts", "user_id"]
+    )
+
+
+def test_names_that_are_not_columns():
+    sql = """
+    SELECT
+     CAST(a AS INT64) b,
+     EXTRACT(DAY FROM created) d,
+     CASE WHEN x IS NULL THEN 'none' ELSE r'\\d' END AS label,
+     SUM(v) OVER (PARTITION BY g ORDER BY o ROWS BETWEEN 1 PRECEDING AND CURRENT ROW),
+     s.*
+    FROM UNNEST(arr) AS item WITH OFFSET AS pos
+    """
+    assert extract_references(sql) == References(
+        tables=[], columns=["a", "created", "x", "v", "g", "o", "arr"]
+    )
+
+
+def test_columns_after_binary_operators():
+    assert extract_references(
+        "SELECT a | b, c & d, e ^ f, g || h, i << j, k # l FROM t"
+    ).columns == ["a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l"]
+    assert extract_references("SELECT a | b AS x, c FROM t").columns == ["a", "b", "c"]
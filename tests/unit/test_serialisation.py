@@ -0,0 +1,79 @@
+import marshal
+import pickle
+
+import pytest
+
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.serialisation import SerialisationError, dumps, loads
+from sqlvalidator.grammar.sharing import SharedNodes
+from sqlvalidator.grammar.sql import Column, FunctionCall, Integer
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+
+def parse(sql):
+    return SQLStatementParser.parse(to_tokens(sql))
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT a, b AS c, COUNT(DISTINCT d), 1.5, TRUE, NULL FROM t",
+        """
+        WITH w AS (SELECT id, ARRAY_AGG(x IGNORE NULLS ORDER BY y LIMIT 2) xs FROM u)
+        SELECT * EXCEPT (xs), CASE WHEN id > 1 THEN 'a' ELSE r'\\d' END
+        FROM w JOIN `p.d.t` ON w.id = t.id, UNNEST(xs) x WITH OFFSET
+        WHERE id IN (1, 2) AND NOT x IS NULL
+        GROUP BY ROLLUP(1) HAVING SUM(id) > 0
+        ORDER BY 1 DESC LIMIT 10 OFFSET 5
+        """,
+        "SELECT a FROM t UNION ALL (SELECT b FROM u)",
+    ],
+)
+def test_round_trip(sql):
+    statement = parse(sql)
+    data = dumps(statement)
+    loaded = loads(data)
+    assert loaded == statement
+    assert loaded.transform() == statement.transform()
+    assert dumps(loaded) == data
+    assert len(data) < len(pickle.dumps(statement, pickle.HIGHEST_PROTOCOL))
+
+
+def test_values_keep_their_type():
+    value = [FunctionCall("f", Integer(1), Column("a")), (1, 1.0, True, "1", None)]
+    loaded = loads(dumps(value))
+    assert loaded == value
+    assert [type(v) for v in loaded[1]] == [int, float, bool, str, type(None)]
+
+
+def test_shared_nodes():
+    sql = "SELECT UPPER(a), UPPER(a) FROM t"
+    statement = SQLStatementParser.parse(to_tokens(sql), shared_nodes=SharedNodes())
+    data = dumps(statement)
+    loaded = loads(data)
+    assert loaded == statement
+    assert loaded.expressions[0] is loaded.expressions[1]
+    assert len(data) < len(dumps(parse(sql)))
+
+
+def test_deep_nesting():
+    sql = "SELECT a FROM t"
+    for _ in range(3000):
+        sql = "SELECT a FROM (" + sql + ")"
+    data = dumps(parse(sql))
+    assert dumps(loads(data)) == data
+
+
+def test_invalid_data():
+    with pytest.raises(SerialisationError):
+        dumps(Column(object()))
+    with pytest.raises(SerialisationError):
+        loads(b"not serialised")
+
+    data = list(marshal.loads(dumps(Column("a"))))
+    data[2] = (("_FieldInfo", ("name",)),)
+    with pytest.raises(SerialisationError):
+        loads(marshal.dumps(tuple(data)))
+    data[2] = (("Column", ("__class__",)),)
+    with pytest.raises(SerialisationError):
+        loads(marshal.dumps(tuple(data)))
@@ -0,0 +1,40 @@
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.sharing import SharedNodes
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+
+def parse(sql, shared_nodes):
+    return SQLStatementParser.parse(to_tokens(sql), shared_nodes=shared_nodes)
+
+
+def test_share_within_query():
+    shared_nodes = SharedNodes()
+    statement = parse("SELECT UPPER(a), UPPER(a) FROM t WHERE a > 1", shared_nodes)
+    first, second = statement.expressions
+    assert first is second
+    assert statement.where_clause.value.value is first.args[0]
+    assert statement == parse("SELECT UPPER(a), UPPER(a) FROM t WHERE a > 1", None)
+
+
+def test_share_across_queries():
+    shared_nodes = SharedNodes()
+    with_sql = "WITH w AS (SELECT a, b FROM t WHERE c = 1) SELECT {} FROM w"
+    first = parse(with_sql.format("a"), shared_nodes)
+    second = parse(with_sql.format("b"), shared_nodes)
+    assert first.with_queries[0] is second.with_queries[0]
+    assert first.select_statement is not second.select_statement
+    assert parse(with_sql.format("a"), shared_nodes) is first
+
+    size = len(shared_nodes)
+    shared_nodes.clear()
+    assert size > 0
+    assert len(shared_nodes) == 0
+
+
+def test_share_keeps_formatting():
+    shared_nodes = SharedNodes()
+    sql = "SELECT 'a', \"a\", x y, x AS y, 1, 1.0, TRUE FROM t"
+    statement = parse(sql, shared_nodes)
+    assert statement.expressions[0] is not statement.expressions[1]
+    assert statement.expressions[2] is not statement.expressions[3]
+    assert statement.transform() == parse(sql, None).transform()
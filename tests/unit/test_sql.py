@@ -1,4 +1,13 @@
+import pickle
+import sys
+
+import pytest
+
+from sqlvalidator.grammar import sql
+from sqlvalidator.grammar.lexer import SQLStatementParser
 from sqlvalidator.grammar.sql import (
+    Addition,
+    ArithmaticOperator,
     BooleanCondition,
     CastFunctionCall,
     Column,
@@ -7,6 +16,8 @@ from sqlvalidator.grammar.sql import (
     Type,
     transform,
 )
+from sqlvalidator.grammar.tokeniser import to_tokens
+from sqlvalidator.grammar.visitor import NodeTransformer
 
 
 def test_boolean_condition():
@@ -26,3 +37,250 @@ def test_cast_function_call():
     )
     expected = "CAST(date AS DATE)"
     assert transform(sql) == expected.strip()
+
+
+def test_nodes_have_slots():
+    for cls in vars(sql).values():
+        if isinstance(cls, type) and cls.__module__ == sql.__name__:
+            assert "__dict__" not in dir(cls), cls
+
+    statement = SQLStatementParser.parse(
+        to_tokens("SELECT (a), () FROM t WHERE b IN (1, 2) GROUP BY a")
+    )
+    assert pickle.loads(pickle.dumps(statement)) == statement
+
+
+def test_structural_hash():
+    sql = "SELECT a, COUNT(DISTINCT b) FROM t WHERE a IN (1, 2) GROUP EACH BY a"
+    statement = SQLStatementParser.parse(to_tokens(sql))
+    same_statement = SQLStatementParser.parse(to_tokens(sql))
+    other_statement = SQLStatementParser.parse(to_tokens(sql.replace("2", "3")))
+    assert hash(statement) == hash(same_statement)
+    assert len({statement, same_statement, other_statement}) == 2
+    assert statement != other_statement
+
+    addition = Addition(Column("a"), Integer(1))
+    operator = ArithmaticOperator("+", Column("a"), Integer(1))
+    assert addition == operator
+    assert hash(addition) == hash(operator)
+
+
+def test_structural_hash_deep_nesting():
+    sql = "SELECT a FROM t"
+    for _ in range(3000):
+        sql = "SELECT a FROM (" + sql + ")"
+    statement = SQLStatementParser.parse(to_tokens(sql))
+    assert hash(statement) == hash(statement)
+
+
+def test_nesting_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit() * 2
+    sql = "SELECT " + "(" * depth + "a" + ")" * depth + " FROM t WHERE b"
+    statement = SQLStatementParser.parse(to_tokens(sql))
+    same_statement = SQLStatementParser.parse(to_tokens(sql))
+
+    expected = sql.replace(" FROM", "\nFROM").replace(" WHERE", "\nWHERE")
+    assert statement.transform() == expected
+    assert statement.validate() == []
+    assert repr(statement).count("<Parenthesis: ") == depth
+    assert statement == same_statement
+
+
+def test_subqueries_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit()
+    sql = "SELECT a FROM t"
+    for _ in range(depth):
+        sql = "SELECT a FROM (" + sql + ")"
+    statement = SQLStatementParser.parse(to_tokens(sql))
+    same_statement = SQLStatementParser.parse(to_tokens(sql))
+
+    assert statement.transform().count("SELECT a") == depth + 1
+    assert statement.validate() == []
+    assert repr(statement).count("<SelectStatement:") == depth + 1
+    assert statement == same_statement
+
+
+def test_formatting_cached():
+    statement = SQLStatementParser.parse(
+        to_tokens("SELECT a, COUNT(b) FROM t WHERE a > 1 AND b < 2")
+    )
+    text = statement.transform()
+    assert statement.transform() is text
+    assert statement.where_clause.value._documents["_transform"] == "a > 1 AND b < 2"
+
+    copy = pickle.loads(pickle.dumps(statement))
+    assert copy == statement
+    assert not hasattr(copy, "_documents")
+    assert copy.transform() == text
+
+
+def test_pickle_deep_nesting():
+    condition = " AND ".join("a{} = {}".format(i, i) for i in range(200))
+    statement = SQLStatementParser.parse(
+        to_tokens("SELECT a FROM t WHERE " + condition)
+    )
+    copy = pickle.loads(pickle.dumps(statement))
+    assert copy == statement
+    assert copy.transform() == statement.transform()
+
+    sql = "SELECT a FROM t"
+    for _ in range(3000):
+        sql = "SELECT a FROM (" + sql + ")"
+    statement = SQLStatementParser.parse(to_tokens(sql))
+    assert pickle.loads(pickle.dumps(statement)) == statement
+    assert pickle.loads(pickle.dumps([statement, Column("a")]))[1] == Column("a")
+
+
+def test_default_key():
+    class Pair(sql._Node):
+        __slots__ = ("left", "right")
+
+        def __init__(self, left, right):
+            self.left = left
+            self.right = right
+
+    assert Pair(Column("a"), [1]) == Pair(Column("a"), [1])
+    assert Pair(Column("a"), [1]) != Pair(Column("a"), [2])
+    assert hash(Pair(Column("a"), [1])) == hash(Pair(Column("a"), [1]))
+
+
+def test_chained_columns_validated_by_name():
+    known_fields = {sql._FieldInfo("t.b", int), sql._FieldInfo("u.*", object)}
+    found = sql.ChainedColumns(Column("t"), Column("b"))
+    in_alias = sql.ChainedColumns(Column("u"), Column("c"))
+    missing = sql.ChainedColumns(Column("t"), Column("c"))
+    assert found.validate(known_fields) == []
+    assert in_alias.validate(known_fields) == []
+    assert missing.validate(known_fields) == ["The column c was not found in alias t"]
+    # Looked up without formatting the nodes
+    for node in (found, in_alias):
+        assert "_str" not in getattr(node, "_documents", {})
+
+
+def test_nodes_immutable():
+    statement = SQLStatementParser.parse(to_tokens("SELECT a FROM t"))
+    text = statement.transform()
+    statement_hash = hash(statement)
+    column = statement.expressions[0]
+    with pytest.raises(AttributeError):
+        column.value = "zzz"
+    with pytest.raises(AttributeError):
+        del column.value
+
+    class Rename(NodeTransformer):
+        def visit_Column(self, node):
+            return Column("zzz") if node.value == "a" else node
+
+    renamed = Rename().visit(statement)
+    expected = SQLStatementParser.parse(to_tokens("SELECT zzz FROM t"))
+    assert renamed.transform() == expected.transform() == "SELECT zzz\nFROM t"
+    assert renamed == expected
+    assert hash(renamed) == hash(expected)
+    assert statement.transform() is text
+    assert hash(statement) == statement_hash
+
+    # Replacing a field by an equal value keeps the caches valid
+    sql.replace_field(column, "value", "".join(["a"]))
+    assert statement.transform() == text
+    assert hash(statement) == hash(
+        SQLStatementParser.parse(to_tokens("SELECT a FROM t"))
+    )
+
+
+def test_nested_boolean_conditions():
+    depth = 40
+    condition = "a = 1"
+    for i in range(depth):
+        condition = "(b{} = 1 OR ({}) AND c{} > 2)".format(i, condition, i)
+    statement = SQLStatementParser.parse(
+        to_tokens("SELECT a FROM t WHERE " + condition)
+    )
+    formatted = statement.transform()
+    assert formatted.count(" = 1") == depth + 1
+    assert formatted.startswith("SELECT a\nFROM t\nWHERE (\n b39 = 1\n OR (\n")
+    assert formatted.endswith("\n AND c39 > 2\n)")
+
+
+def test_known_fields_index():
+    fields = {
+        sql._FieldInfo("a", int),
+        sql._FieldInfo("t.b", int),
+        sql._FieldInfo("u.b", str),
+        sql._FieldInfo("u.c.d", str),
+    }
+    known_fields = sql._KnownFields(fields)
+    assert known_fields == fields
+    assert known_fields.named("a") == [sql._FieldInfo("a", int)]
+    assert known_fields.named("b") == ()
+    assert len(known_fields.with_suffix("b")) == 2
+    assert known_fields.with_suffix("c.d") == [sql._FieldInfo("u.c.d", str)]
+    assert not known_fields.has_wildcard
+    assert sql._KnownFields(fields | {sql._FieldInfo("*", object)}).has_wildcard
+
+    assert Column("b").validate(known_fields) == ['column "b" is ambiguous']
+    assert Column("c.d").validate(fields) == []
+    assert Column("e").validate(known_fields) == ["The column e was not found"]
+
+
+def test_known_fields_cached():
+    query = "SELECT a FROM t"
+    for i in range(3):
+        query = "SELECT *, a AS b{} FROM ({}) AS s".format(i, query)
+    statement = SQLStatementParser.parse(to_tokens(query))
+    known_fields = statement.known_fields
+    assert isinstance(known_fields, frozenset)
+    assert statement.known_fields is known_fields
+    assert sorted(f.name for f in known_fields) == ["*", "b2"]
+    subquery = statement.from_statement.expression.args[0]
+    assert subquery.known_fields is subquery.known_fields
+    assert statement.from_statement.known_fields == {
+        sql._FieldInfo(name, object) for name in ("s.*", "s.b1")
+    }
+
+
+def test_resolve_return_type():
+    known_fields = {
+        sql._FieldInfo("a", int),
+        sql._FieldInfo("t.b", str),
+        sql._FieldInfo("MONDAY", bool),
+    }
+    assert Column("a").resolve_return_type(known_fields) is int
+    assert Column("c").resolve_return_type(known_fields) is object
+    assert Column("monday").resolve_return_type(known_fields) is bool
+    chained = sql.ChainedColumns(Column("t"), Column("b"))
+    assert chained.resolve_return_type(known_fields) is str
+
+    condition = BooleanCondition(
+        "and",
+        sql.Parenthesis(Condition(Column("a"), "=", Integer(1))),
+        Column("a"),
+    )
+    assert condition.resolve_return_type(known_fields) is bool
+    assert condition.validate(known_fields) == [
+        "The argument of AND must be type boolean, not type int"
+    ]
+    # Typed without formatting the conditions
+    for node in (condition, condition.args[0]):
+        assert all(key[0] != "text" for key in node._documents if type(key) is tuple)
+
+
+def test_field_names():
+    known_fields = {
+        sql._FieldInfo("t.b.c", int),
+        sql._FieldInfo("`p.d`.b", str),
+    }
+    nested = sql.ChainedColumns(
+        sql.ChainedColumns(Column("t"), Column("b")), Column("c")
+    )
+    quoted = sql.ChainedColumns(sql.String("p.d", quotes="`"), Column("b"))
+    assert sql._field_name(nested) == "t.b.c"
+    assert sql._field_name(quoted) == "`p.d`.b"
+    assert sql._field_name(Integer(1)) is None
+    assert nested.resolve_return_type(known_fields) is int
+    assert quoted.resolve_return_type(known_fields) is str
+    # Named without formatting them
+    for node in (nested, quoted):
+        assert not any(
+            type(key) is tuple and key[0] == "text"
+            for key in getattr(node, "_documents", {})
+        )
@@ -0,0 +1,43 @@
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.sharing import SharedNodes
+from sqlvalidator.grammar.symbols import GLOBAL_SYMBOLS, SymbolTable
+from sqlvalidator.grammar.tokeniser import to_tokens
+
+
+def parse(sql, **kwargs):
+    return SQLStatementParser.parse(to_tokens(sql), **kwargs)
+
+
+def test_intern_names():
+    symbols = SymbolTable()
+    sql = "WITH w AS (SELECT a, b FROM t) SELECT a, w.b x FROM w JOIN t AS u ON a = 1"
+    first = parse(sql, symbols=symbols)
+    second = parse(sql, symbols=symbols)
+    assert len(symbols) == 6
+    assert "x" in symbols and "u" in symbols
+    column, alias = first.select_statement.expressions
+    other_column, other_alias = second.select_statement.expressions
+    assert column.value is other_column.value
+    assert alias.alias is other_alias.alias
+    assert first.with_queries[0].name is second.with_queries[0].name
+    assert column.value is first.with_queries[0].statement.expressions[0].value
+    assert first == parse(sql)
+    assert first.transform() == parse(sql).transform()
+
+    symbols.clear()
+    assert len(symbols) == 0
+
+
+def test_intern_names_with_shared_nodes():
+    symbols = SymbolTable()
+    shared_nodes = SharedNodes()
+    first = parse("SELECT a FROM t", symbols=symbols, shared_nodes=shared_nodes)
+    second = parse("SELECT a, b FROM t", symbols=symbols, shared_nodes=shared_nodes)
+    assert first.expressions[0] is second.expressions[0]
+    assert second.expressions[1].value is symbols.intern("b")
+
+
+def test_global_symbols():
+    first = parse("SELECT interned_column FROM t", symbols=GLOBAL_SYMBOLS)
+    second = parse("SELECT interned_column FROM t", symbols=GLOBAL_SYMBOLS)
+    assert first.expressions[0].value is second.expressions[0].value
@@ -0,0 +1,81 @@
+import sys
+
+import pytest
+
+from sqlvalidator.grammar.traversal import Stored, each, run
+
+
+def countdown(n):
+    if n == 0:
+        return 0
+    return 1 + (yield countdown(n - 1))
+
+
+def test_run_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit() * 2
+    assert run(countdown(depth)) == depth
+
+
+def test_run_values():
+    def doubled(values):
+        results = yield each(values)
+        return [r * 2 for r in results]
+
+    assert run(doubled([countdown(2), 3])) == [4, 6]
+    assert run("value") == "value"
+
+
+def test_run_error_caught_by_parent():
+    def failing():
+        raise KeyError("missing")
+        yield
+
+    def catching():
+        try:
+            yield failing()
+        except KeyError:
+            result = "caught"
+        return result + (yield "!")
+
+    assert run(catching()) == "caught!"
+
+    with pytest.raises(KeyError):
+        run(each([countdown(2), failing()]))
+
+
+def test_run_stored():
+    cache = {}
+
+    def parent():
+        return (yield Stored(countdown(3), cache, "parent")) + 1
+
+    assert run(parent()) == 4
+    assert run(Stored(countdown(2), cache, "root")) == 2
+    assert cache == {"parent": 3, "root": 2}
+
+    def failing():
+        raise KeyError("missing")
+        yield
+
+    with pytest.raises(KeyError):
+        run(each([Stored(failing(), cache, "failing")]))
+    assert "failing" not in cache
+
+
+def test_run_exhausted():
+    def reading(tokens):
+        return next(tokens)
+        yield
+
+    def catching(tokens):
+        try:
+            return (yield reading(tokens))
+        except ValueError:
+            return "caught"
+
+    with pytest.raises(RuntimeError):
+        run(reading(iter([])))
+    with pytest.raises(ValueError):
+        run(reading(iter([])), exhausted=ValueError)
+    assert run(catching(iter([])), exhausted=ValueError) == "caught"
+    assert run(catching(iter(["a"])), exhausted=ValueError) == "a"
@@ -0,0 +1,149 @@
+import sys
+
+from sqlvalidator.grammar import sql
+from sqlvalidator.grammar.lexer import SQLStatementParser
+from sqlvalidator.grammar.sql import (
+    Case,
+    Column,
+    Condition,
+    CountFunctionCall,
+    Integer,
+    Null,
+    Parenthesis,
+    String,
+)
+from sqlvalidator.grammar.tokeniser import to_tokens
+from sqlvalidator.grammar.visitor import (
+    NodeTransformer,
+    NodeVisitor,
+    iter_child_nodes,
+    walk,
+)
+
+
+def parse(sql_string):
+    return SQLStatementParser.parse(to_tokens(sql_string))
+
+
+def test_iter_child_nodes():
+    case = Case(
+        None,
+        [(Condition(Column("a"), "=", Integer(1)), String("x", quotes="'"))],
+        Null(),
+    )
+    assert list(iter_child_nodes(case)) == [
+        Condition(Column("a"), "=", Integer(1)),
+        String("x", quotes="'"),
+        Null(),
+    ]
+    assert list(iter_child_nodes(Column("a"))) == []
+
+
+def test_child_fields_hold_all_nodes():
+    statement = parse(
+        "SELECT a, CASE WHEN b > 1 THEN c END, COUNT(DISTINCT d) OVER (ORDER BY e) "
+        "FROM t JOIN u USING (id) WHERE f IN (1, 2) GROUP BY a ORDER BY 1 LIMIT 5"
+    )
+    for node in walk(statement):
+        for name in sql.node_fields(type(node)):
+            if name not in node._child_fields:
+                value = getattr(node, name, None)
+                assert not isinstance(value, (sql._Node, list, tuple)), name
+
+
+def test_walk():
+    statement = parse("SELECT a + 1 FROM t")
+    assert [type(n).__name__ for n in walk(statement)] == [
+        "SelectStatement",
+        "ArithmaticOperator",
+        "Column",
+        "Integer",
+        "Table",
+        "Column",
+    ]
+    assert [type(n).__name__ for n in walk(statement, postorder=True)] == [
+        "Column",
+        "Integer",
+        "ArithmaticOperator",
+        "Column",
+        "Table",
+        "SelectStatement",
+    ]
+
+
+def test_node_visitor():
+    class Analyses(NodeVisitor):
+        def __init__(self):
+            self.columns = []
+            self.functions = []
+            self.depth = 0
+            self.max_depth = 0
+
+        def visit_Column(self, node):
+            self.columns.append(node.value)
+
+        def visit_FunctionCall(self, node):
+            self.functions.append(node.function_name)
+
+        def visit_SelectStatement(self, node):
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+
+        def leave_SelectStatement(self, node):
+            self.depth -= 1
+
+        def visit_WhereClause(self, node):
+            return False
+
+    analyses = Analyses()
+    analyses.visit(
+        parse("SELECT COUNT(a), b FROM (SELECT a, b FROM t) WHERE UPPER(c) = 'C'")
+    )
+    assert analyses.columns == ["a", "b", "a", "b", "t"]
+    assert analyses.functions == ["count"]
+    assert analyses.depth == 0
+    assert analyses.max_depth == 2
+
+
+def test_node_transformer():
+    class Rename(NodeTransformer):
+        def visit_Column(self, node):
+            if node.value == "old":
+                return Column("new")
+            if node.value == "dropped":
+                return None
+            return node
+
+    sql_string = "SELECT old, dropped, COUNT(old) FROM t WHERE old > 1"
+    statement = parse(sql_string)
+    transformed = Rename().visit(statement)
+    assert transformed.transform() == (
+        "SELECT\n new,\n COUNT(new)\nFROM t\nWHERE new > 1"
+    )
+    assert statement == parse(sql_string)
+    assert isinstance(transformed.expressions[1], CountFunctionCall)
+    assert transformed.from_statement is statement.from_statement
+
+
+def test_deep_nesting():
+    depth = sys.getrecursionlimit() * 2
+    expression = Column("a")
+    for _ in range(depth):
+        expression = Parenthesis(expression)
+
+    class Counter(NodeVisitor):
+        count = 0
+
+        def visit_Parenthesis(self, node):
+            self.count += 1
+
+    counter = Counter()
+    counter.visit(expression)
+    assert counter.count == depth
+    assert len(list(walk(expression, postorder=True))) == depth + 1
+
+    class Unwrap(NodeTransformer):
+        def visit_Parenthesis(self, node):
+            return node.args[0]
+
+    assert Unwrap().visit(expression) == Column("a")